@@ -0,0 +1,275 @@
+"""
+Raw HTML archive of article pages for re-extraction: one SQLite file, pages keyed by story ID, each page
+compressed against a dictionary trained on recent Onet pages (they share most of their markup).
+
+    python -m onet_scraper.archive pages.sqlite stats
+    python -m onet_scraper.archive pages.sqlite get l4k2x9c > page.html
+
+Pages are compressed with zstd dictionaries (`zstandard`, in requirements.txt); an install without it falls back
+to zlib with a preset dictionary (only the first 32 KB of a page can refer to it, so it compresses less).
+Old pages keep the dictionary they were compressed with, so retraining never rewrites the archive.
+"""
+
+import argparse
+import logging
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter, deque
+from collections.abc import Iterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD = "zstd"
+ZLIB = "zlib"
+
+ARCHIVE_SUFFIX = ".sqlite"
+
+# Deflate matches at most 32 KB - 262 bytes back; a page refers to the dictionary from roughly its length away,
+# so a smaller dictionary leaves slack for page bytes (titles, IDs) that are not in it
+ZLIB_MAX_DICT = 31 * 1024
+
+# Markup segments for zlib dictionaries: text up to and including the next tag, long runs cut into pieces
+_SEGMENT_RE = re.compile(rb"[^<]{1,256}|<[^>]{0,256}>?")
+_MIN_SEGMENT = 8
+
+
+def _train_zlib(samples: list[bytes], size: int) -> bytes:
+    """
+    Markup shared by at least half of the sample pages, in page order, up to `size` bytes. zlib only looks 32 KB
+    back, so just the start of a page can use the dictionary: the shared head (scripts, styles, navigation).
+    """
+    shared: Counter[bytes] = Counter()
+    for sample in samples:
+        shared.update({segment for segment in _SEGMENT_RE.findall(sample) if len(segment) >= _MIN_SEGMENT})
+    threshold = max(2, len(samples) // 2)
+    chosen: list[bytes] = []
+    seen: set[bytes] = set()
+    total = 0
+    for sample in samples:
+        for segment in _SEGMENT_RE.findall(sample):
+            if total + len(segment) > size:
+                break
+            if segment not in seen and shared[segment] >= threshold:
+                seen.add(segment)
+                chosen.append(segment)
+                total += len(segment)
+    return b"".join(chosen)
+
+
+class PageArchive:
+    """
+    Story ID -> (URL, raw HTML) in a SQLite file. Pages are compressed with the newest dictionary; the archive
+    keeps the last `sample_pages` bodies as training samples, and `training_due()` turns true once they are
+    collected and again every `retrain_every` pages. `train()` only reads its arguments, so the owner can run it
+    in a thread and hand the result to `add_dictionary()`; `retrain()` does both in the caller's thread.
+    Pages are committed every `commit_every` puts (and by `commit()`/`close()`); one thread at a time may use it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        level: int = 9,
+        dict_size: int = 112 * 1024,
+        sample_pages: int = 100,
+        retrain_every: int = 5000,
+        codec: str | None = None,
+        commit_every: int = 1,
+    ):
+        self.path = path
+        self.codec = codec or (ZSTD if zstandard is not None else ZLIB)
+        if self.codec == ZSTD and zstandard is None:
+            raise RuntimeError("zstd archives need the zstandard package (pip install zstandard)")
+        self.level = level
+        self.dict_size = dict_size if self.codec == ZSTD else min(dict_size, ZLIB_MAX_DICT)
+        self.retrain_every = retrain_every
+        self.samples: deque[bytes] = deque(maxlen=sample_pages)
+        self.pages_since_training = 0
+        self.commit_every = max(1, commit_every)
+        self._uncommitted = 0
+
+        # Opened by the owner, then written by its writer thread
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS dictionaries (id INTEGER PRIMARY KEY, codec TEXT, samples INTEGER, "
+            "created_at REAL, data BLOB)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pages (story_id TEXT PRIMARY KEY, url TEXT, codec TEXT, dict_id INTEGER, "
+            "raw_size INTEGER, stored_at REAL, data BLOB)"
+        )
+        # Compressors of the current dictionary, decompressors of every dictionary read so far
+        self._dict_id: int | None = None
+        self._compressor: Any = None
+        self._decompressors: dict[tuple[str, int | None], Any] = {}
+        row = self.db.execute(
+            "SELECT id, data FROM dictionaries WHERE codec = ? ORDER BY id DESC LIMIT 1", (self.codec,)
+        )
+        latest = row.fetchone()
+        if latest is not None:
+            self._use_dictionary(*latest)
+
+    def _use_dictionary(self, dict_id: int, data: bytes) -> None:
+        self._dict_id = dict_id
+        if self.codec == ZSTD:
+            self._compressor = zstandard.ZstdCompressor(level=self.level, dict_data=zstandard.ZstdCompressionDict(data))
+        else:
+            self._compressor = data
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == ZSTD:
+            compressor = self._compressor or zstandard.ZstdCompressor(level=self.level)
+            return compressor.compress(body)
+        if self._compressor is None:
+            return zlib.compress(body, self.level)
+        compressor = zlib.compressobj(self.level, zdict=self._compressor)
+        return compressor.compress(body) + compressor.flush()
+
+    def _decompress(self, codec: str, dict_id: int | None, data: bytes) -> bytes:
+        key = (codec, dict_id)
+        if key not in self._decompressors:
+            dictionary = None
+            if dict_id is not None:
+                (dictionary,) = self.db.execute("SELECT data FROM dictionaries WHERE id = ?", (dict_id,)).fetchone()
+            if codec == ZSTD:
+                if zstandard is None:
+                    raise RuntimeError("reading zstd pages needs the zstandard package (pip install zstandard)")
+                dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+                self._decompressors[key] = zstandard.ZstdDecompressor(dict_data=dict_data)
+            else:
+                self._decompressors[key] = dictionary
+        decompressor = self._decompressors[key]
+        if codec == ZSTD:
+            return decompressor.decompress(data)
+        if decompressor is None:
+            return zlib.decompress(data)
+        return zlib.decompressobj(zdict=decompressor).decompress(data)
+
+    def put(self, story_id: str, url: str, body: bytes) -> int:
+        """Stores (or replaces) a page. Returns its compressed size."""
+        data = self._compress(body)
+        self.db.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (story_id, url, self.codec, self._dict_id, len(body), time.time(), data),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+        self.samples.append(body)
+        self.pages_since_training += 1
+        return len(data)
+
+    def commit(self) -> None:
+        if self._uncommitted:
+            self.db.commit()
+            self._uncommitted = 0
+
+    def get(self, story_id: str) -> tuple[str, bytes] | None:
+        """(URL, raw HTML) of a story, None when it is not archived."""
+        row = self.db.execute("SELECT url, codec, dict_id, data FROM pages WHERE story_id = ?", (story_id,)).fetchone()
+        if row is None:
+            return None
+        url, codec, dict_id, data = row
+        return url, self._decompress(codec, dict_id, data)
+
+    def __contains__(self, story_id: str) -> bool:
+        return self.db.execute("SELECT 1 FROM pages WHERE story_id = ?", (story_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def iter_pages(self) -> Iterator[tuple[str, str, bytes]]:
+        """(story ID, URL, raw HTML) of every page, grouped by dictionary."""
+        rows = self.db.execute("SELECT story_id, url, codec, dict_id, data FROM pages ORDER BY dict_id, story_id")
+        for story_id, url, codec, dict_id, data in rows:
+            yield story_id, url, self._decompress(codec, dict_id, data)
+
+    def training_due(self) -> bool:
+        if len(self.samples) < (self.samples.maxlen or 0):
+            return False
+        # Until a first dictionary exists (or after a failed training), retry with a fresh set of samples
+        wait = len(self.samples) if self._dict_id is None else self.retrain_every
+        return self.pages_since_training >= wait
+
+    def train(self, samples: list[bytes]) -> bytes | None:
+        """A dictionary for `samples`, None when they are too few or too small to train one."""
+        if self.codec == ZLIB:
+            return _train_zlib(samples, self.dict_size) or None
+        try:
+            return zstandard.train_dictionary(self.dict_size, samples, level=self.level).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.warning(f"PageArchive: dictionary training failed: {e}")
+            return None
+
+    def add_dictionary(self, data: bytes, samples: int) -> int:
+        """Stores a trained dictionary; new pages are compressed with it."""
+        cursor = self.db.execute(
+            "INSERT INTO dictionaries (codec, samples, created_at, data) VALUES (?, ?, ?, ?)",
+            (self.codec, samples, time.time(), data),
+        )
+        self.db.commit()
+        self._uncommitted = 0
+        self._use_dictionary(cursor.lastrowid, data)
+        self.pages_since_training = 0
+        return cursor.lastrowid
+
+    def retrain(self) -> int | None:
+        """Trains on the current samples and starts using the result. Returns the new dictionary ID."""
+        samples = list(self.samples)
+        data = self.train(samples)
+        if data is None:
+            self.pages_since_training = 0
+            return None
+        return self.add_dictionary(data, len(samples))
+
+    def stats(self) -> dict[str, Any]:
+        pages, raw, stored = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM pages"
+        ).fetchone()
+        dictionaries = self.db.execute("SELECT COUNT(*) FROM dictionaries").fetchone()[0]
+        return {
+            "pages": pages,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "ratio": round(raw / stored, 2) if stored else None,
+            "dictionaries": dictionaries,
+            "codec": self.codec,
+        }
+
+    def close(self) -> None:
+        self.commit()
+        self.db.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Read the raw HTML page archive.")
+    parser.add_argument("archive", help="Archive file (ARCHIVE_PATH)")
+    parser.add_argument("command", choices=["stats", "get"])
+    parser.add_argument("story_id", nargs="?", help="Story ID for `get`")
+    args = parser.parse_args(argv)
+
+    archive = PageArchive(args.archive)
+    try:
+        if args.command == "stats":
+            for key, value in archive.stats().items():
+                print(f"{key}: {value}")
+            return
+        page = archive.get(args.story_id or "")
+        if page is None:
+            sys.exit(f"{args.story_id}: not archived")
+        sys.stdout.buffer.write(page[1])
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Long-running entry point: one warm crawler process that re-crawls Onet on a schedule.
+
+    python -m onet_scraper.daemon --interval 15 --jitter 60
+"""
+
+import argparse
+
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+
+def build_settings(interval: float | None = None, jitter: float | None = None):
+    settings = get_project_settings()
+    settings.set("CRAWL_LOOP_ENABLED", True, priority="cmdline")
+    if interval is not None:
+        settings.set("CRAWL_LOOP_INTERVAL", interval, priority="cmdline")
+    if jitter is not None:
+        settings.set("CRAWL_LOOP_JITTER", jitter, priority="cmdline")
+    return settings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the onet spider continuously, re-seeding on a schedule.")
+    parser.add_argument("--interval", type=float, help="Minutes between cycles (CRAWL_LOOP_INTERVAL)")
+    parser.add_argument("--jitter", type=float, help="Random +/- seconds added to each interval (CRAWL_LOOP_JITTER)")
+    args = parser.parse_args(argv)
+
+    process = CrawlerProcess(build_settings(args.interval, args.jitter))
+    process.crawl("onet")
+    process.start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import logging
+import os
+import sqlite3
+
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.utils.job import job_dir
+
+logger = logging.getLogger(__name__)
+
+
+class DiskDupeFilter(RFPDupeFilter):
+    """
+    Dupefilter that keeps request fingerprints on disk instead of an ever-growing in-memory set.
+
+    Fingerprints are stored as raw 20-byte BLOBs in a WITHOUT ROWID SQLite table
+    (JOBDIR/requests.seen.sqlite), so the memory cost stays flat over multi-day runs.
+    Without JOBDIR the table lives in an in-memory database (still ~5x smaller than a set of hex strings).
+    """
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path: str | None = None, debug: bool = False, *, fingerprinter=None, stats=None) -> None:
+        # Parent opens no file when path is None; we manage our own storage
+        super().__init__(None, debug, fingerprinter=fingerprinter)
+        self.stats = stats
+        self.db_path = os.path.join(path, "requests.seen.sqlite") if path else ":memory:"
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (fp BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.seen_count = self.db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self._pending_writes = 0
+        if self.seen_count:
+            logger.info(f"DiskDupeFilter: resumed with {self.seen_count} fingerprints from {self.db_path}")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            job_dir(crawler.settings),
+            crawler.settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=crawler.request_fingerprinter,
+            stats=crawler.stats,
+        )
+
+    def request_seen(self, request) -> bool:
+        fp = self.fingerprinter.fingerprint(request)
+        cursor = self.db.execute("INSERT OR IGNORE INTO seen (fp) VALUES (?)", (fp,))
+        if cursor.rowcount == 0:
+            return True
+
+        self.seen_count += 1
+        if self.stats is not None:
+            # New fingerprints in this run (resumed ones are not counted)
+            self.stats.inc_value("dupefilter/seen")
+        self._pending_writes += 1
+        if self._pending_writes >= self.COMMIT_EVERY:
+            self.db.commit()
+            self._pending_writes = 0
+        return False
+
+    def close(self, reason: str) -> None:
+        self.db.commit()
+        self.db.close()
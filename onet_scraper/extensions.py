@@ -0,0 +1,588 @@
+import json
+import logging
+import os
+import queue
+import random
+import signal
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, NotConfigured
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.asyncio import call_later, create_looping_call
+
+from onet_scraper.archive import PageArchive
+from onet_scraper.utils import accounting
+from onet_scraper.utils.profiling import StackSampler
+from onet_scraper.utils.revisit import RevisitPolicy
+from onet_scraper.utils.urls import canonicalize_url, is_category_url, story_id
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int | None:
+    """Current resident set size in bytes (Linux /proc), or None when it cannot be read."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class MemoryGuard:
+    """
+    RSS watchdog for 24/7 runs.
+
+    Every MEMORY_GUARD_INTERVAL seconds it samples RSS. Above MEMORY_GUARD_PAUSE_MB it sets
+    `spider.discovery_paused`, which makes the category/pagination rules yield no new links
+    (articles already queued keep flowing); below MEMORY_GUARD_RESUME_MB discovery resumes.
+    It also reports memory growth per 100k URLs seen (dupefilter/seen) in logs and stats.
+    """
+
+    def __init__(self, crawler, pause_mb: float, resume_mb: float, interval: float):
+        self.crawler = crawler
+        self.pause_bytes = pause_mb * MB
+        self.resume_bytes = resume_mb * MB
+        self.interval = interval
+        self.startup_rss: int | None = None
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("MEMORY_GUARD_ENABLED"):
+            raise NotConfigured
+        if current_rss() is None:
+            logger.warning("MemoryGuard: RSS is not readable on this platform, disabled")
+            raise NotConfigured
+
+        pause_mb = crawler.settings.getfloat("MEMORY_GUARD_PAUSE_MB", 768)
+        ext = cls(
+            crawler,
+            pause_mb=pause_mb,
+            resume_mb=crawler.settings.getfloat("MEMORY_GUARD_RESUME_MB", pause_mb * 0.8),
+            interval=crawler.settings.getfloat("MEMORY_GUARD_INTERVAL", 30),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider) -> None:
+        self.startup_rss = current_rss()
+        self.task = create_looping_call(self.check, spider)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason) -> None:
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.report()
+
+    def check(self, spider) -> None:
+        rss = current_rss()
+        if rss is None:
+            return
+        stats = self.crawler.stats
+        stats.set_value("memory/rss_mb", round(rss / MB, 1))
+        stats.max_value("memory/rss_max_mb", round(rss / MB, 1))
+
+        paused = getattr(spider, "discovery_paused", False)
+        if not paused and rss > self.pause_bytes:
+            spider.discovery_paused = True
+            stats.inc_value("memory/discovery_paused")
+            logger.warning(f"MemoryGuard: RSS {rss / MB:.0f} MiB > {self.pause_bytes / MB:.0f} MiB, pausing discovery")
+        elif paused and rss < self.resume_bytes:
+            spider.discovery_paused = False
+            logger.info(f"MemoryGuard: RSS {rss / MB:.0f} MiB, resuming discovery")
+
+        self.report(log=False)
+
+    def report(self, log: bool = True) -> dict[str, float] | None:
+        """Logs RSS growth per 100k URLs seen since the spider opened."""
+        rss = current_rss()
+        urls_seen = self.crawler.stats.get_value("dupefilter/seen") or self.crawler.stats.get_value(
+            "scheduler/enqueued", 0
+        )
+        if rss is None or self.startup_rss is None or not urls_seen:
+            return None
+
+        growth_per_100k = (rss - self.startup_rss) / urls_seen * 100_000 / MB
+        self.crawler.stats.set_value("memory/growth_mb_per_100k_urls", round(growth_per_100k, 2))
+        if log:
+            logger.info(
+                f"MemoryGuard: RSS {rss / MB:.0f} MiB, {urls_seen} URLs seen, "
+                f"{growth_per_100k:.1f} MiB growth per 100k URLs"
+            )
+        return {"rss_mb": rss / MB, "urls_seen": urls_seen, "growth_mb_per_100k_urls": growth_per_100k}
+
+
+class CrawlLoop:
+    """
+    Keeps one spider open and re-crawls on a schedule (CRAWL_LOOP_ENABLED, used by `python -m onet_scraper.daemon`).
+
+    When a cycle goes idle, per-cycle stats (deltas of the crawler stats) are appended as one JSON line to
+    CRAWL_LOOP_STATS_FILE and the next cycle is scheduled CRAWL_LOOP_INTERVAL minutes later (+/- CRAWL_LOOP_JITTER
+    seconds). Each cycle re-seeds `start_urls` plus the category pages discovered so far with dont_filter; article
+    links still go through the dupefilter, so only new articles are downloaded. The process - Tor middleware state,
+    response cache and seen-set - stays warm between cycles.
+
+    With REVISIT_ENABLED each cycle also refetches up to REVISIT_BUDGET captured articles that the RevisitPolicy
+    expects to have changed; the spider only emits a revisited article again when its content hash changed.
+    """
+
+    def __init__(
+        self,
+        crawler,
+        interval: float,
+        jitter: float,
+        stats_file: str | None,
+        max_seeds: int,
+        revisit: RevisitPolicy | None = None,
+        revisit_budget: int = 0,
+    ):
+        self.crawler = crawler
+        self.interval = interval
+        self.jitter = jitter
+        self.stats_file = stats_file
+        self.max_seeds = max_seeds
+        self.cycle = 0
+        self.cycle_started_at: float | None = None
+        self._cycle_start_stats: dict = {}
+        self.category_urls: OrderedDict[str, None] = OrderedDict()
+        self.next_call = None
+        self.revisit = revisit
+        self.revisit_budget = revisit_budget
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("CRAWL_LOOP_ENABLED"):
+            raise NotConfigured
+
+        revisit = None
+        if crawler.settings.getbool("REVISIT_ENABLED"):
+            revisit = RevisitPolicy(
+                default_interval=crawler.settings.getfloat("REVISIT_DEFAULT_INTERVAL", 60) * 60,
+                min_interval=crawler.settings.getfloat("REVISIT_MIN_INTERVAL", 10) * 60,
+                max_interval=crawler.settings.getfloat("REVISIT_MAX_INTERVAL", 360) * 60,
+                max_age=crawler.settings.getfloat("REVISIT_MAX_AGE", 48) * 3600,
+                max_tracked=crawler.settings.getint("REVISIT_MAX_TRACKED", 5000),
+            )
+        ext = cls(
+            crawler,
+            interval=crawler.settings.getfloat("CRAWL_LOOP_INTERVAL", 15) * 60,
+            jitter=crawler.settings.getfloat("CRAWL_LOOP_JITTER", 60),
+            stats_file=crawler.settings.get("CRAWL_LOOP_STATS_FILE"),
+            max_seeds=crawler.settings.getint("CRAWL_LOOP_MAX_SEEDS", 50),
+            revisit=revisit,
+            revisit_budget=crawler.settings.getint("REVISIT_BUDGET", 20),
+        )
+        if revisit is not None:
+            crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider) -> None:
+        # Cycle 1 is the regular start_urls crawl
+        self._begin_cycle()
+
+    def spider_idle(self, spider) -> None:
+        if self.next_call is None:
+            self._finish_cycle()
+            delay = max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))
+            logger.info(f"CrawlLoop: next cycle in {delay / 60:.1f} min")
+            self.next_call = call_later(delay, self.start_cycle, spider)
+        raise DontCloseSpider
+
+    def spider_closed(self, spider, reason) -> None:
+        if self.next_call is not None:
+            self.next_call.cancel()
+            self.next_call = None
+        elif self.cycle_started_at is not None:
+            self._finish_cycle()
+
+    def response_received(self, response, request, spider) -> None:
+        if is_category_url(response.url):
+            url = canonicalize_url(response.url)
+            self.category_urls[url] = None
+            self.category_urls.move_to_end(url)
+            while len(self.category_urls) > self.max_seeds:
+                self.category_urls.popitem(last=False)
+
+    def item_scraped(self, item, response, spider) -> None:
+        # Only new articles and changed revisits get here (the spider drops unchanged ones)
+        item_dict = item if isinstance(item, dict) else dict(item)
+        if self.revisit.observe(item_dict) and response.meta.get("revisit"):
+            self.crawler.stats.inc_value("revisit/changed")
+        self.crawler.stats.set_value("revisit/tracked", len(self.revisit.tracked))
+
+    def seed_urls(self, spider) -> list[str]:
+        seeds = [canonicalize_url(url) for url in spider.start_urls]
+        return seeds + [url for url in self.category_urls if url not in seeds]
+
+    def start_cycle(self, spider) -> None:
+        self.next_call = None
+        self._begin_cycle()
+        seeds = self.seed_urls(spider)
+        logger.info(f"CrawlLoop: cycle {self.cycle} re-seeding {len(seeds)} listing pages")
+        for url in seeds:
+            # Listings must be fresh: bypass the dupefilter and the Tor response cache
+            request = Request(url, dont_filter=True, meta={"dont_cache": True, "crawl_cycle": self.cycle})
+            self.crawler.engine.crawl(request)
+        if self.revisit is not None:
+            self.schedule_revisits(spider)
+
+    def schedule_revisits(self, spider) -> None:
+        due = self.revisit.due(self.revisit_budget)
+        if not due:
+            return
+        logger.info(f"CrawlLoop: cycle {self.cycle} revisiting {len(due)} articles")
+        callback = spider.parse_item_offloaded if getattr(spider, "parse_pool", None) else spider.parse_item
+        for entry in due:
+            # The previous hash lets the spider drop the refetch when nothing changed
+            meta = {"dont_cache": True, "crawl_cycle": self.cycle, "revisit": True, "revisit_hash": entry.content_hash}
+            self.crawler.engine.crawl(Request(entry.url, callback=callback, dont_filter=True, meta=meta))
+        self.crawler.stats.inc_value("revisit/scheduled", len(due))
+
+    def _begin_cycle(self) -> None:
+        self.cycle += 1
+        self.cycle_started_at = time.time()
+        self._cycle_start_stats = dict(self.crawler.stats.get_stats())
+
+    def _finish_cycle(self) -> dict:
+        now = time.time()
+        deltas = {}
+        for key, value in self.crawler.stats.get_stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                delta = value - self._cycle_start_stats.get(key, 0)
+                if delta:
+                    deltas[key] = delta
+
+        record = {
+            "cycle": self.cycle,
+            "started": datetime.fromtimestamp(self.cycle_started_at).isoformat(timespec="seconds"),
+            "finished": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+            "duration_s": round(now - self.cycle_started_at, 1),
+            "stats": deltas,
+        }
+        self.cycle_started_at = None
+        logger.info(
+            f"CrawlLoop: cycle {self.cycle} done in {record['duration_s']} s, "
+            f"{deltas.get('item_scraped_count', 0)} new articles"
+        )
+
+        if self.stats_file:
+            try:
+                with open(self.stats_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.error(f"CrawlLoop: failed to write cycle stats to {self.stats_file}: {e}")
+        return record
+
+
+class Profiler:
+    """
+    On-demand, time-boxed profiling of a running crawl (PROFILE_ENABLED).
+
+    Triggered by the PROFILE_SIGNAL signal (`kill -USR1 <pid>`) or, with PROFILE_AT_START, when the spider opens.
+    For PROFILE_DURATION seconds a sampler records the stacks of the reactor thread and of the asyncio thread
+    pool that runs TorMiddleware's downloads; PROFILE_MODE "cprofile" also runs cProfile on the reactor thread.
+    Output goes next to LOG_FILE: profile-<time>.collapsed (flamegraph input), profile-<time>.txt
+    (top PROFILE_TOP functions) and, for cprofile, profile-<time>.prof (pstats) with its own table.
+    """
+
+    POOL_THREAD_PREFIX = "asyncio_"  # asyncio.to_thread workers of the default executor
+
+    def __init__(
+        self,
+        crawler,
+        output_dir: str,
+        duration: float = 30,
+        interval: float = 0.005,
+        mode: str = "sample",
+        top: int = 30,
+        at_start: bool = False,
+        signal_name: str | None = "SIGUSR1",
+    ):
+        self.crawler = crawler
+        self.output_dir = output_dir
+        self.duration = duration
+        self.interval = interval
+        self.mode = mode
+        self.top = top
+        self.at_start = at_start
+        self.signal_name = signal_name
+        self.reactor_ident: int | None = None
+        self.sampler: StackSampler | None = None
+        self.cprofile = None
+        self.prefix: str | None = None
+        self.stop_call = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PROFILE_ENABLED"):
+            raise NotConfigured
+        log_file = crawler.settings.get("LOG_FILE")
+        ext = cls(
+            crawler,
+            output_dir=os.path.dirname(os.path.abspath(log_file)) if log_file else os.getcwd(),
+            duration=crawler.settings.getfloat("PROFILE_DURATION", 30),
+            interval=crawler.settings.getfloat("PROFILE_INTERVAL", 0.005),
+            mode=crawler.settings.get("PROFILE_MODE", "sample"),
+            top=crawler.settings.getint("PROFILE_TOP", 30),
+            at_start=crawler.settings.getbool("PROFILE_AT_START"),
+            signal_name=crawler.settings.get("PROFILE_SIGNAL") or None,
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider) -> None:
+        # Signals run in the reactor thread; its stacks are the ones the reactor spends time in
+        self.reactor_ident = threading.get_ident()
+        signum = getattr(signal, self.signal_name, None) if self.signal_name else None
+        if signum is not None and threading.current_thread() is threading.main_thread():
+            signal.signal(signum, self._on_signal)
+            logger.info(f"Profiler: send {self.signal_name} to pid {os.getpid()} for a {self.duration:.0f} s profile")
+        if self.at_start:
+            self.start()
+
+    def spider_closed(self, spider, reason) -> None:
+        if self.sampler is not None:
+            self.stop()
+
+    def _on_signal(self, signum, frame) -> None:
+        # Runs between two bytecodes of the reactor thread: hand over to the reactor instead of starting here
+        from twisted.internet import reactor
+
+        reactor.callFromThread(self.start)
+
+    def thread_label(self, ident: int, name: str) -> str | None:
+        if ident == self.reactor_ident:
+            return "reactor"
+        if name.startswith(self.POOL_THREAD_PREFIX):
+            return "download-pool"
+        return None
+
+    def start(self) -> bool:
+        """Starts a profile unless one is running. Returns False when it was already running."""
+        if self.sampler is not None:
+            logger.info("Profiler: a profile is already running")
+            return False
+        self.prefix = os.path.join(self.output_dir, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.sampler = StackSampler(self.thread_label, self.interval)
+        self.sampler.start(self.duration)
+        if self.mode == "cprofile":
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()  # Only traces the calling thread: the reactor
+        self.stop_call = call_later(self.duration, self._time_up)
+        self.crawler.stats.inc_value("profile/runs")
+        logger.info(f"Profiler: {self.mode} profile for {self.duration:.0f} s -> {self.prefix}.*")
+        return True
+
+    def _time_up(self) -> None:
+        self.stop_call = None
+        self.stop()
+
+    def stop(self) -> list[str]:
+        """Stops the running profile and writes its files. Returns their paths."""
+        if self.stop_call is not None:
+            self.stop_call.cancel()
+            self.stop_call = None
+        sampler, self.sampler = self.sampler, None
+        if sampler is None:
+            return []
+        sampler.stop()
+
+        paths = [f"{self.prefix}.collapsed", f"{self.prefix}.txt"]
+        sampler.write_collapsed(paths[0])
+        sampler.write_top(paths[1], self.top)
+        if self.cprofile is not None:
+            import pstats
+
+            self.cprofile.disable()
+            paths.append(f"{self.prefix}.prof")
+            self.cprofile.dump_stats(paths[-1])
+            with open(paths[1], "a", encoding="utf-8") as f:
+                f.write("\n\ncProfile of the reactor thread (cumulative time)\n")
+                pstats.Stats(self.cprofile, stream=f).sort_stats("cumulative").print_stats(self.top)
+            self.cprofile = None
+        logger.info(f"Profiler: {sampler.samples} samples written to {', '.join(paths)}")
+        return paths
+
+
+class CostReport:
+    """
+    Crawl efficiency accounting (COST_REPORT_ENABLED): closes the cost/<rule>/<outcome> books of utils/accounting.py
+    at the end of the item pipelines - items that made it through are "saved", dropped or failed ones "invalid" -
+    and at spider close logs the table, sets cost_per_saved/* stats and appends the report as one JSON line to
+    COST_REPORT_FILE. TorMiddleware and the spider charge the other outcomes.
+    """
+
+    def __init__(self, crawler, report_file: str | None):
+        self.crawler = crawler
+        self.report_file = report_file
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("COST_REPORT_ENABLED"):
+            raise NotConfigured
+        ext = cls(crawler, report_file=crawler.settings.get("COST_REPORT_FILE"))
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(ext.item_error, signal=signals.item_error)
+        crawler.signals.connect(ext.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def _settle(self, response, outcome: str) -> None:
+        # Several items of one page are charged once: the first one settles the cost
+        accounting.settle(self.crawler.stats, getattr(response, "meta", None), outcome)
+
+    def item_scraped(self, item, response, spider) -> None:
+        self._settle(response, accounting.SAVED)
+
+    def item_dropped(self, item, response, exception, spider) -> None:
+        self._settle(response, accounting.INVALID)
+
+    def item_error(self, item, response, spider, failure) -> None:
+        self._settle(response, accounting.INVALID)
+
+    def spider_error(self, failure, response, spider) -> None:
+        self._settle(response, accounting.INVALID)
+
+    def spider_closed(self, spider, reason) -> dict:
+        report = accounting.cost_report(self.crawler.stats.get_stats())
+        for metric, value in (report["per_saved"] or {}).items():
+            self.crawler.stats.set_value(f"{accounting.PER_SAVED_PREFIX}{metric}", round(value, 3))
+        logger.info("CostReport:\n" + "\n".join(accounting.format_report(report)))
+
+        if self.report_file:
+            record = {"finished": datetime.now().isoformat(timespec="seconds"), "reason": reason, **report}
+            try:
+                with open(self.report_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.error(f"CostReport: failed to write {self.report_file}: {e}")
+        return report
+
+
+class PageArchiver:
+    """
+    Keeps the raw HTML of downloaded articles in the PageArchive at ARCHIVE_PATH (ARCHIVE_ENABLED), keyed by story
+    ID, for re-extraction (`python -m onet_scraper.reextract pages.sqlite`). A revisited article replaces the
+    stored version. Compression and SQLite writes run in a writer thread behind a bounded queue
+    (ARCHIVE_QUEUE_SIZE), committed every ARCHIVE_COMMIT_EVERY pages and whenever the queue runs empty.
+    Dictionary training - on the last ARCHIVE_SAMPLE_PAGES pages, repeated every ARCHIVE_RETRAIN_EVERY pages -
+    runs in another thread while pages keep being stored with the previous dictionary.
+    """
+
+    def __init__(self, crawler, archive: PageArchive, queue_size: int = 500):
+        self.crawler = crawler
+        self.archive = archive
+        self.trainer: threading.Thread | None = None
+        self.closed = False
+        # ("page", story ID, URL, body) / ("dictionary", data, samples); None stops the writer
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.writer = threading.Thread(target=self._write_loop, name="PageArchiveWriter", daemon=True)
+        self.writer.start()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ARCHIVE_ENABLED"):
+            raise NotConfigured
+        archive = PageArchive(
+            crawler.settings.get("ARCHIVE_PATH"),
+            level=crawler.settings.getint("ARCHIVE_LEVEL", 9),
+            dict_size=crawler.settings.getint("ARCHIVE_DICT_SIZE", 112 * 1024),
+            sample_pages=crawler.settings.getint("ARCHIVE_SAMPLE_PAGES", 100),
+            retrain_every=crawler.settings.getint("ARCHIVE_RETRAIN_EVERY", 5000),
+            commit_every=crawler.settings.getint("ARCHIVE_COMMIT_EVERY", 100),
+        )
+        ext = cls(crawler, archive, queue_size=crawler.settings.getint("ARCHIVE_QUEUE_SIZE", 500))
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def response_received(self, response, request, spider) -> None:
+        # Cached responses were archived when they were downloaded
+        if response.status != 200 or "cached" in response.flags or not isinstance(response, HtmlResponse):
+            return
+        story = story_id(response.url)
+        if story is None or self.closed:
+            return
+        stats = self.crawler.stats
+        stats.inc_value("archive/pages")
+        stats.inc_value("archive/bytes_raw", len(response.body))
+        # Blocks only when the writer is ARCHIVE_QUEUE_SIZE pages behind
+        self.queue.put(("page", story, response.url, response.body))
+
+    def _write_loop(self) -> None:
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                if task[0] == "page":
+                    self._store(*task[1:])
+                else:
+                    self.install_dictionary(*task[1:])
+                if self.queue.empty():
+                    self.archive.commit()
+            except Exception as e:
+                logger.error(f"PageArchiver: failed to store {task[1] if task[0] == 'page' else 'dictionary'}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _store(self, story: str, url: str, body: bytes) -> None:
+        stored = self.archive.put(story, url, body)
+        # Only the writer thread touches this key
+        self.crawler.stats.inc_value("archive/bytes_stored", stored)
+        if self.trainer is None and self.archive.training_due():
+            self.start_training()
+
+    def flush(self) -> None:
+        """Waits until every queued page is written and committed."""
+        self.queue.join()
+
+    def start_training(self) -> None:
+        samples = list(self.archive.samples)
+        self.trainer = threading.Thread(target=self._train, args=(samples,), name="PageArchiveTrainer", daemon=True)
+        self.trainer.start()
+
+    def _train(self, samples: list[bytes]) -> None:
+        data = self.archive.train(samples)
+        # SQLite and the compressor belong to the writer thread
+        self.queue.put(("dictionary", data, len(samples)))
+
+    def install_dictionary(self, data: bytes | None, samples: int) -> None:
+        self.trainer = None
+        if self.closed:
+            return
+        if data is None:
+            self.archive.pages_since_training = 0  # Try again with the next samples
+            return
+        dict_id = self.archive.add_dictionary(data, samples)
+        self.crawler.stats.inc_value("archive/dictionaries")
+        logger.info(f"PageArchiver: dictionary {dict_id} ({len(data)} B) trained on {samples} pages")
+
+    def spider_closed(self, spider, reason) -> None:
+        self.closed = True
+        if self.trainer is not None:
+            self.trainer.join()
+        self.queue.put(None)
+        self.writer.join()
+        stats = self.archive.stats()
+        logger.info(
+            f"PageArchiver: {stats['pages']} pages in {self.archive.path}, "
+            f"{stats['raw_bytes'] / MB:.1f} MB raw -> {stats['stored_bytes'] / MB:.1f} MB ({stats['codec']})"
+        )
+        self.archive.close()
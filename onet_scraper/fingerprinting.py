@@ -0,0 +1,33 @@
+import hashlib
+import json
+from weakref import WeakKeyDictionary
+
+from scrapy.http import Request
+
+from onet_scraper.utils.urls import fingerprint_key
+
+
+class CanonicalRequestFingerprinter:
+    """
+    Request fingerprinter that collapses Onet URL variants before Scrapy's dupefilter sees them.
+    Tracking parameters, fragments, AMP/mobile hosts and www/wiadomosci duplicates of the same
+    story all map to one fingerprint (see utils.urls.fingerprint_key).
+    """
+
+    def __init__(self):
+        self._cache: WeakKeyDictionary[Request, bytes] = WeakKeyDictionary()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls()
+
+    def fingerprint(self, request: Request) -> bytes:
+        if request not in self._cache:
+            fingerprint_data = {
+                "method": request.method,
+                "key": fingerprint_key(request.url),
+                "body": (request.body or b"").hex(),
+            }
+            fingerprint_json = json.dumps(fingerprint_data, sort_keys=True)
+            self._cache[request] = hashlib.sha1(fingerprint_json.encode()).digest()
+        return self._cache[request]
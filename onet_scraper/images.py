@@ -0,0 +1,147 @@
+"""
+Lead image storage for ImagePipeline: dimensions sniffed from image headers, optional Pillow thumbnails,
+and a persistent SQLite cache (IMAGES_STORE/images.sqlite) so each image URL is fetched at most once.
+"""
+
+import io
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Pillow (requirements.txt) makes the thumbnails; without it only dimensions and hashes are stored
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def image_size(data: bytes) -> tuple[str, int, int] | None:
+    """(format, width, height) read from the PNG/GIF/JPEG/WebP header, None for other or truncated data."""
+    try:
+        if data.startswith(b"\x89PNG\r\n\x1a\n"):
+            width, height = struct.unpack(">II", data[16:24])
+            return "png", width, height
+        if data[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack("<HH", data[6:10])
+            return "gif", width, height
+        if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+            return _webp_size(data)
+        if data.startswith(b"\xff\xd8"):
+            return _jpeg_size(data)
+    except struct.error:
+        return None
+    return None
+
+
+def _webp_size(data: bytes) -> tuple[str, int, int] | None:
+    chunk = data[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", data[26:30])
+        return "webp", width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(data[21:25], "little")
+        return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return "webp", int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(data: bytes) -> tuple[str, int, int] | None:
+    # Walk the segments up to the first start-of-frame marker (SOF0-SOF15 except DHT/JPG/DAC)
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+            return "jpeg", width, height
+        offset += 2 + length
+    return None
+
+
+def make_thumbnail(data: bytes, max_size: int, quality: int = 80) -> bytes | None:
+    """JPEG thumbnail that fits in max_size x max_size, or None without Pillow or for undecodable data."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((max_size, max_size))
+            out = io.BytesIO()
+            image.convert("RGB").save(out, "JPEG", quality=quality, optimize=True)
+            return out.getvalue()
+    except Exception as e:
+        logger.debug(f"Could not build thumbnail: {e}")
+        return None
+
+
+class ImageStore:
+    """
+    Image metadata by URL (and by content hash, to reuse the thumbnail of identical images under other URLs)
+    in IMAGES_STORE/images.sqlite, thumbnails in IMAGES_STORE/thumbs/<sha1[:2]>/<sha1>.jpg.
+    Permanent failures (HTTP errors, non-images) are cached too, so broken URLs are not refetched.
+    Safe to call from several threads (ImagePipeline runs it through asyncio.to_thread, off the reactor).
+    """
+
+    FIELDS = ("url", "status", "sha1", "format", "width", "height", "bytes", "thumbnail", "fetched_at")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "thumbs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, "images.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS images (url TEXT PRIMARY KEY, status INTEGER, sha1 TEXT, format TEXT, "
+            "width INTEGER, height INTEGER, bytes INTEGER, thumbnail TEXT, fetched_at REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS images_sha1 ON images (sha1)")
+
+    def _row(self, row) -> dict[str, Any] | None:
+        return dict(zip(self.FIELDS, row)) if row else None
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        columns = ", ".join(self.FIELDS)
+        with self._lock:
+            row = self.db.execute(f"SELECT {columns} FROM images WHERE url = ?", (url,)).fetchone()
+        return self._row(row)
+
+    def by_hash(self, sha1: str) -> dict[str, Any] | None:
+        columns = ", ".join(self.FIELDS)
+        query = f"SELECT {columns} FROM images WHERE sha1 = ? LIMIT 1"
+        with self._lock:
+            row = self.db.execute(query, (sha1,)).fetchone()
+        return self._row(row)
+
+    def put(self, record: dict[str, Any]) -> None:
+        record = {field: record.get(field) for field in self.FIELDS} | {"fetched_at": time.time()}
+        placeholders = ", ".join("?" for _ in self.FIELDS)
+        with self._lock:
+            self.db.execute(f"INSERT OR REPLACE INTO images VALUES ({placeholders})", tuple(record.values()))
+            self.db.commit()
+
+    def thumbnail_path(self, sha1: str) -> str:
+        """Path of a thumbnail, relative to the store directory."""
+        return os.path.join("thumbs", sha1[:2], f"{sha1}.jpg")
+
+    def write_thumbnail(self, sha1: str, data: bytes) -> str:
+        relative = self.thumbnail_path(sha1)
+        path = os.path.join(self.directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return relative
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
@@ -12,11 +12,24 @@ class ArticleItem(BaseModel):
     author: str | None = None
     keywords: str | None = None
     section: str | None = None
+    date_published: str | None = None  # raw JSON-LD datePublished (`date` keeps only the day)
     date_modified: str | None = None
     image_url: str | None = None
     id: str | None = None
     read_time: int | None = None  # in minutes
 
+    # Text stats for quality monitoring (see text_cleaners.clean_article_content_with_stats)
+    word_count: int | None = None
+    char_count: int | None = None
+    paragraph_count: int | None = None
+    content_hash: str | None = None  # sha1 of the cleaned paragraphs
+
+    # Lead image metadata (pipelines.ImagePipeline, IMAGES_ENABLED)
+    image_hash: str | None = None  # sha1 of the image bytes
+    image_width: int | None = None
+    image_height: int | None = None
+    image_thumbnail: str | None = None  # path relative to IMAGES_STORE
+
     @field_validator("title")
     def clean_title(cls, v):
         if not v:
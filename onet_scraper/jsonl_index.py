@@ -0,0 +1,202 @@
+"""
+Byte-offset index for the JSONL output, and a memory-mapped reader for random access.
+
+JsonWriterPipeline (PIPELINE_INDEX_ENABLED) writes data_<timestamp>.jsonl.idx next to each output file: one
+tab-separated row per record - offset, length, date, id, url - appended as the record is written. Files
+written without an index get one from `build_index` (a single streaming pass).
+
+    python -m onet_scraper.jsonl_index data.jsonl get l4k2x9c
+    python -m onet_scraper.jsonl_index data.jsonl range 2026-10-01 2026-10-07 > week.jsonl
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+from collections.abc import Iterator
+from datetime import date
+from typing import Any, NamedTuple
+
+INDEX_SUFFIX = ".idx"
+INDEX_HEADER = "#offset\tlength\tdate\tid\turl\n"
+
+# Text-mode files write os.linesep for "\n": the on-disk length of a line is one byte more on Windows
+_NEWLINE_EXTRA = len(os.linesep) - 1
+
+
+class IndexEntry(NamedTuple):
+    offset: int
+    length: int
+    date: str
+    id: str
+    url: str
+
+
+def index_key(item: dict[str, Any]) -> tuple[str, str, str]:
+    """(date, id, url) of an item, as stored in the index (tabs/newlines would break the row)."""
+    return tuple(str(item.get(field) or "").replace("\t", " ").replace("\n", " ") for field in ("date", "id", "url"))
+
+
+class IndexWriter:
+    """Appends index rows for the lines written to a JSONL file; call `add` right after writing each line."""
+
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self.offset = offset
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(INDEX_HEADER)
+
+    def add(self, line: str, key: tuple[str, str, str]) -> None:
+        length = len(line.encode("utf-8")) + line.count("\n") * _NEWLINE_EXTRA
+        self.file.write(f"{self.offset}\t{length}\t{key[0]}\t{key[1]}\t{key[2]}\n")
+        self.offset += length
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def build_index(path: str, index_path: str | None = None) -> str:
+    """Indexes an existing JSONL file in one pass (constant memory). Returns the index path."""
+    index_path = index_path or path + INDEX_SUFFIX
+    offset = 0
+    with open(path, "rb") as data, open(index_path, "w", encoding="utf-8") as index:
+        index.write(INDEX_HEADER)
+        for raw in data:
+            try:
+                item = json.loads(raw)
+            except ValueError:
+                item = None
+            if isinstance(item, dict):
+                item_date, item_id, url = index_key(item)
+                index.write(f"{offset}\t{len(raw)}\t{item_date}\t{item_id}\t{url}\n")
+            offset += len(raw)
+    return index_path
+
+
+def _map(path: str) -> tuple[Any, mmap.mmap | None]:
+    f = open(path, "rb")
+    # Empty files cannot be mapped
+    if os.fstat(f.fileno()).st_size == 0:
+        return f, None
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class JsonlReader:
+    """
+    Random access to a JSONL output file through its index; both files are memory-mapped, so records are read
+    straight from the page cache and nothing is loaded up front. `get`/`by_url` build an in-memory key ->
+    offset table on first use (the last record of a key wins: a revisited article was written again);
+    `entries`, `iter_date_range` and iteration stream through the index with constant memory.
+    Index rows past the end of the data (a file still being written) are ignored.
+    """
+
+    def __init__(self, path: str, index_path: str | None = None):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        if not os.path.exists(self.index_path):
+            build_index(path, self.index_path)
+        self._data_file, self._data = _map(path)
+        self._index_file, self._index = _map(self.index_path)
+        self._data_size = len(self._data) if self._data is not None else 0
+        self._lookups: dict[str, dict[str, tuple[int, int]]] = {}
+
+    def __enter__(self) -> "JsonlReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                mapped.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def entries(self) -> Iterator[IndexEntry]:
+        index = self._index
+        if index is None:
+            return
+        position = 0
+        while True:
+            end = index.find(b"\n", position)
+            if end < 0:
+                return  # Last row not complete yet
+            row = index[position:end].rstrip(b"\r")
+            position = end + 1
+            if not row or row.startswith(b"#"):
+                continue
+            offset, length, item_date, item_id, url = row.decode("utf-8").split("\t")
+            entry = IndexEntry(int(offset), int(length), item_date, item_id, url)
+            if entry.offset + entry.length > self._data_size:
+                return
+            yield entry
+
+    def record(self, offset: int, length: int) -> dict[str, Any]:
+        return json.loads(self._data[offset : offset + length])
+
+    def _lookup(self, field: str, value: str) -> dict[str, Any] | None:
+        if field not in self._lookups:
+            self._lookups[field] = {getattr(entry, field): (entry.offset, entry.length) for entry in self.entries()}
+        position = self._lookups[field].get(value)
+        return self.record(*position) if position is not None else None
+
+    def get(self, story_id: str) -> dict[str, Any] | None:
+        """The record of a story ID, None when the file has none."""
+        return self._lookup("id", story_id)
+
+    def by_url(self, url: str) -> dict[str, Any] | None:
+        return self._lookup("url", url)
+
+    def iter_date_range(self, start: str | date | None = None, end: str | date | None = None) -> Iterator[dict]:
+        """Records dated from `start` to `end` (inclusive, ISO dates; None = open), in file order."""
+        start = start.isoformat() if isinstance(start, date) else start
+        end = end.isoformat() if isinstance(end, date) else end
+        for entry in self.entries():
+            # Item dates are YYYY-MM-DD; compare on the precision of the bound
+            if start and entry.date[: len(start)] < start:
+                continue
+            if end and entry.date[: len(end)] > end:
+                continue
+            yield self.record(entry.offset, entry.length)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for entry in self.entries():
+            yield self.record(entry.offset, entry.length)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.entries())
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Random access to JSONL output through its offset index.")
+    parser.add_argument("path", help="data_*.jsonl file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="(Re)build the index of an existing file")
+    subparsers.add_parser("get", help="Record by story ID").add_argument("id")
+    subparsers.add_parser("url", help="Record by URL").add_argument("url")
+    date_range = subparsers.add_parser("range", help="Records dated START..END (inclusive)")
+    date_range.add_argument("start")
+    date_range.add_argument("end", nargs="?")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(build_index(args.path))
+        return
+    with JsonlReader(args.path) as reader:
+        if args.command == "range":
+            for record in reader.iter_date_range(args.start, args.end):
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        record = reader.get(args.id) if args.command == "get" else reader.by_url(args.url)
+        if record is None:
+            sys.exit("not found")
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
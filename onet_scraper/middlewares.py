@@ -1,21 +1,74 @@
 import asyncio
 import logging
+import random
+import threading
+import time
+from collections import Counter
 from typing import Any
 
-from curl_cffi import requests as curl_requests
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 from scrapy.http import HtmlResponse
-from stem import Signal
-from stem.control import Controller
+from scrapy.spidermiddlewares.base import BaseSpiderMiddleware
+from scrapy.utils.url import url_is_from_any_domain
+
+from onet_scraper import signals as project_signals
+from onet_scraper import tor_control
+from onet_scraper.tor_supervisor import TorSupervisor
+from onet_scraper.utils import accounting
+from onet_scraper.utils.response_cache import ResponseCache
+from onet_scraper.utils.url_classifier import ARTICLE, IGNORE, LISTING
+from onet_scraper.utils.urls import story_id
 
 logger = logging.getLogger(__name__)
 
 
+TOR_DOMAINS = ["onet.pl"]
+
+
+class ResponseTooLarge(Exception):
+    """Raised from the curl write callback to abort a download over its body size limit."""
+
+
+class UrlClassifierMiddleware(BaseSpiderMiddleware):
+    """
+    Spider middleware: drops requests the spider's UrlClassifier marks as IGNORE before they are scheduled,
+    and tags the rest with meta["url_kind"] (article/listing). dont_filter requests are always kept.
+    """
+
+    def get_processed_request(self, request, response):
+        classifier = getattr(self.crawler.spider, "url_classifier", None)
+        if classifier is None:
+            return request
+        kind = classifier.classify(request.url)
+        if kind == IGNORE and not request.dont_filter:
+            self.crawler.stats.inc_value("urlclassifier/ignored")
+            return None
+        request.meta.setdefault("url_kind", kind)
+        return request
+
+
 class TorMiddleware:
     """
     Middleware to bypass anti-bot protections using curl_cffi + Tor Network.
     Features:
     - TLS fingerprint impersonation (Chrome/Safari)
     - Automatic IP rotation via Tor Control Port on 403 blocks
+    - Bounded memory + disk response cache (TOR_CACHE_*) of listing pages, disk I/O in threads
+    - In-middleware retries (TOR_MAX_RETRIES) with jittered exponential backoff and a new circuit per attempt,
+      so a failing request keeps its scheduler slot instead of re-entering the queue
+    - Circuit warm-up (TOR_WARMUP_ENABLED): waits for Tor bootstrap, pre-builds circuits and sends a cheap
+      warm-up fetch before the first request and after every NEWNYM; traffic is held while a rotation is in progress
+    - Exit-node tracking (TOR_EXIT_TRACKING_ENABLED): per-exit ban/latency stats from CIRC events, exits that keep
+      getting banned are pushed to ExcludeExitNodes; optionally restricts exits to TOR_EXIT_COUNTRIES
+    - Body limits (TOR_MAX_BODY_SIZE per request type) enforced while streaming, explicit Accept-Encoding
+      (TOR_ACCEPT_ENCODING) and wire vs decoded byte stats
+    - Cost accounting: bytes and download time of each page go to meta["cost"] (see utils/accounting.py);
+      banned attempts, oversized bodies and non-200 pages are charged to the cost/* stats directly
+    - Embedded Tor (TOR_SUPERVISOR_ENABLED): launches and restarts its own tor daemons (see tor_supervisor.py);
+      with several instances every rotation moves traffic to the next one while the banned one builds a new circuit
+    - Storage backpressure: no new download starts while JsonWriterPipeline's queue is over its high watermark
+      (storage_backpressure signal)
 
     Refactored to use synchronous curl_cffi in a thread pool with configurable timeouts.
     """
@@ -47,131 +100,532 @@ class TorMiddleware:
         password: str | None = None,
         timeout: int = 30,
         max_retries: int = 3,
+        cache: ResponseCache | None = None,
+        cache_articles: bool = False,
+        retry_backoff_base: float = 1.0,
+        retry_backoff_max: float = 30.0,
+        stats=None,
+        warmup: bool = False,
+        warmup_url: str = "https://www.onet.pl/robots.txt",
+        prebuild_circuits: int = 2,
+        bootstrap_timeout: float = 60.0,
+        exit_tracker: tor_control.ExitTracker | None = None,
+        exit_countries: list[str] | None = None,
+        max_body_sizes: dict[str, int] | None = None,
+        accept_encoding: str = "br, zstd, gzip",
+        ca_bundle: str | None = None,
+        tor_instances: list[tuple[str, int]] | None = None,
+        supervisor: TorSupervisor | None = None,
     ):
         self._profile_index = 0
         self.tor_proxy = tor_proxy
         self.control_port = control_port
+        # (SOCKS proxy, control port) of every Tor daemon; tor_proxy/control_port are the one in use
+        self.tor_instances = tor_instances or [(tor_proxy, control_port)]
+        self._instance_index = 0
+        self.supervisor = supervisor
         self.password = password
         self.timeout = timeout
         self.max_retries = max_retries
+        self.cache = cache
+        self.cache_articles = cache_articles
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_max = retry_backoff_max
+        self.stats = stats
+
+        # Circuit bookkeeping: every NEWNYM starts a new "circuit generation"; failures are counted for the
+        # current one only (older generations are dropped on rotation, tor/circuit_failures_max keeps the peak)
+        self.circuit_id = 0
+        self.circuit_failures: Counter[int] = Counter()
+
+        # Warm-up state: requests wait on `_circuit_ready` while a rotation is building a new circuit
+        self.warmup = warmup
+        self.warmup_url = warmup_url
+        self.prebuild_circuits = prebuild_circuits
+        self.bootstrap_timeout = bootstrap_timeout
+        self._started = False
+        self._startup_lock = asyncio.Lock()
+        self._circuit_ready = asyncio.Event()
+        self._circuit_ready.set()
+        self._rotations_in_progress = 0
+        # Cleared while the item writer is behind (storage_backpressure)
+        self._storage_ready = asyncio.Event()
+        self._storage_ready.set()
+
+        # Exit tracking keeps a controller per Tor instance open for CIRC events and ExcludeExitNodes updates
+        self.exit_tracker = exit_tracker
+        self.exit_countries = exit_countries or []
+        self._exit_controller = None  # of the instance in use
+        self._exit_controllers: dict[int, Any] = {}  # control port -> controller, one per instance
+
+        # {"article": bytes, "listing": bytes}; 0 or missing = unlimited
+        self.max_body_sizes = max_body_sizes or {}
+        self.accept_encoding = accept_encoding
+        # Custom CA file for TLS verification (None = curl_cffi's bundled CAs)
+        self.ca_bundle = ca_bundle
+        # Transfer stats are updated from download threads
+        self._transfer_lock = threading.Lock()
+        # Wire bytes of the last download, per download thread (read back by `_sync_download`)
+        self._local = threading.local()
+
+        # The spider's UrlClassifier and rule names (set on spider_opened); without the classifier,
+        # Onet URLs are classified by shape
+        self.classifier = None
+        self.rule_names: tuple[str, ...] = ()
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls(
-            tor_proxy=crawler.settings.get("TOR_PROXY", "socks5://127.0.0.1:9050"),
-            control_port=crawler.settings.getint("TOR_CONTROL_PORT", 9051),
-            password=crawler.settings.get("TOR_PASSWORD", None),
+        cache = ResponseCache.from_crawler(crawler) if crawler.settings.getbool("TOR_CACHE_ENABLED") else None
+        exit_tracker = None
+        if crawler.settings.getbool("TOR_EXIT_TRACKING_ENABLED"):
+            exit_tracker = tor_control.ExitTracker(
+                ban_threshold=crawler.settings.getint("TOR_EXIT_BAN_THRESHOLD", 3),
+                ban_ratio=crawler.settings.getfloat("TOR_EXIT_BAN_RATIO", 0.5),
+                max_excluded=crawler.settings.getint("TOR_EXIT_MAX_EXCLUDED", 200),
+            )
+        tor_proxy = crawler.settings.get("TOR_PROXY", "socks5://127.0.0.1:9050")
+        control_port = crawler.settings.getint("TOR_CONTROL_PORT", 9051)
+        password = crawler.settings.get("TOR_PASSWORD", None)
+        supervisor = tor_instances = None
+        if crawler.settings.getbool("TOR_SUPERVISOR_ENABLED"):
+            # Our own daemons replace TOR_PROXY/TOR_CONTROL_PORT (cookie authentication); their ports are fixed,
+            # the processes are started off the reactor before the first download (`_ensure_started`)
+            supervisor = TorSupervisor.from_crawler(crawler)
+            tor_instances = [(instance.proxy, instance.control_port) for instance in supervisor.instances]
+            (tor_proxy, control_port), password = tor_instances[0], None
+        middleware = cls(
+            tor_proxy=tor_proxy,
+            control_port=control_port,
+            password=password,
             timeout=crawler.settings.getint("TOR_CONNECTION_TIMEOUT", 30),
             max_retries=crawler.settings.getint("TOR_MAX_RETRIES", 3),
+            cache=cache,
+            cache_articles=crawler.settings.getbool("TOR_CACHE_ARTICLES"),
+            retry_backoff_base=crawler.settings.getfloat("TOR_RETRY_BACKOFF_BASE", 1.0),
+            retry_backoff_max=crawler.settings.getfloat("TOR_RETRY_BACKOFF_MAX", 30.0),
+            stats=crawler.stats,
+            warmup=crawler.settings.getbool("TOR_WARMUP_ENABLED"),
+            warmup_url=crawler.settings.get("TOR_WARMUP_URL", "https://www.onet.pl/robots.txt"),
+            prebuild_circuits=crawler.settings.getint("TOR_PREBUILD_CIRCUITS", 2),
+            bootstrap_timeout=crawler.settings.getfloat("TOR_BOOTSTRAP_TIMEOUT", 60.0),
+            exit_tracker=exit_tracker,
+            exit_countries=crawler.settings.getlist("TOR_EXIT_COUNTRIES"),
+            max_body_sizes=crawler.settings.getdict("TOR_MAX_BODY_SIZE"),
+            accept_encoding=crawler.settings.get("TOR_ACCEPT_ENCODING", "br, zstd, gzip"),
+            ca_bundle=crawler.settings.get("TOR_CA_BUNDLE") or None,
+            tor_instances=tor_instances,
+            supervisor=supervisor,
         )
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.storage_backpressure, signal=project_signals.storage_backpressure)
+        return middleware
 
     def _get_next_profile(self) -> str:
         profile = self.BROWSER_PROFILES[self._profile_index]
         self._profile_index = (self._profile_index + 1) % len(self.BROWSER_PROFILES)
         return profile
 
+    def _sync_prepare_circuits(self, controller) -> None:
+        """Blocks until Tor has an established circuit, then pre-builds spare ones."""
+        if not tor_control.wait_until_ready(controller, self.bootstrap_timeout):
+            return
+        if self.prebuild_circuits:
+            built = tor_control.prebuild_circuits(controller, self.prebuild_circuits, self.bootstrap_timeout)
+            logger.debug(f"TorMiddleware: pre-built {built}/{self.prebuild_circuits} circuits")
+
     def _sync_renew_identity(self):
         """Synchronous Tor identity renewal."""
+        # Deferred: stem is only needed once the first rotation happens
+        from stem import Signal
+
         try:
-            with Controller.from_port(port=self.control_port) as controller:
-                if self.password:
-                    controller.authenticate(password=self.password)
-                else:
-                    controller.authenticate()  # Cookie auth
+            with tor_control.open_controller(self.control_port, self.password) as controller:
                 controller.signal(Signal.NEWNYM)
+                # With several instances the next one takes over and is prepared instead (`_renew_tor_identity`)
+                if self.warmup and len(self.tor_instances) == 1:
+                    self._sync_prepare_circuits(controller)
         except Exception as e:
             logger.error(f"Failed to renew Tor identity: {e}")
 
+    def _use_next_instance(self) -> bool:
+        """Moves traffic to the next Tor instance. Returns False when there is only one."""
+        if len(self.tor_instances) == 1:
+            return False
+        self._instance_index = (self._instance_index + 1) % len(self.tor_instances)
+        self.tor_proxy, self.control_port = self.tor_instances[self._instance_index]
+        self._exit_controller = self._exit_controllers.get(self.control_port)
+        return True
+
+    def _sync_bootstrap(self):
+        """Synchronous start-up check: Tor bootstrapped, circuits built."""
+        try:
+            with tor_control.open_controller(self.control_port, self.password) as controller:
+                self._sync_prepare_circuits(controller)
+        except Exception as e:
+            logger.error(f"Tor control port unavailable for warm-up: {e}")
+
+    def _sync_start_exit_tracking(self):
+        """Opens the long-lived controllers (one per instance): CIRC listener, exit country preference."""
+        from stem.control import EventType
+
+        for _, control_port in self.tor_instances:
+            try:
+                controller = tor_control.connect_controller(control_port, self.password)
+                controller.add_event_listener(self.exit_tracker.handle_circuit_event, EventType.CIRC)
+                if self.exit_countries:
+                    controller.set_conf("ExitNodes", ",".join(f"{{{cc.lower()}}}" for cc in self.exit_countries))
+            except Exception as e:
+                logger.error(f"Tor exit tracking unavailable on control port {control_port}: {e}")
+                continue
+            self._exit_controllers[control_port] = controller
+        self._exit_controller = self._exit_controllers.get(self.control_port)
+
+    def _sync_apply_exclusions(self):
+        # Every instance avoids the exits banned on any of them
+        for controller in list(self._exit_controllers.values()) or [self._exit_controller]:
+            try:
+                controller.set_conf("ExcludeExitNodes", self.exit_tracker.exclude_exit_nodes())
+            except Exception as e:
+                logger.error(f"Failed to update ExcludeExitNodes: {e}")
+
+    def _socks_token(self) -> str | None:
+        """SOCKS username shared by all requests of the current circuit generation (exit tracking only)."""
+        if self.exit_tracker is None:
+            return None
+        return f"onet-{self.circuit_id}"
+
+    def _proxy_for(self, token: str) -> str:
+        scheme, _, address = self.tor_proxy.partition("://")
+        return f"{scheme}://{token}:onet@{address}"
+
+    def _sync_download(
+        self, url: str, profile: str, proxy: str | None
+    ) -> tuple[tuple[int, bytes, str, dict[str, Any]], int | None]:
+        """`_sync_make_request` plus the bytes it pulled over Tor (None when unknown)."""
+        self._local.wire_bytes = None
+        if proxy is None:
+            result = self._sync_make_request(url, profile)
+        else:
+            result = self._sync_make_request(url, profile, proxy)
+        return result, self._local.wire_bytes
+
+    async def _download(
+        self, url: str, profile: str, token: str | None
+    ) -> tuple[tuple[int, bytes, str, dict[str, Any]], int | None]:
+        """Runs the synchronous request in a thread to avoid blocking the event loop."""
+        proxy = self._proxy_for(token) if token is not None else None
+        return await asyncio.to_thread(self._sync_download, url, profile, proxy)
+
+    async def _record_exit(self, token: str | None, banned: bool, latency: float | None = None) -> None:
+        """Attributes a request outcome to the exit relay that served it."""
+        if self.exit_tracker is None:
+            return
+        exit_fp = self.exit_tracker.token_exits.get(token)
+        if exit_fp is None:
+            exit_fp = await asyncio.to_thread(self.exit_tracker.resolve, token, self._exit_controller)
+        if exit_fp is None:
+            self._inc_stat("tor/exit_unknown")
+            return
+
+        if banned:
+            self._inc_stat("tor/exit_bans")
+        if self.exit_tracker.record(exit_fp, banned, latency):
+            logger.warning(f"TorMiddleware: excluding exit {exit_fp} ({self.exit_tracker.bans[exit_fp]} bans)")
+            self._inc_stat("tor/exits_excluded")
+            if self._exit_controller is not None:
+                await asyncio.to_thread(self._sync_apply_exclusions)
+
+    async def _warm_up_fetch(self) -> None:
+        """Cheap request that pays the circuit/TLS set-up cost instead of the first real request."""
+        started = time.monotonic()
+        try:
+            (status_code, _, _, _), _ = await self._download(
+                self.warmup_url, self._get_next_profile(), self._socks_token()
+            )
+        except Exception as e:
+            logger.warning(f"TorMiddleware: warm-up fetch failed: {e}")
+            self._inc_stat("tor/warmup_failed")
+            return
+        logger.info(f"TorMiddleware: warm-up fetch {status_code} in {time.monotonic() - started:.1f}s")
+        self._inc_stat("tor/warmups")
+
+    async def _ensure_started(self) -> None:
+        """Starts the embedded Tor daemons, exit tracking and the warm-up exactly once; first requests wait for it."""
+        if self._started:
+            return
+        async with self._startup_lock:
+            if self._started:
+                return
+            if self.supervisor is not None:
+                try:
+                    await asyncio.to_thread(self.supervisor.start)
+                except Exception as e:
+                    # Downloads fail and are retried/given up as with an unreachable external Tor
+                    logger.error(f"TorMiddleware: embedded Tor failed to start: {e}")
+                    self._inc_stat("tor/supervisor/start_failed")
+            if self.exit_tracker is not None:
+                await asyncio.to_thread(self._sync_start_exit_tracking)
+            if self.warmup:
+                await asyncio.to_thread(self._sync_bootstrap)
+                await self._warm_up_fetch()
+            self._started = True
+
+    def spider_opened(self, spider) -> None:
+        self.classifier = getattr(spider, "url_classifier", None)
+        self.rule_names = tuple(getattr(spider, "rule_names", ()))
+
+    def storage_backpressure(self, paused: bool) -> None:
+        if paused:
+            self._storage_ready.clear()
+        else:
+            self._storage_ready.set()
+
+    async def spider_closed(self, spider) -> None:
+        if self.exit_tracker is not None:
+            self._inc_stat("tor/exits_seen", len(self.exit_tracker.requests))
+            for exit_fp, requests, bans, avg_latency in self.exit_tracker.worst_exits():
+                latency = f"{avg_latency:.1f}s" if avg_latency is not None else "-"
+                logger.info(f"TorMiddleware: exit {exit_fp}: {bans}/{requests} banned, avg latency {latency}")
+        # Stopping the daemons waits for every tor process (and the health-check thread): off the reactor
+        await asyncio.to_thread(self._sync_shutdown)
+
+    def _sync_shutdown(self) -> None:
+        """Closes the exit-tracking controllers and stops the embedded Tor daemons."""
+        for controller in list(self._exit_controllers.values()) or [self._exit_controller]:
+            if controller is not None:
+                controller.close()
+        self._exit_controllers.clear()
+        self._exit_controller = None
+        if self.supervisor is not None:
+            self.supervisor.stop()
+
     async def _renew_tor_identity(self):
-        """Signals Tor to change identity (get new IP) - async wrapper."""
-        await asyncio.to_thread(self._sync_renew_identity)
+        """Signals Tor to change identity (get new IP) - async wrapper. Holds new fetches until it is done."""
+        self._rotations_in_progress += 1
+        self._circuit_ready.clear()
+        try:
+            await asyncio.to_thread(self._sync_renew_identity)
+            if self._use_next_instance() and self.warmup:
+                await asyncio.to_thread(self._sync_bootstrap)
+            self.circuit_id += 1
+            self.circuit_failures.clear()
+            if self.warmup:
+                await self._warm_up_fetch()
+        finally:
+            self._rotations_in_progress -= 1
+            if not self._rotations_in_progress:
+                self._circuit_ready.set()
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform(0, min(max, base * 2**attempt))."""
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff_base * 2**attempt))
+
+    def _inc_stat(self, key: str, count: int = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    def _charge(self, rule: str, outcome: str, size: int, download_s: float) -> None:
+        if self.stats is not None:
+            accounting.charge(self.stats, rule, outcome, size=size, download_s=download_s)
+
+    def _record_failure(self) -> None:
+        self.circuit_failures[self.circuit_id] += 1
+        self._inc_stat("tor/failures")
+        if self.stats is not None:
+            self.stats.max_value("tor/circuit_failures_max", self.circuit_failures[self.circuit_id])
+
+    def _url_kind(self, url: str) -> str:
+        if self.classifier is not None:
+            return self.classifier.classify(url)
+        if not url_is_from_any_domain(url, TOR_DOMAINS):
+            return IGNORE
+        return ARTICLE if story_id(url) else LISTING
+
+    def _cacheable(self, request) -> bool:
+        # Article pages are fetched once (the page archive keeps them); listings come back within the TTL
+        return self.cache_articles or (request.meta.get("url_kind") or self._url_kind(request.url)) != ARTICLE
+
+    def _max_body_size(self, url: str) -> int:
+        # Everything that is not an article (listings, warm-up fetches) gets the listing limit
+        request_type = ARTICLE if self._url_kind(url) == ARTICLE else LISTING
+        return int(self.max_body_sizes.get(request_type) or 0)
+
+    def _record_transfer(self, url: str, wire_bytes: int, body_bytes: int) -> None:
+        if wire_bytes and body_bytes:
+            logger.debug(f"TorMiddleware: {url} {wire_bytes} B on the wire, {body_bytes} B decoded")
+        if self.stats is None:
+            return
+        with self._transfer_lock:
+            self.stats.inc_value("tor/bytes_wire", wire_bytes)
+            self.stats.inc_value("tor/bytes_decoded", body_bytes)
+            self.stats.max_value("tor/body_bytes_max", body_bytes)
 
     def _sync_make_request(
-        self, url: str, profile: str
+        self, url: str, profile: str, proxy: str | None = None
     ) -> tuple[int, bytes, str, dict[str, Any]]:
         """
-        Synchronous HTTP request via curl_cffi with Tor proxy.
+        Synchronous HTTP request via curl_cffi with Tor proxy (`proxy` overrides TOR_PROXY, e.g. with SOCKS auth).
+        The body is collected chunk by chunk so an oversized page is aborted at the limit (ResponseTooLarge).
         Returns: (status_code, content, final_url, headers)
         """
-        try:
-            response = curl_requests.get(
-                url,
-                impersonate=profile,
-                proxies={"http": self.tor_proxy, "https": self.tor_proxy},
-                timeout=self.timeout,
-                allow_redirects=True,
-            )
-            return (
-                response.status_code,
-                response.content,
-                str(response.url),
-                dict(response.headers),
-            )
-        except Exception as e:
-            # Re-raise to be caught by the caller
-            raise e
+        # Deferred: curl_cffi is only needed once the first request is made (keeps `scrapy list` fast)
+        from curl_cffi import requests as curl_requests
 
-    async def process_request(self, request, spider) -> HtmlResponse | None:
-        if "onet.pl" not in request.url:
-            return None
+        max_size = self._max_body_size(url)
+        body = bytearray()
+
+        def collect(chunk: bytes) -> int:
+            body.extend(chunk)
+            if max_size and len(body) > max_size:
+                raise ResponseTooLarge(f"{url} exceeds {max_size} bytes")
+            return len(chunk)
+
+        response = curl_requests.get(
+            url,
+            impersonate=profile,
+            proxies={"http": proxy or self.tor_proxy, "https": proxy or self.tor_proxy},
+            timeout=self.timeout,
+            allow_redirects=True,
+            accept_encoding=self.accept_encoding,
+            content_callback=collect,
+            verify=self.ca_bundle or True,
+        )
+        content = bytes(body)
+        # download_size is what came over Tor (compressed), the body is already decoded by curl
+        self._record_transfer(url, response.download_size, len(content))
+        self._local.wire_bytes = response.download_size
+        return (
+            response.status_code,
+            content,
+            str(response.url),
+            dict(response.headers),
+        )
 
+    def _build_response(
+        self, request, status_code: int, content: bytes, final_url: str, headers: dict[str, Any], flags=None
+    ) -> HtmlResponse:
+        # curl_cffi handles decompression, so we must remove Content-Encoding
+        # to prevent Scrapy from trying to decompress it again.
+        headers = dict(headers)
+        headers.pop("Content-Encoding", None)
+        headers.pop("content-encoding", None)
+
+        return HtmlResponse(
+            url=final_url,
+            status=status_code,
+            body=content,
+            encoding="utf-8",
+            request=request,
+            headers=headers,
+            flags=flags,
+        )
+
+    async def _fetch(self, request, spider) -> tuple[HtmlResponse | None, bytes]:
+        """
+        One download attempt through Tor.
+        Returns (response, b"") on success, or (None, failure_body) on a ban or connection error.
+        """
+        # Don't start a download while items pile up in front of storage, or on a circuit that is being replaced
+        await self._storage_ready.wait()
+        await self._circuit_ready.wait()
         profile = self._get_next_profile()
         spider.logger.debug(f"TorMiddleware: [{profile}] {request.url}")
 
+        token = self._socks_token()
+        rule = accounting.rule_label(request.meta, self.rule_names)
+        started = time.monotonic()
         try:
-            # Run synchronous request in a thread to avoid blocking the event loop
-            status_code, content, final_url, headers = await asyncio.to_thread(
-                self._sync_make_request, request.url, profile
-            )
-
-            # Detect soft ban: redirected to homepage when requesting an article
-            is_soft_ban = "wiadomosci" in request.url and final_url.rstrip("/") in [
-                "https://www.onet.pl",
-                "http://www.onet.pl",
-                "https://onet.pl",
-            ]
-
-            if status_code in [403, 503] or is_soft_ban:
-                ban_type = (
-                    "Soft Ban (Redirect)" if is_soft_ban else f"Block ({status_code})"
-                )
-                spider.logger.warning(
-                    f"TorMiddleware: {ban_type}! Rotating IP and Retrying..."
-                )
-                await self._renew_tor_identity()
-                
-                # Signal Scrapy to retry the request (by returning a Response with a retry-able status or raising DoNotProcess)
-                # But here we just return 504 (Gateway Timeout) to trigger Scrapy's retry middleware if enabled, or just fail.
-                # Returning 504 is a reasonable way to say "Proxy failed".
-                return HtmlResponse(
-                    url=request.url,
-                    status=504,
-                    request=request,
-                    body=b"Tor Soft Ban / Block",
-                    encoding="utf-8",
-                )
-
-            # curl_cffi handles decompression, so we must remove Content-Encoding
-            # to prevent Scrapy from trying to decompress it again.
-            headers.pop("Content-Encoding", None)
-            headers.pop("content-encoding", None)
-
-            return HtmlResponse(
-                url=final_url,
-                status=status_code,
-                body=content,
-                encoding="utf-8",
-                request=request,
-                headers=headers,
-            )
-
+            (status_code, content, final_url, headers), wire_bytes = await self._download(request.url, profile, token)
+        except ResponseTooLarge as e:
+            # Not a Tor problem - a new circuit would download the same page
+            self._inc_stat("tor/body_too_large")
+            self._charge(rule, accounting.SKIPPED, self._max_body_size(request.url), time.monotonic() - started)
+            raise IgnoreRequest(f"TorMiddleware: {e}") from e
         except Exception as e:
             spider.logger.error(f"TorMiddleware Connection Error: {e}. Rotating IP...")
+            self._charge(rule, accounting.BANNED, 0, time.monotonic() - started)
+            return None, f"Tor Error: {str(e)}".encode("utf-8")
+        elapsed = time.monotonic() - started
+        size = wire_bytes if wire_bytes is not None else len(content)
+
+        # Detect soft ban: redirected to homepage when requesting an article
+        is_soft_ban = "wiadomosci" in request.url and final_url.rstrip("/") in [
+            "https://www.onet.pl",
+            "http://www.onet.pl",
+            "https://onet.pl",
+        ]
+
+        if status_code in [403, 503] or is_soft_ban:
+            ban_type = "Soft Ban (Redirect)" if is_soft_ban else f"Block ({status_code})"
+            spider.logger.warning(f"TorMiddleware: {ban_type}! Rotating IP and Retrying...")
+            self._charge(rule, accounting.BANNED, size, elapsed)
+            await self._record_exit(token, banned=True)
+            return None, b"Tor Soft Ban / Block"
+
+        await self._record_exit(token, banned=False, latency=elapsed)
+
+        if status_code == 200:
+            accounting.add_cost(request.meta, rule, size, elapsed)
+        else:
+            # HttpErrorMiddleware drops it before any callback sees it
+            self._charge(rule, accounting.SKIPPED, size, elapsed)
+
+        if self.cache is not None and status_code == 200 and self._cacheable(request):
+            await self.cache.set(request.url, (status_code, content, final_url, headers))
+
+        return self._build_response(request, status_code, content, final_url, headers), b""
+
+    async def process_request(self, request, spider) -> HtmlResponse | None:
+        kind = request.meta.get("url_kind") or self._url_kind(request.url)
+        if kind == IGNORE:
+            if not url_is_from_any_domain(request.url, TOR_DOMAINS):
+                return None  # Not an Onet page: Scrapy's own download handlers take it
+            # Onet page no rule wants (pogoda/sport/archiwum, assets...): no Tor bandwidth spent
+            self._inc_stat("tor/ignored_urls")
+            raise IgnoreRequest(f"TorMiddleware: ignored URL {request.url}")
+
+        # Served locally: retries and repeated listing visits within the TTL
+        if self.cache is not None and not request.meta.get("dont_cache") and self._cacheable(request):
+            cached = await self.cache.get(request.url)
+            if cached is not None:
+                spider.logger.debug(f"TorMiddleware: [cache] {request.url}")
+                # No Tor traffic, but the page is still parsed (CPU) and counted
+                accounting.add_cost(request.meta, accounting.rule_label(request.meta, self.rule_names))
+                return self._build_response(request, *cached, flags=["cached"])
+
+        await self._ensure_started()
+
+        # Per-URL attempt budget, carried in meta across Scrapy-level retries of the same request
+        max_attempts = request.meta.get("tor_max_attempts", self.max_retries + 1)
+        failure_body = b""
+        while request.meta.get("tor_attempts", 0) < max_attempts:
+            attempt = request.meta.get("tor_attempts", 0)
+            request.meta["tor_attempts"] = attempt + 1
+            if attempt:
+                self._inc_stat("tor/retries")
+
+            response, failure_body = await self._fetch(request, spider)
+            if response is not None:
+                return response
+
+            self._record_failure()
+            if request.meta["tor_attempts"] >= max_attempts:
+                break  # No attempt left to use a new circuit: don't spend a NEWNYM or hold other fetches
+            # Fresh circuit for the next attempt, then back off (Tor also rate-limits NEWNYM)
             await self._renew_tor_identity()
-            return HtmlResponse(
-                url=request.url,
-                status=504,
-                request=request,
-                body=f"Tor Error: {str(e)}".encode("utf-8"),
-                encoding="utf-8",
-            )
+            await asyncio.sleep(self._retry_delay(attempt))
+
+        spider.logger.error(f"TorMiddleware: giving up on {request.url} after {max_attempts} attempts")
+        self._inc_stat("tor/retry_exhausted")
+        # Budget spent here already - don't let the generic RetryMiddleware start over
+        request.meta["dont_retry"] = True
+
+        # 504 (Gateway Timeout) = "Proxy failed"; errback/stats see a regular failed response
+        return HtmlResponse(
+            url=request.url,
+            status=504,
+            request=request,
+            body=failure_body,
+            encoding="utf-8",
+        )
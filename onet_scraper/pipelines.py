@@ -1,18 +1,79 @@
+import asyncio
+import hashlib
 import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from typing import Any
 
-from scrapy.exceptions import DropItem
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.asyncio import create_looping_call
+
+from onet_scraper.jsonl_index import INDEX_SUFFIX, IndexWriter, index_key
+from onet_scraper.signals import storage_backpressure
+
+logger = logging.getLogger(__name__)
 
 
 class JsonWriterPipeline:
-    def __init__(self):
+    """
+    Writes items as JSON lines to data_<timestamp>.jsonl.
+
+    With PIPELINE_WRITER_QUEUE_SIZE > 0 the file is written by a background thread behind a bounded queue:
+    a slow volume no longer stalls the reactor, queue depth and enqueue->write latency go to pipeline/* stats,
+    and when the queue passes PIPELINE_BACKPRESSURE_HIGH the storage_backpressure signal makes TorMiddleware
+    hold new downloads until it drains below PIPELINE_BACKPRESSURE_LOW (downloads in flight finish).
+    Items wait (and keep Scrapy's scraper slot busy) while it is full; the writer thread wakes them once the
+    queue is back under the low watermark.
+
+    With PIPELINE_INDEX_ENABLED each record's byte offset, date, id and url also go to data_<timestamp>.jsonl.idx,
+    written by whichever thread writes the record (see jsonl_index.JsonlReader for lookups).
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 0,
+        crawler=None,
+        high_watermark: float = 0.8,
+        low_watermark: float = 0.3,
+        stats_interval: float = 5.0,
+        index: bool = False,
+    ):
         self.file = None
         self.filename = None
+        self.index = index
+        self.index_writer: IndexWriter | None = None
+        self.queue_size = queue_size
+        self.crawler = crawler
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.stats_interval = stats_interval
+
+        # Writer thread state (queue_size > 0 only)
+        self.queue: queue.Queue | None = None
+        self.writer: threading.Thread | None = None
+        self.monitor = None
+        self.downloads_paused = False
+        # Items waiting for room in a full queue: (loop, future), resolved by the writer thread
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._waiters_lock = threading.Lock()
+        self.items_written = 0
+        self._latencies: deque[float] = deque(maxlen=1024)
+        self._latency_lock = threading.Lock()
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls()
+        return cls(
+            queue_size=crawler.settings.getint("PIPELINE_WRITER_QUEUE_SIZE", 0),
+            crawler=crawler,
+            high_watermark=crawler.settings.getfloat("PIPELINE_BACKPRESSURE_HIGH", 0.8),
+            low_watermark=crawler.settings.getfloat("PIPELINE_BACKPRESSURE_LOW", 0.3),
+            stats_interval=crawler.settings.getfloat("PIPELINE_STATS_INTERVAL", 5.0),
+            index=crawler.settings.getbool("PIPELINE_INDEX_ENABLED"),
+        )
 
     def open_spider(self, spider: Any) -> None:
         try:
@@ -23,13 +84,42 @@ class JsonWriterPipeline:
         except Exception as e:
             spider.logger.error(f"Failed to open file {self.filename}: {e}")
             self.file = None
+            return
+
+        if self.index:
+            try:
+                self.index_writer = IndexWriter(self.filename + INDEX_SUFFIX)
+            except OSError as e:
+                spider.logger.error(f"Failed to open index {self.filename}{INDEX_SUFFIX}: {e}")
+
+        if self.queue_size > 0:
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.writer = threading.Thread(target=self._write_loop, name="JsonWriterPipeline", daemon=True)
+            self.writer.start()
+            if self.crawler is not None:
+                self.monitor = create_looping_call(self.check_backpressure)
+                self.monitor.start(self.stats_interval, now=False)
 
     def close_spider(self, spider: Any) -> None:
+        if self.monitor is not None and self.monitor.running:
+            self.monitor.stop()
+        if self.writer is not None:
+            # Drain everything that was accepted before closing the file
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+            self.queue = None
+            if self.crawler is not None:
+                self.check_backpressure()
         if self.file:
             try:
                 self.file.close()
             except Exception as e:
                 spider.logger.error(f"Error closing file: {e}")
+        # After the data, so no index row points past the end of the file
+        if self.index_writer is not None:
+            self.index_writer.close()
+            self.index_writer = None
 
     def process_item(self, item: Any, spider: Any) -> Any:
         if not self.file:
@@ -42,9 +132,319 @@ class JsonWriterPipeline:
             # item can be a dict or Scrapy Item
             item_dict = item if isinstance(item, dict) else dict(item)
             line = json.dumps(item_dict, ensure_ascii=False) + "\n"
-            self.file.write(line)
+            key = index_key(item_dict) if self.index_writer is not None else None
+            if self.queue is not None:
+                return self._enqueue(line, key, item)
+            self._write(line, key)
         except Exception as e:
             spider.logger.error(f"Error writing item to file: {e}")
             # Optionally drop item or raise generic error
         
         return item
+
+    def _write(self, line: str, key: tuple[str, str, str] | None) -> None:
+        self.file.write(line)
+        if self.index_writer is not None:
+            self.index_writer.add(line, key)
+
+    async def _enqueue(self, line: str, key: tuple[str, str, str] | None, item: Any) -> Any:
+        entry = (line, key, time.monotonic())
+        while True:
+            # Under the lock, so the writer cannot drain the queue between a failed put and the registration
+            with self._waiters_lock:
+                try:
+                    self.queue.put_nowait(entry)
+                    return item
+                except queue.Full:
+                    loop = asyncio.get_running_loop()
+                    room = loop.create_future()
+                    self._waiters.append((loop, room))
+            await room
+
+    def _notify_room(self, force: bool = False) -> None:
+        """Wakes the items waiting for room once the queue is below the low watermark (writer thread)."""
+        with self._waiters_lock:
+            if not self._waiters or (not force and self.queue.qsize() > self.low_watermark * self.queue_size):
+                return
+            waiters, self._waiters = self._waiters, []
+        for loop, room in waiters:
+            loop.call_soon_threadsafe(_resolve, room)
+
+    def _write_loop(self) -> None:
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                self._notify_room(force=True)
+                break
+            self._notify_room()
+            line, key, enqueued_at = entry
+            try:
+                self._write(line, key)
+            except Exception as e:
+                logger.error(f"Error writing item to file: {e}")
+            with self._latency_lock:
+                self._latencies.append(time.monotonic() - enqueued_at)
+                self.items_written += 1
+            if self.queue.empty():
+                self.file.flush()
+                if self.index_writer is not None:
+                    self.index_writer.flush()
+
+    def latency_percentiles(self) -> dict[str, float]:
+        """p50/p99 enqueue->write latency (ms) over the last 1024 written items."""
+        with self._latency_lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return {}
+        return {
+            "p50": round(samples[len(samples) // 2] * 1000, 1),
+            "p99": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 1),
+        }
+
+    def check_backpressure(self) -> None:
+        """Publishes queue stats and pauses/resumes Tor downloads around the watermarks (reactor thread)."""
+        depth = self.queue.qsize() if self.queue is not None else 0
+        stats = self.crawler.stats
+        stats.set_value("pipeline/queue_depth", depth)
+        stats.max_value("pipeline/queue_depth_max", depth)
+        stats.set_value("pipeline/items_written", self.items_written)
+        for name, value in self.latency_percentiles().items():
+            stats.set_value(f"pipeline/write_latency_{name}_ms", value)
+
+        if not self.downloads_paused and depth >= self.high_watermark * self.queue_size:
+            self.downloads_paused = True
+            stats.inc_value("pipeline/backpressure_pauses")
+            logger.warning(f"JsonWriterPipeline: {depth} items waiting for storage, pausing downloads")
+            self.crawler.signals.send_catch_log(signal=storage_backpressure, paused=True)
+        elif self.downloads_paused and depth <= self.low_watermark * self.queue_size:
+            self.downloads_paused = False
+            logger.info(f"JsonWriterPipeline: storage caught up ({depth} waiting), resuming downloads")
+            self.crawler.signals.send_catch_log(signal=storage_backpressure, paused=False)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class StreamPipeline:
+    """
+    Publishes each item to live subscribers (see streaming.ItemStream) as soon as it passes the pipeline,
+    so downstream services do not have to poll data_*.jsonl. Enabled with STREAM_ENABLED.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("STREAM_ENABLED"):
+            raise NotConfigured
+        # Deferred: the feed server is only needed when streaming is enabled
+        from onet_scraper.streaming import ItemStream
+
+        return cls(
+            ItemStream(
+                address=crawler.settings.get("STREAM_ADDRESS", "127.0.0.1:6802"),
+                buffer_size=crawler.settings.getint("STREAM_SUBSCRIBER_BUFFER", 256),
+                replay_size=crawler.settings.getint("STREAM_REPLAY_ITEMS", 1000),
+                slow_consumer=crawler.settings.get("STREAM_SLOW_CONSUMER", "disconnect"),
+                stats=crawler.stats,
+            )
+        )
+
+    async def open_spider(self, spider: Any = None) -> None:
+        await self.stream.start()
+
+    async def close_spider(self, spider: Any = None) -> None:
+        await self.stream.stop()
+
+    def process_item(self, item: Any, spider: Any = None) -> Any:
+        self.stream.publish(item if isinstance(item, dict) else dict(item))
+        return item
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+def images_proxy(settings) -> str | None:
+    """IMAGES_PROXY, "direct" for no proxy; the Tor proxy follows the embedded Tor daemons when they are enabled."""
+    proxy = settings.get("IMAGES_PROXY", settings.get("TOR_PROXY"))
+    if not proxy or proxy == "direct":
+        return None
+    if settings.getbool("TOR_SUPERVISOR_ENABLED") and proxy == settings.get("TOR_PROXY"):
+        return f"socks5://127.0.0.1:{settings.getint('TOR_SUPERVISOR_SOCKS_PORT', 9060)}"
+    return proxy
+
+
+# Image statuses cached as failures; anything else (429, 403, 5xx) is retried by later items
+PERMANENT_IMAGE_FAILURES = frozenset({404, 410, 413, 415})
+
+
+class ImagePipeline:
+    """
+    Fetches each article's lead image (image_url) once and adds its dimensions, content hash and a compact
+    thumbnail (with Pillow) to the item. Enabled with IMAGES_ENABLED.
+
+    Downloads go through one pooled curl_cffi AsyncSession limited to IMAGES_CONCURRENCY transfers, so
+    items of different articles fetch their images concurrently. Results are cached by URL in IMAGES_STORE
+    across runs; concurrent items with the same URL share one download, and identical bytes under another
+    URL reuse the stored thumbnail.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        concurrency: int = 8,
+        timeout: float = 20,
+        thumb_size: int = 320,
+        max_bytes: int = 10 * 1024 * 1024,
+        proxy: str | None = None,
+        stats=None,
+    ):
+        self.store_dir = store_dir
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.thumb_size = thumb_size
+        self.max_bytes = max_bytes
+        self.proxy = proxy
+        self.stats = stats
+        self.store = None
+        self.session = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("IMAGES_ENABLED"):
+            raise NotConfigured
+        return cls(
+            store_dir=crawler.settings.get("IMAGES_STORE"),
+            concurrency=crawler.settings.getint("IMAGES_CONCURRENCY", 8),
+            timeout=crawler.settings.getfloat("IMAGES_TIMEOUT", 20),
+            thumb_size=crawler.settings.getint("IMAGES_THUMB_SIZE", 320),
+            max_bytes=crawler.settings.getint("IMAGES_MAX_BYTES", 10 * 1024 * 1024),
+            proxy=images_proxy(crawler.settings),
+            stats=crawler.stats,
+        )
+
+    def _inc_stat(self, key: str) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key)
+
+    async def open_spider(self, spider: Any = None) -> None:
+        # Deferred: curl_cffi and the image helpers are only loaded when the pipeline is enabled
+        from curl_cffi.requests import AsyncSession
+
+        from onet_scraper.images import Image, ImageStore
+
+        self.store = ImageStore(self.store_dir)
+        self.session = AsyncSession(max_clients=self.concurrency, timeout=self.timeout, impersonate="chrome")
+        if Image is None:
+            logger.warning("ImagePipeline: Pillow is not installed, storing image dimensions without thumbnails")
+
+    async def close_spider(self, spider: Any = None) -> None:
+        if self.session is not None:
+            await self.session.close()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.close)
+
+    async def process_item(self, item: Any, spider: Any = None) -> Any:
+        url = item.get("image_url")
+        if not url:
+            return item
+        record = await self.image(url)
+        if record is not None and record["status"] == 200:
+            item["image_hash"] = record["sha1"]
+            item["image_width"] = record["width"]
+            item["image_height"] = record["height"]
+            item["image_thumbnail"] = record["thumbnail"]
+        return item
+
+    async def image(self, url: str) -> dict[str, Any] | None:
+        """Stored record for `url`, downloading it on the first request. None after a transient failure."""
+        # SQLite and thumbnail files are accessed in threads, off the reactor
+        record = await asyncio.to_thread(self.store.get, url)
+        if record is not None:
+            self._inc_stat("images/cache_hits")
+            return record
+
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            self._inc_stat("images/shared_downloads")
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        record = None
+        try:
+            record = await self._fetch(url)
+        except Exception as e:
+            logger.warning(f"ImagePipeline: failed to fetch {url}: {e}")
+            self._inc_stat("images/failed")
+        finally:
+            del self._inflight[url]
+            future.set_result(record)
+        return record
+
+    async def _fetch(self, url: str) -> dict[str, Any] | None:
+        body = bytearray()
+
+        def collect(chunk: bytes) -> int:
+            body.extend(chunk)
+            if len(body) > self.max_bytes:
+                raise ImageTooLarge(f"{url} is larger than {self.max_bytes} bytes")
+            return len(chunk)
+
+        try:
+            response = await self.session.get(url, content_callback=collect, proxy=self.proxy)
+        except ImageTooLarge:
+            self._inc_stat("images/too_large")
+            return await self._store_failure(url, 413)
+        self._inc_stat("images/downloaded")
+        if response.status_code != 200:
+            return await self._store_failure(url, response.status_code)
+
+        data = bytes(body)
+        sha1 = hashlib.sha1(data).hexdigest()
+        duplicate = await asyncio.to_thread(self.store.by_hash, sha1)
+        if duplicate is not None and duplicate["status"] == 200:
+            # Same picture under another URL (CDN variants): reuse its metadata and thumbnail
+            self._inc_stat("images/duplicate_content")
+            record = dict(duplicate, url=url)
+        else:
+            from onet_scraper.images import image_size
+
+            size = image_size(data)
+            if size is None:
+                return await self._store_failure(url, 415)
+            thumbnail = await asyncio.to_thread(self._thumbnail, sha1, data)
+            record = {
+                "url": url,
+                "status": 200,
+                "sha1": sha1,
+                "format": size[0],
+                "width": size[1],
+                "height": size[2],
+                "bytes": len(data),
+                "thumbnail": thumbnail,
+            }
+        await asyncio.to_thread(self.store.put, record)
+        return record
+
+    def _thumbnail(self, sha1: str, data: bytes) -> str | None:
+        """Builds and writes the thumbnail (worker thread). Returns its path in the store, None without one."""
+        from onet_scraper.images import make_thumbnail
+
+        thumbnail = make_thumbnail(data, self.thumb_size)
+        return self.store.write_thumbnail(sha1, thumbnail) if thumbnail else None
+
+    async def _store_failure(self, url: str, status: int) -> dict[str, Any] | None:
+        self._inc_stat(f"images/status_{status}")
+        if status not in PERMANENT_IMAGE_FAILURES:
+            # Rate limits, bans, server errors: the next item with this URL tries again
+            return None
+        # Permanent for this URL: cached so it is not downloaded again
+        record = {"url": url, "status": status}
+        await asyncio.to_thread(self.store.put, record)
+        return record
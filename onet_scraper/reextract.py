@@ -0,0 +1,229 @@
+"""
+Offline re-extraction: rebuilds items from stored article HTML with the current extraction chain
+(the same `extract_article` used by OnetSpider.parse_item), without Scrapy's reactor or any network.
+
+    python -m onet_scraper.reextract pages/ pages.tar.gz .scrapy/tor_cache -o items.jsonl --workers 8
+
+Inputs are directories (searched recursively) or .zip/.tar[.gz|.bz2|.xz] archives containing *.html pages,
+Tor response cache entries (*.pickle, see utils/response_cache.py) and raw page archives (*.sqlite, see
+archive.py); the last two also carry the final URL.
+The page URL of plain HTML files comes from <link rel="canonical"> / og:url, else --base-url + relative path.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import re
+import tarfile
+import threading
+import time
+import zipfile
+from collections import Counter
+from collections.abc import Iterator
+from typing import Any
+
+from onet_scraper.archive import ARCHIVE_SUFFIX, PageArchive
+from onet_scraper.utils.parsing import STATUS_OK, parse_article_body
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm")
+CACHE_SUFFIX = ".pickle"
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+STATUS_NO_URL = "no_url"
+STATUS_ERROR = "error"
+
+# Canonical URL is in <head>; no need to scan the whole page
+_URL_SCAN_BYTES = 65536
+_CANONICAL_RES = (
+    re.compile(rb'<link[^>]+rel=["\']canonical["\'][^>]+href=["\']([^"\']+)["\']', re.IGNORECASE),
+    re.compile(rb'<link[^>]+href=["\']([^"\']+)["\'][^>]+rel=["\']canonical["\']', re.IGNORECASE),
+    re.compile(rb'<meta[^>]+property=["\']og:url["\'][^>]+content=["\']([^"\']+)["\']', re.IGNORECASE),
+)
+
+# (source name, URL or None, raw body)
+Page = tuple[str, str | None, bytes]
+
+
+def page_url(body: bytes) -> str | None:
+    head = body[:_URL_SCAN_BYTES]
+    for pattern in _CANONICAL_RES:
+        match = pattern.search(head)
+        if match:
+            return match.group(1).decode("utf-8", "replace")
+    return None
+
+
+def _fallback_url(name: str, base_url: str | None) -> str | None:
+    if not base_url:
+        return None
+    path = name.replace(os.sep, "/")
+    for suffix in HTML_SUFFIXES:
+        if path.endswith(suffix):
+            path = path[: -len(suffix)]
+    return f"{base_url.rstrip('/')}/{path.lstrip('/')}"
+
+
+def _read_cache_entry(path: str) -> Page | None:
+    # Only read cache directories you wrote yourself: entries are pickles
+    with open(path, "rb") as f:
+        _, (status_code, body, final_url, _) = pickle.load(f)
+    if status_code != 200:
+        return None
+    return path, final_url, body
+
+
+def _iter_directory(root: str) -> Iterator[Page]:
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            if filename.endswith(CACHE_SUFFIX):
+                try:
+                    page = _read_cache_entry(path)
+                except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+                    logger.warning(f"Skipping unreadable cache entry {path}: {e}")
+                    continue
+                if page is not None:
+                    yield page
+            elif filename.lower().endswith(HTML_SUFFIXES):
+                with open(path, "rb") as f:
+                    yield os.path.relpath(path, root), None, f.read()
+
+
+def _iter_zip(path: str) -> Iterator[Page]:
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith(HTML_SUFFIXES):
+                yield info.filename, None, archive.read(info)
+
+
+def _iter_tar(path: str) -> Iterator[Page]:
+    # Streaming mode: members are read in archive order without building an index
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(HTML_SUFFIXES):
+                yield member.name, None, archive.extractfile(member).read()
+
+
+def _iter_page_archive(path: str) -> Iterator[Page]:
+    archive = PageArchive(path)
+    try:
+        for story, url, body in archive.iter_pages():
+            yield f"{path}:{story}", url, body
+    finally:
+        archive.close()
+
+
+def iter_pages(inputs: list[str]) -> Iterator[Page]:
+    """Yields stored pages from directories and archives, one at a time."""
+    for source in inputs:
+        if os.path.isdir(source):
+            yield from _iter_directory(source)
+        elif source.endswith(".zip"):
+            yield from _iter_zip(source)
+        elif source.endswith(TAR_SUFFIXES):
+            yield from _iter_tar(source)
+        elif source.endswith(ARCHIVE_SUFFIX):
+            yield from _iter_page_archive(source)
+        elif source.endswith(CACHE_SUFFIX):
+            page = _read_cache_entry(source)
+            if page is not None:
+                yield page
+        elif source.lower().endswith(HTML_SUFFIXES):
+            with open(source, "rb") as f:
+                yield os.path.basename(source), None, f.read()
+        else:
+            logger.warning(f"Skipping unsupported input: {source}")
+
+
+def reextract_page(task: tuple[str, str | None, bytes, str | None, int | None]) -> tuple[str, dict[str, Any]]:
+    """Worker entry point (module level, picklable): one stored page -> extract_article result."""
+    name, url, body, base_url, days_limit = task
+    url = url or page_url(body) or _fallback_url(name, base_url)
+    if not url:
+        return name, {"status": STATUS_NO_URL, "date": None, "item": None, "error": "no canonical URL"}
+    try:
+        return name, parse_article_body(url, body, days_limit=days_limit)
+    except Exception as e:
+        return name, {"status": STATUS_ERROR, "date": None, "item": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def run(
+    inputs: list[str],
+    output: str,
+    workers: int = 0,
+    days_limit: int | None = None,
+    base_url: str | None = None,
+    chunksize: int = 16,
+) -> dict[str, Any]:
+    """Re-extracts every stored page into `output` (JSONL, one item per line). Returns counts and pages/s."""
+    workers = workers or os.cpu_count() or 1
+    tasks = ((name, url, body, base_url, days_limit) for name, url, body in iter_pages(inputs))
+    counts: Counter[str] = Counter()
+    started = time.perf_counter()
+
+    with open(output, "w", encoding="utf-8") as out:
+        for name, result in _map(tasks, workers, chunksize):
+            counts[result["status"]] += 1
+            if result["status"] == STATUS_OK:
+                out.write(json.dumps(result["item"], ensure_ascii=False) + "\n")
+            elif result["error"]:
+                logger.debug(f"{name}: {result['status']} ({result['error']})")
+
+    elapsed = time.perf_counter() - started
+    pages = sum(counts.values())
+    return {
+        "pages": pages,
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(pages / elapsed, 1) if elapsed else 0.0,
+        "statuses": dict(counts),
+    }
+
+
+def _map(tasks: Iterator, workers: int, chunksize: int) -> Iterator[tuple[str, dict[str, Any]]]:
+    if workers == 1:
+        yield from map(reextract_page, tasks)
+        return
+
+    # Pool's task feeder drains the whole iterator; the window keeps raw pages in flight bounded
+    window = threading.BoundedSemaphore(workers * chunksize * 4)
+
+    def throttled():
+        for task in tasks:
+            window.acquire()
+            yield task
+
+    # spawn: same start method as ParsePool, safe with the threads of the parent
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        for result in pool.imap_unordered(reextract_page, throttled(), chunksize=chunksize):
+            window.release()
+            yield result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild items from stored article HTML with the current extractors.")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Directories, .zip/.tar[.gz] archives, *.html, cache *.pickle or page archive *.sqlite",
+    )
+    parser.add_argument("-o", "--output", default="reextracted.jsonl", help="JSONL output file")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Worker processes (0 = CPU count)")
+    parser.add_argument("--days-limit", type=int, help="Apply the spider's freshness check (default: off)")
+    parser.add_argument("--base-url", help="Base URL for HTML files without a canonical link")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = run(args.inputs, args.output, args.workers, args.days_limit, args.base_url)
+    logger.info(
+        f"Re-extracted {report['pages']} pages in {report['seconds']} s "
+        f"({report['pages_per_second']} pages/s): {report['statuses']} -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
 # Scrapy settings for onet_scraper project
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _load_env_file() -> None:
+    # python-dotenv is only imported when there is a .env file to load (cwd or project root)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for directory in (os.getcwd(), project_root):
+        env_path = os.path.join(directory, ".env")
+        if os.path.isfile(env_path):
+            from dotenv import load_dotenv
+
+            load_dotenv(env_path)
+            return
+
+
+_load_env_file()
 
 BOT_NAME = "onet_scraper"
 
@@ -32,25 +44,164 @@ COOKIES_ENABLED = False
 LOG_FILE = os.path.join(os.getcwd(), "scraper.log")
 LOG_LEVEL = "INFO"
 
+# Collapse tracking/AMP/host variants of the same story in Scrapy's dupefilter
+REQUEST_FINGERPRINTER_CLASS = "onet_scraper.fingerprinting.CanonicalRequestFingerprinter"
+
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 DOWNLOADER_MIDDLEWARES = {
     "onet_scraper.middlewares.TorMiddleware": 543,
 }
 
+# Drop requests for URLs the spider's rules ignore before they reach the scheduler
+SPIDER_MIDDLEWARES = {
+    "onet_scraper.middlewares.UrlClassifierMiddleware": 550,
+}
+
 # Tor Settings
 TOR_PROXY = "socks5://127.0.0.1:9050"
 TOR_CONTROL_PORT = 9051
 TOR_PASSWORD = os.getenv("TOR_PASSWORD")
 TOR_CONNECTION_TIMEOUT = 30  # Timeout for Tor requests in seconds
-TOR_MAX_RETRIES = 3
+TOR_MAX_RETRIES = 3  # Retries inside TorMiddleware (new circuit each time) before giving up
+TOR_RETRY_BACKOFF_BASE = 1.0  # seconds, doubled per attempt (full jitter)
+TOR_RETRY_BACKOFF_MAX = 30.0
+
+# Circuit warm-up: wait for bootstrap + pre-build circuits before the first request and after each NEWNYM
+TOR_WARMUP_ENABLED = True
+TOR_WARMUP_URL = "https://www.onet.pl/robots.txt"  # Small page, pays the circuit/TLS set-up cost
+TOR_PREBUILD_CIRCUITS = 2
+TOR_BOOTSTRAP_TIMEOUT = 60  # seconds to wait for "circuit established" before sending traffic anyway
+
+# Exit-node quality: per-exit ban/latency stats, exits that keep getting banned go to ExcludeExitNodes
+TOR_EXIT_TRACKING_ENABLED = True
+TOR_EXIT_BAN_THRESHOLD = 3  # bans before an exit can be excluded...
+TOR_EXIT_BAN_RATIO = 0.5  # ...and only if at least this share of its requests were banned
+TOR_EXIT_MAX_EXCLUDED = 200
+# Preferred exit countries (sets ExitNodes, which restricts exits to them), e.g. "pl,de,cz"
+TOR_EXIT_COUNTRIES = [cc for cc in os.getenv("TOR_EXIT_COUNTRIES", "").split(",") if cc]
+
+# Download size/compression: decoded body limit per request type (oversized pages are dropped, not retried)
+TOR_MAX_BODY_SIZE = {"article": 4 * 1024 * 1024, "listing": 8 * 1024 * 1024}
+TOR_ACCEPT_ENCODING = "br, zstd, gzip"  # Smallest encodings first to save Tor bandwidth
+TOR_CA_BUNDLE = None  # CA file for TLS verification; None = curl_cffi's bundled CAs (tests/loadtest uses its own)
+
+# Embedded Tor (replaces TOR_PROXY/TOR_CONTROL_PORT): the scraper launches, health-checks and restarts its own
+# tor daemons; each keeps a persistent DataDirectory (cached consensus + guards), so restarts skip a cold bootstrap
+TOR_SUPERVISOR_ENABLED = os.getenv("TOR_SUPERVISOR_ENABLED", "false").lower() == "true"
+TOR_COMMAND = os.getenv("TOR_COMMAND", "tor")
+TOR_DATA_DIR = os.getenv("TOR_DATA_DIR", "tor_data")  # first instance; instance N uses TOR_DATA_DIR-N
+TOR_INSTANCES = int(os.getenv("TOR_INSTANCES", "1"))  # with more than one, each rotation moves to the next
+TOR_SUPERVISOR_SOCKS_PORT = 9060  # instance N listens on SOCKS port + 2N...
+TOR_SUPERVISOR_CONTROL_PORT = 9061  # ...and control port + 2N
+TOR_SUPERVISOR_START_TIMEOUT = 30  # seconds for a new daemon's control port to answer
+TOR_SUPERVISOR_CHECK_INTERVAL = 30  # seconds between health checks
+TOR_SUPERVISOR_MAX_FAILURES = 3  # failed control port checks in a row before a daemon is restarted
+TOR_SUPERVISOR_CONFIG = {}  # extra torrc options, e.g. {"NumEntryGuards": "2"}
+
+# Response cache (memory + disk LRU keyed by canonical URL) for retries and repeated listing visits
+TOR_CACHE_ENABLED = True
+TOR_CACHE_TTL = 300  # seconds
+TOR_CACHE_MEMORY_ITEMS = 256
+TOR_CACHE_DISK_ITEMS = 2048
+TOR_CACHE_DIR = os.path.join(os.getcwd(), ".scrapy", "tor_cache")
+TOR_CACHE_ARTICLES = False  # article pages are fetched once; ARCHIVE_ENABLED keeps them for re-extraction
+
+# Parsing offload: run article extraction in a process pool instead of the reactor thread
+PARSE_OFFLOAD_ENABLED = os.getenv("PARSE_OFFLOAD_ENABLED", "false").lower() == "true"
+PARSE_OFFLOAD_WORKERS = 0  # 0 = os.cpu_count()
+PARSE_OFFLOAD_MAX_PENDING = 0  # Bodies in flight before callbacks wait; 0 = 2 x workers
+
+# Long-running (24/7) mode: set JOBDIR to keep the scheduler queue and fingerprints on disk
+JOBDIR = os.getenv("JOBDIR") or None
+DUPEFILTER_CLASS = "onet_scraper.dupefilters.DiskDupeFilter"
+
+# RSS guard: pause category/pagination discovery above the threshold, resume below RESUME
+EXTENSIONS = {
+    "onet_scraper.extensions.MemoryGuard": 500,
+    "onet_scraper.extensions.CrawlLoop": 510,
+    "onet_scraper.extensions.Profiler": 520,
+    "onet_scraper.extensions.CostReport": 530,
+    "onet_scraper.extensions.PageArchiver": 540,
+}
+MEMORY_GUARD_ENABLED = True
+MEMORY_GUARD_PAUSE_MB = 768
+MEMORY_GUARD_RESUME_MB = 640
+MEMORY_GUARD_INTERVAL = 30  # seconds
+
+# On-demand profiling: `kill -USR1 <pid>` profiles the reactor + download pool for PROFILE_DURATION seconds,
+# writing profile-<time>.collapsed/.txt (and .prof in cprofile mode) next to LOG_FILE
+PROFILE_ENABLED = True
+PROFILE_SIGNAL = "SIGUSR1"
+PROFILE_AT_START = os.getenv("PROFILE_AT_START", "false").lower() == "true"
+PROFILE_DURATION = 30  # seconds
+PROFILE_MODE = "sample"  # "sample" (stack sampler only) or "cprofile" (+ cProfile of the reactor thread)
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+PROFILE_TOP = 30  # functions in the .txt table
+
+# Efficiency accounting: pages/bytes/download time/CPU per rule and outcome (cost/* stats, cost_per_saved/*),
+# logged at the end of the run and appended to COST_REPORT_FILE
+COST_REPORT_ENABLED = True
+COST_REPORT_FILE = os.path.join(os.getcwd(), "cost_report.jsonl")
+
+# Raw HTML archive of article pages for re-extraction, compressed against trained dictionaries
+# (zstd via `zstandard`, zlib when it is missing); see onet_scraper/archive.py
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+ARCHIVE_PATH = os.path.join(os.getcwd(), "pages.sqlite")
+ARCHIVE_LEVEL = 9  # zstd 1-22, zlib 1-9
+ARCHIVE_DICT_SIZE = 112 * 1024  # bytes; zlib dictionaries are capped at 31 KB
+ARCHIVE_SAMPLE_PAGES = 100  # recent pages a dictionary is trained on
+ARCHIVE_RETRAIN_EVERY = 5000  # pages between retrainings (template changes)
+ARCHIVE_COMMIT_EVERY = 100  # pages per SQLite transaction (also committed whenever the writer catches up)
+ARCHIVE_QUEUE_SIZE = 500  # pages waiting for the writer thread before the reactor blocks
+
+# Continuous crawl loop (enabled by `python -m onet_scraper.daemon`)
+CRAWL_LOOP_ENABLED = False
+CRAWL_LOOP_INTERVAL = 15  # minutes between cycles
+CRAWL_LOOP_JITTER = 60  # +/- seconds
+CRAWL_LOOP_MAX_SEEDS = 50  # category pages re-seeded per cycle (besides start_urls)
+CRAWL_LOOP_STATS_FILE = os.path.join(os.getcwd(), "crawl_cycles.jsonl")
+
+# Revisits of captured articles during the crawl loop (live-updated stories); emitted again only when changed
+REVISIT_ENABLED = True
+REVISIT_BUDGET = 20  # article refetches per cycle
+REVISIT_DEFAULT_INTERVAL = 60  # minutes, until dateModified deltas of the article or its section are known
+REVISIT_MIN_INTERVAL = 10  # minutes
+REVISIT_MAX_INTERVAL = 360  # minutes; each unchanged revisit doubles the wait up to this
+REVISIT_MAX_AGE = 48  # hours after publication to keep revisiting
+REVISIT_MAX_TRACKED = 5000
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
+    "onet_scraper.pipelines.ImagePipeline": 200,
     "onet_scraper.pipelines.JsonWriterPipeline": 300,
+    "onet_scraper.pipelines.StreamPipeline": 310,
 }
 
+# Item writing in a background thread behind a bounded queue (0 = write synchronously in the reactor)
+PIPELINE_WRITER_QUEUE_SIZE = 1000
+PIPELINE_BACKPRESSURE_HIGH = 0.8  # queue fill ratio that pauses Tor downloads...
+PIPELINE_BACKPRESSURE_LOW = 0.3  # ...until it drains below this one
+PIPELINE_STATS_INTERVAL = 5  # seconds between queue depth/latency stats and backpressure checks
+PIPELINE_INDEX_ENABLED = True  # data_<timestamp>.jsonl.idx: byte offsets by id/url/date (onet_scraper/jsonl_index.py)
+
+# Lead images: fetched once (cache in IMAGES_STORE), dimensions + hash + Pillow thumbnail
+IMAGES_ENABLED = os.getenv("IMAGES_ENABLED", "false").lower() == "true"
+IMAGES_STORE = os.path.join(os.getcwd(), "images")
+IMAGES_CONCURRENCY = 8  # parallel image downloads, separate from CONCURRENT_REQUESTS
+IMAGES_TIMEOUT = 20  # seconds
+IMAGES_THUMB_SIZE = 320  # px, longest side
+IMAGES_MAX_BYTES = 10 * 1024 * 1024
+IMAGES_PROXY = os.getenv("IMAGES_PROXY", TOR_PROXY)  # ocdn.eu downloads go through Tor too; "direct" = real IP
+
+# Live NDJSON/SSE feed of scraped items (see onet_scraper/streaming.py)
+STREAM_ENABLED = os.getenv("STREAM_ENABLED", "false").lower() == "true"
+STREAM_ADDRESS = os.getenv("STREAM_ADDRESS", "127.0.0.1:6802")  # "host:port" or "unix:/path/to.sock"
+STREAM_SUBSCRIBER_BUFFER = 256  # items buffered per consumer
+STREAM_SLOW_CONSUMER = "disconnect"  # full buffer: "disconnect" (resume via ?offset=) or "drop_oldest"
+STREAM_REPLAY_ITEMS = 1000  # recent items kept for resuming consumers
+
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
 
@@ -0,0 +1,5 @@
+"""Project signals, sent through crawler.signals like Scrapy's own."""
+
+# JsonWriterPipeline's writer queue passed PIPELINE_BACKPRESSURE_HIGH (paused=True) or drained below
+# PIPELINE_BACKPRESSURE_LOW (paused=False); TorMiddleware starts no new download in between. Args: paused
+storage_backpressure = object()
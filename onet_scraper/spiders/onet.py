@@ -1,16 +1,21 @@
-import re
-from collections.abc import Generator
-from typing import Any
+import time
+from collections.abc import Generator, Iterable
+from typing import TYPE_CHECKING, Any
 
-from scrapy.http import Response
+from scrapy.http import HtmlResponse, Request, Response
+from scrapy.link import Link
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
 
-from onet_scraper.items import ArticleItem
-from onet_scraper.loaders import ArticleLoader
-
 # SRP Utils
-from onet_scraper.utils.extractors import extract_json_ld, parse_is_recent
+from onet_scraper.utils import accounting
+from onet_scraper.utils.link_extraction import SinglePassLinkExtractor
+from onet_scraper.utils.parsing import STATUS_INVALID, STATUS_STALE, extract_article
+from onet_scraper.utils.url_classifier import UrlClassifier
+from onet_scraper.utils.urls import ID_PATTERN, canonicalize_url
+
+if TYPE_CHECKING:
+    from onet_scraper.utils.parse_pool import ParsePool
 
 
 class OnetSpider(CrawlSpider):
@@ -35,7 +40,16 @@ class OnetSpider(CrawlSpider):
     }
 
     # Compiled Regexes for Performance
-    ID_PATTERN = re.compile(r"/([a-z0-9]+)$")
+    ID_PATTERN = ID_PATTERN
+
+    # Set in from_crawler when PARSE_OFFLOAD_ENABLED
+    parse_pool: "ParsePool | None" = None
+
+    # Set by extensions.MemoryGuard when RSS passes MEMORY_GUARD_PAUSE_MB
+    discovery_paused = False
+
+    # Labels of `rules` (same order) in the cost/<rule>/<outcome> stats of utils/accounting.py
+    rule_names = ("ignored", "articles", "categories", "pagination")
 
     rules = (
         Rule(
@@ -54,6 +68,7 @@ class OnetSpider(CrawlSpider):
             ),
             callback="parse_item",
             follow=False,
+            process_links="canonicalize_links",
         ),
         # Rule for Categories (Follow to find more articles)
         Rule(
@@ -62,107 +77,123 @@ class OnetSpider(CrawlSpider):
                 deny=(r"szukaj", r"autorzy", r"redakcja", r"pogoda"),
             ),
             follow=True,
+            process_links="discovery_links",
         ),
         # Rule for Pagination (Next Page)
         Rule(
-            LinkExtractor(allow=(r"wiadomosci.onet.pl"), restrict_xpaths='//a[contains(@class, "next")]'), follow=True
+            LinkExtractor(allow=(r"wiadomosci.onet.pl"), restrict_xpaths='//a[contains(@class, "next")]'),
+            follow=True,
+            process_links="discovery_links",
         ),
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Built once from the compiled rules; used by the middlewares before scheduling/downloading
+        self.url_classifier = UrlClassifier.from_spider(self)
+        self.rule_links = SinglePassLinkExtractor.from_spider(self)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if crawler.settings.getbool("PARSE_OFFLOAD_ENABLED"):
+            # Deferred: multiprocessing machinery is only loaded when offloading is enabled
+            from onet_scraper.utils.parse_pool import ParsePool
+
+            spider.parse_pool = ParsePool.from_crawler(crawler)
+            # Route article rules to the offloaded callback (rules are compiled in __init__)
+            for rule in spider._rules:
+                if rule.callback == spider.parse_item:
+                    rule.callback = spider.parse_item_offloaded
+        return spider
+
+    def _requests_to_follow(self, response: Response) -> Iterable[Request | None]:
+        # CrawlSpider's loop, with the links of all rules taken from one pass over the page
+        if not isinstance(response, HtmlResponse):
+            return
+        if not self.rule_links.supported:
+            # Scrapy internals changed: CrawlSpider's own loop, one extract_links per rule
+            yield from super()._requests_to_follow(response)
+            self._settle_cost(response, accounting.FOLLOWED)
+            return
+        # CPU is measured between yields, so the time the engine spends on each request is not included
+        started = time.thread_time()
+        cpu = 0.0
+        seen: set[Link] = set()
+        for rule_index, (rule, rule_links) in enumerate(zip(self._rules, self.rule_links.extract(response))):
+            links = [link for link in rule_links if link not in seen]
+            for link in rule.process_links(links):
+                seen.add(link)
+                request = self._build_request(rule_index, link)
+                request = rule.process_request(request, response)
+                cpu += time.thread_time() - started
+                yield request
+                started = time.thread_time()
+        self._add_cpu(response, cpu + time.thread_time() - started)
+        self._settle_cost(response, accounting.FOLLOWED)
+
     def skip_request(self, request: Any, response: Response) -> None:
         return None
 
+    def canonicalize_links(self, links: list[Link]) -> list[Link]:
+        # Strip tracking params / AMP variants before scheduling; story-level dedup is in the fingerprinter
+        for link in links:
+            link.url = canonicalize_url(link.url)
+        return links
+
+    def discovery_links(self, links: list[Link]) -> list[Link]:
+        # Category/pagination links are dropped while discovery is paused (memory backpressure)
+        if self.discovery_paused:
+            return []
+        return self.canonicalize_links(links)
+
     def parse_item(self, response: Response) -> Generator[dict[str, Any], None, None]:
-        # 1. External Utils extraction (keep complex logic in utils)
-        metadata = extract_json_ld(response)
-
-        # 2. Date Freshness Check (Optimization)
-        # We need the date BEFORE full loading to implement the optimization
-        # Use a temporary loader or direct extraction for this decision?
-        # Direct extraction is faster for optimization checks.
-        date_to_check = metadata.get("datePublished")
-        if not date_to_check:
-            # Fallback to visual date for check
-            date_to_check = (
-                response.css(".ods-m-date-authorship__publication::text").get()
-                or response.xpath('//span[contains(@class, "date")]/text()').get()
-            )
-
-        # Filter out old articles
-        if not parse_is_recent(date_to_check, days_limit=3):
-            self.logger.info(f"⚠️ POMINIĘTO (STARE): {date_to_check} | {response.url}")
+        # Extraction chain lives in utils so it can also run inside a worker process
+        started = time.thread_time()
+        result = extract_article(response, days_limit=3)
+        self._add_cpu(response, time.thread_time() - started)
+        yield from self._handle_article_result(response, result)
+
+    async def parse_item_offloaded(self, response: Response) -> list[dict[str, Any]]:
+        """Same as `parse_item`, but the extraction runs in the ParsePool (PARSE_OFFLOAD_ENABLED)."""
+        result = await self.parse_pool.parse(response.url, response.body, response.encoding)
+        self._add_cpu(response, result.get("cpu_s", 0.0))
+        return list(self._handle_article_result(response, result))
+
+    def _handle_article_result(
+        self, response: Response, result: dict[str, Any]
+    ) -> Generator[dict[str, Any], None, None]:
+        if result["status"] == STATUS_STALE:
+            self.logger.info(f"⚠️ POMINIĘTO (STARE): {result['date']} | {response.url}")
+            self._settle_cost(response, accounting.STALE)
             return
 
-        # 3. Initialize Loader
-        l = ArticleLoader(item={}, response=response)
-
-        # 4. Populate Fields
-
-        # Title
-        l.add_css("title", "h1::text")
-
-        # URL
-        l.add_value("url", response.url)
-
-        # Date (Priority: Metadata -> CSS -> XPath)
-        l.add_value("date", metadata.get("datePublished"))
-        l.add_css("date", ".ods-m-date-authorship__publication::text")
-        l.add_xpath("date", '//span[contains(@class, "date")]/text()')
-
-        # Content - Logic: Prefer hyphenate, fallback to p
-        # Check if hyphenate yields any actual text (not just whitespace)
-        hyphenate_texts = response.css(".hyphenate::text").getall()
-        if any(t.strip() for t in hyphenate_texts):
-            l.add_css("content", ".hyphenate::text")
-        else:
-            # Fallback for pages without hyphenate class
-            l.add_css("content", "p::text")
-
-        # Lead
-        l.add_css("lead", "#lead::text")
-
-        # Author (Priority: Metadata -> CSS selectors)
-        l.add_value("author", metadata.get("author"))
-        l.add_css("author", ".ods-m-author-xl__name-link::text")
-        l.add_css("author", ".ods-m-author-xl__name::text")
-        l.add_css("author", ".authorName::text")
-
-        # Meta Fields
-        l.add_value("keywords", response.xpath('//meta[@name="keywords"]/@content').get())
-        l.add_value("section", metadata.get("articleSection"))
-        l.add_value("date_modified", metadata.get("dateModified"))
-
-        # Image
-        l.add_value("image_url", metadata.get("image_url"))
-        l.add_xpath("image_url", '//meta[@property="og:image"]/@content')
-
-        # ID
-        l.add_xpath("id", '//meta[@name="data-story-id"]/@content')
-        # Fallback ID from URL
-        id_match = self.ID_PATTERN.search(response.url)
-        if id_match:
-            l.add_value("id", id_match.group(1))
-
-        # 5. Load Item
-        item_data = l.load_item()
-
-        # 6. Post-processing (Read Time & Final Checks)
-        clean_content = item_data.get("content", "")
-        if clean_content:
-            word_count = len(clean_content.split())
-            read_time = max(1, round(word_count / 200))
-            item_data["read_time"] = read_time
-
-        # Instantiate ArticleItem to validate and ensure schema
-        # This will raise ValidationError if required fields (title, url, date) are missing
-        # which is correct behavior (we want to fail if scrap failed)
-        try:
-            item = ArticleItem(**item_data)
-        except Exception as e:
-            self.logger.error(f"Validation Error for {response.url}: {e}")
-            return  # or raise
-
-        article_date_str = item.date
-        self.logger.info(f"✅ ZAPISANO: {article_date_str} | {response.url}")
-
-        yield item.model_dump()
+        if result["status"] == STATUS_INVALID:
+            self.logger.error(f"Validation Error for {response.url}: {result['error']}")
+            self._settle_cost(response, accounting.INVALID)
+            return
+
+        # CrawlLoop revisit of a captured article: only a changed version is emitted again
+        previous_hash = response.meta.get("revisit_hash")
+        if previous_hash is not None and result["item"].get("content_hash") == previous_hash:
+            self.logger.debug(f"Revisit unchanged: {response.url}")
+            if getattr(self, "crawler", None) is not None:
+                self.crawler.stats.inc_value("revisit/unchanged")
+            self._settle_cost(response, accounting.SKIPPED)
+            return
+
+        self.logger.info(f"✅ ZAPISANO: {result['date']} | {response.url}")
+        # Charged as "saved" once the item passed the pipelines (extensions.CostReport)
+        yield result["item"]
+
+    def _add_cpu(self, response: Response, cpu_s: float) -> None:
+        if response.request is not None:
+            accounting.add_cost(response.meta, accounting.rule_label(response.meta, self.rule_names), cpu_s=cpu_s)
+
+    def _settle_cost(self, response: Response, outcome: str) -> None:
+        if getattr(self, "crawler", None) is not None and response.request is not None:
+            accounting.settle(self.crawler.stats, response.meta, outcome)
+
+    def closed(self, reason: str) -> None:
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
@@ -0,0 +1,190 @@
+"""
+Live item feed for downstream consumers (StreamPipeline), served on the reactor's asyncio loop.
+
+    curl -N http://127.0.0.1:6802/items                # NDJSON: {"offset": 17, "item": {...}} per line
+    curl -N http://127.0.0.1:6802/items?offset=120     # resume: replay from offset 120, then live
+    curl -N -H "Accept: text/event-stream" ...         # SSE (id = offset, Last-Event-ID resumes)
+
+STREAM_ADDRESS "unix:/path/feed.sock" serves the same HTTP feed on a Unix socket (curl --unix-socket).
+Offsets count the items published since the crawl started; the last STREAM_REPLAY_ITEMS can be replayed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+_MAX_HEADER_LINES = 64
+
+
+class _Subscriber:
+    def __init__(self, writer: asyncio.StreamWriter, buffer_size: int, sse: bool):
+        self.writer = writer
+        self.queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue(maxsize=buffer_size)
+        self.sse = sse
+        self.dropped = False
+
+    def frame(self, offset: int, payload: str) -> bytes:
+        if self.sse:
+            return f"id: {offset}\ndata: {payload}\n\n".encode()
+        return f'{{"offset": {offset}, "item": {payload}}}\n'.encode()
+
+
+class ItemStream:
+    """
+    Publishes items to every connected subscriber over HTTP (NDJSON or SSE), in the reactor thread.
+
+    Each subscriber has a bounded buffer. When a consumer falls behind and its buffer is full, the
+    slow-consumer policy either drops its oldest buffered item (DROP_OLDEST) or disconnects it
+    (DISCONNECT) so it can reconnect and resume from its last offset. Items are serialized once.
+    """
+
+    def __init__(
+        self,
+        address: str = "127.0.0.1:6802",
+        buffer_size: int = 256,
+        replay_size: int = 1000,
+        slow_consumer: str = DISCONNECT,
+        stats=None,
+    ):
+        if slow_consumer not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer}")
+        self.address = address
+        self.buffer_size = buffer_size
+        self.slow_consumer = slow_consumer
+        self.stats = stats
+        self.replay: deque[tuple[int, str]] = deque(maxlen=replay_size)
+        self.next_offset = 0
+        self.subscribers: set[_Subscriber] = set()
+        self.server: asyncio.AbstractServer | None = None
+
+    def _inc_stat(self, key: str, count: int = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    async def start(self) -> None:
+        if self.address.startswith("unix:"):
+            path = self.address[len("unix:") :]
+            if os.path.exists(path):
+                os.unlink(path)  # Stale socket of a previous run
+            self.server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            host, _, port = self.address.rpartition(":")
+            self.server = await asyncio.start_server(self._handle, host or "127.0.0.1", int(port))
+        logger.info(f"Item stream listening on {self.bound_address()}")
+
+    def bound_address(self) -> str:
+        sockname = self.server.sockets[0].getsockname()
+        return f"unix:{sockname}" if isinstance(sockname, str) else f"{sockname[0]}:{sockname[1]}"
+
+    async def stop(self) -> None:
+        if self.server is None:
+            return
+        self.server.close()
+        for subscriber in list(self.subscribers):
+            subscriber.dropped = True
+            subscriber.writer.close()
+            if not subscriber.queue.full():
+                subscriber.queue.put_nowait((-1, ""))  # Wakes a handler waiting for items
+        await self.server.wait_closed()
+        self.server = None
+
+    def publish(self, item: dict[str, Any]) -> int:
+        """Assigns the next offset and queues the item for every subscriber. Returns the offset."""
+        offset = self.next_offset
+        self.next_offset += 1
+        payload = json.dumps(item, ensure_ascii=False)
+        self.replay.append((offset, payload))
+        for subscriber in list(self.subscribers):
+            self._offer(subscriber, offset, payload)
+        self._inc_stat("stream/published")
+        return offset
+
+    def _offer(self, subscriber: _Subscriber, offset: int, payload: str) -> None:
+        try:
+            subscriber.queue.put_nowait((offset, payload))
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.slow_consumer == DROP_OLDEST:
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait((offset, payload))
+            self._inc_stat("stream/dropped")
+        else:
+            subscriber.dropped = True
+            self.subscribers.discard(subscriber)
+            subscriber.writer.close()
+            self._inc_stat("stream/disconnected")
+            logger.warning(f"Item stream: slow consumer disconnected at offset {offset}")
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, dict[str, str]] | None:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2 or request_line[0] != "GET":
+            return None
+        headers = {}
+        for _ in range(_MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return request_line[1], headers
+
+    def _start_offset(self, target: str, headers: dict[str, str]) -> int:
+        query = parse_qs(urlsplit(target).query)
+        try:
+            if "offset" in query:
+                return int(query["offset"][0])
+            if "last-event-id" in headers:
+                return int(headers["last-event-id"]) + 1
+        except ValueError:
+            pass
+        return self.next_offset  # Live items only
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(self._read_request(reader), timeout=10)
+        except (asyncio.TimeoutError, ConnectionError):
+            request = None
+        if request is None:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+
+        target, headers = request
+        sse = "text/event-stream" in headers.get("accept", "")
+        content_type = "text/event-stream" if sse else "application/x-ndjson"
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}; charset=utf-8\r\n"
+            "Cache-Control: no-cache\r\nConnection: close\r\n\r\n".encode()
+        )
+
+        # Backlog snapshot and registration happen without yielding, so no item falls between them
+        start = self._start_offset(target, headers)
+        backlog = [entry for entry in self.replay if entry[0] >= start]
+        subscriber = _Subscriber(writer, self.buffer_size, sse)
+        self.subscribers.add(subscriber)
+        self._inc_stat("stream/connections")
+        try:
+            for offset, payload in backlog:
+                writer.write(subscriber.frame(offset, payload))
+                await writer.drain()
+            while not subscriber.dropped:
+                offset, payload = await subscriber.queue.get()
+                if subscriber.dropped:
+                    break
+                writer.write(subscriber.frame(offset, payload))
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
@@ -0,0 +1,150 @@
+"""
+Helpers around the Tor control port (stem). stem is imported lazily inside each helper
+so importing this module stays cheap (see tests/benchmarks/test_bench_startup.py).
+"""
+
+import logging
+import re
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_BOOTSTRAP_PROGRESS_RE = re.compile(r"PROGRESS=(\d+)")
+
+
+def connect_controller(control_port: int, password: str | None = None, host: str = "127.0.0.1"):
+    """Authenticated stem Controller (password or cookie auth). The caller closes it."""
+    from stem.control import Controller
+
+    controller = Controller.from_port(address=host, port=control_port)
+    try:
+        if password:
+            controller.authenticate(password=password)
+        else:
+            controller.authenticate()  # Cookie auth
+    except Exception:
+        controller.close()
+        raise
+    return controller
+
+
+@contextmanager
+def open_controller(control_port: int, password: str | None = None, host: str = "127.0.0.1"):
+    """Short-lived authenticated controller, closed on exit."""
+    with connect_controller(control_port, password, host) as controller:
+        yield controller
+
+
+def bootstrap_status(controller) -> tuple[int, bool]:
+    """Returns (bootstrap progress 0-100, whether Tor reports an established circuit)."""
+    phase = str(controller.get_info("status/bootstrap-phase", ""))
+    match = _BOOTSTRAP_PROGRESS_RE.search(phase)
+    progress = int(match.group(1)) if match else 0
+    established = str(controller.get_info("status/circuit-established", "0")).strip() == "1"
+    return progress, established
+
+
+def wait_until_ready(controller, timeout: float, poll_interval: float = 0.5) -> bool:
+    """Blocks until bootstrap reaches 100% and a circuit is established, or `timeout` expires."""
+    deadline = time.monotonic() + timeout
+    while True:
+        progress, established = bootstrap_status(controller)
+        if progress >= 100 and established:
+            return True
+        if time.monotonic() >= deadline:
+            logger.warning(f"Tor not ready after {timeout:.0f}s (bootstrap {progress}%, circuit: {established})")
+            return False
+        time.sleep(poll_interval)
+
+
+def prebuild_circuits(controller, count: int, timeout: float) -> int:
+    """Asks Tor to build `count` general-purpose circuits ahead of traffic. Returns how many were built."""
+    built = 0
+    for _ in range(count):
+        try:
+            controller.new_circuit(await_build=True, timeout=timeout)
+            built += 1
+        except Exception as e:
+            logger.warning(f"Failed to pre-build Tor circuit: {e}")
+    return built
+
+
+class ExitTracker:
+    """
+    Per-exit-relay quality stats: requests, bans and latency by exit fingerprint.
+
+    Requests of one circuit generation share a SOCKS username (Tor isolates streams by SOCKS auth), and
+    CIRC events - or GETINFO circuit-status as a fallback - map that username to the circuit's exit.
+    `record` reports when an exit crosses the ban threshold, so the caller can push ExcludeExitNodes.
+    """
+
+    MAX_TOKENS = 1024
+
+    def __init__(self, ban_threshold: int = 3, ban_ratio: float = 0.5, max_excluded: int = 200):
+        self.ban_threshold = ban_threshold
+        self.ban_ratio = ban_ratio
+        self.max_excluded = max_excluded
+        self.token_exits: OrderedDict[str, str] = OrderedDict()
+        self.requests: Counter[str] = Counter()
+        self.bans: Counter[str] = Counter()
+        self.latency_total: Counter[str] = Counter()
+        self.excluded: OrderedDict[str, None] = OrderedDict()
+
+    def _remember(self, token: str, circuit_path) -> None:
+        self.token_exits[token] = circuit_path[-1][0]
+        self.token_exits.move_to_end(token)
+        while len(self.token_exits) > self.MAX_TOKENS:
+            self.token_exits.popitem(last=False)
+
+    def handle_circuit_event(self, event) -> None:
+        """stem CIRC event listener (runs in stem's event thread)."""
+        username = getattr(event, "socks_username", None)
+        if event.status == "BUILT" and username and event.path:
+            self._remember(username, event.path)
+
+    def resolve(self, token: str, controller=None) -> str | None:
+        """Exit fingerprint of the circuit serving `token`; asks the controller when no event was seen yet."""
+        exit_fp = self.token_exits.get(token)
+        if exit_fp is None and controller is not None:
+            try:
+                for circuit in controller.get_circuits([]):
+                    if circuit.status == "BUILT" and circuit.socks_username and circuit.path:
+                        self._remember(circuit.socks_username, circuit.path)
+            except Exception as e:
+                logger.debug(f"Could not list Tor circuits: {e}")
+            exit_fp = self.token_exits.get(token)
+        return exit_fp
+
+    def record(self, exit_fp: str, banned: bool, latency: float | None = None) -> bool:
+        """Counts one request on `exit_fp`. Returns True when the exit has just been excluded."""
+        self.requests[exit_fp] += 1
+        if latency is not None:
+            self.latency_total[exit_fp] += latency
+        if not banned:
+            return False
+
+        self.bans[exit_fp] += 1
+        if exit_fp in self.excluded or self.bans[exit_fp] < self.ban_threshold:
+            return False
+        if self.bans[exit_fp] / self.requests[exit_fp] < self.ban_ratio:
+            return False
+
+        self.excluded[exit_fp] = None
+        while len(self.excluded) > self.max_excluded:
+            self.excluded.popitem(last=False)
+        return True
+
+    def exclude_exit_nodes(self) -> str:
+        """Value for the ExcludeExitNodes torrc option."""
+        return ",".join(f"${fp}" for fp in self.excluded)
+
+    def worst_exits(self, top: int = 5) -> list[tuple[str, int, int, float | None]]:
+        """(fingerprint, requests, bans, avg latency of successful requests) for the most-banned exits."""
+        rows = []
+        for exit_fp, bans in self.bans.most_common(top):
+            served = self.requests[exit_fp] - bans
+            avg_latency = self.latency_total[exit_fp] / served if served else None
+            rows.append((exit_fp, self.requests[exit_fp], bans, avg_latency))
+        return rows
@@ -0,0 +1,280 @@
+"""
+Embedded Tor daemons (TOR_SUPERVISOR_ENABLED): the scraper launches its own `tor` processes instead of relying on
+an external Tor container, health-checks them through the control port and restarts the ones that die.
+
+Each instance keeps a persistent DataDirectory (TOR_DATA_DIR for the first one, TOR_DATA_DIR-N for the others),
+so the cached consensus, microdescriptors and guards survive restarts: tor starts from them instead of a cold
+bootstrap. New instances are seeded with the first instance's cached directory documents.
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from onet_scraper import tor_control
+
+logger = logging.getLogger(__name__)
+
+# Directory documents a new DataDirectory can borrow from an existing one (guards in `state` stay per instance)
+SEED_FILES = ("cached-certs", "cached-microdesc-consensus", "cached-microdescs", "cached-microdescs.new")
+
+_BOOTSTRAP_RE = re.compile(r"Bootstrapped \d+%")
+_PROBLEM_RE = re.compile(r"\[(?:warn|err)\] (.*)$")
+
+
+class TorInstance:
+    """One supervised tor process: its ports, DataDirectory and health bookkeeping."""
+
+    def __init__(self, index: int, socks_port: int, control_port: int, data_dir: str, host: str = "127.0.0.1"):
+        self.index = index
+        self.socks_port = socks_port
+        self.control_port = control_port
+        self.data_dir = data_dir
+        self.host = host
+        self.process: subprocess.Popen | None = None
+        self.started_at: float | None = None
+        self.restarts = 0
+        self.failed_checks = 0
+        self.bootstrap = 0
+        self.last_problem: str | None = None  # last warning tor logged
+
+    @property
+    def proxy(self) -> str:
+        return f"socks5://{self.host}:{self.socks_port}"
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def __repr__(self) -> str:
+        return f"TorInstance({self.index}, socks={self.socks_port}, control={self.control_port}, {self.data_dir})"
+
+
+class TorSupervisor:
+    """
+    Launches `instances` tor daemons on consecutive port pairs (socks_port + 2N, control_port + 2N) and keeps them
+    running: a health-check thread polls every `check_interval` seconds and restarts an instance whose process
+    exited or whose control port failed `max_failures` checks in a row. Ports never change across restarts, so
+    TorMiddleware keeps using the same proxies; its retries cover the seconds a restart takes.
+    """
+
+    def __init__(
+        self,
+        tor_cmd: str = "tor",
+        data_dir: str = "tor_data",
+        instances: int = 1,
+        socks_port: int = 9060,
+        control_port: int = 9061,
+        start_timeout: float = 30.0,
+        check_interval: float = 30.0,
+        max_failures: int = 3,
+        extra_config: dict[str, str] | None = None,
+        stats=None,
+    ):
+        self.tor_cmd = tor_cmd
+        self.start_timeout = start_timeout
+        self.check_interval = check_interval
+        self.max_failures = max_failures
+        self.extra_config = extra_config or {}
+        self.stats = stats
+        self.instances = [
+            TorInstance(i, socks_port + 2 * i, control_port + 2 * i, data_dir if i == 0 else f"{data_dir}-{i}")
+            for i in range(max(1, instances))
+        ]
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()  # launches/restarts vs. stop()
+        self.watcher: threading.Thread | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            tor_cmd=crawler.settings.get("TOR_COMMAND", "tor"),
+            data_dir=crawler.settings.get("TOR_DATA_DIR", "tor_data"),
+            instances=crawler.settings.getint("TOR_INSTANCES", 1),
+            socks_port=crawler.settings.getint("TOR_SUPERVISOR_SOCKS_PORT", 9060),
+            control_port=crawler.settings.getint("TOR_SUPERVISOR_CONTROL_PORT", 9061),
+            start_timeout=crawler.settings.getfloat("TOR_SUPERVISOR_START_TIMEOUT", 30.0),
+            check_interval=crawler.settings.getfloat("TOR_SUPERVISOR_CHECK_INTERVAL", 30.0),
+            max_failures=crawler.settings.getint("TOR_SUPERVISOR_MAX_FAILURES", 3),
+            extra_config=crawler.settings.getdict("TOR_SUPERVISOR_CONFIG"),
+            stats=crawler.stats,
+        )
+
+    def _inc_stat(self, key: str, count: int = 1) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    def _prepare_data_dir(self, instance: TorInstance) -> None:
+        """Creates the DataDirectory (tor wants it private) and seeds it with the first instance's documents."""
+        os.makedirs(instance.data_dir, mode=0o700, exist_ok=True)
+        os.chmod(instance.data_dir, 0o700)
+        seed_dir = self.instances[0].data_dir
+        if instance.data_dir == seed_dir:
+            return
+        for name in SEED_FILES:
+            source, target = os.path.join(seed_dir, name), os.path.join(instance.data_dir, name)
+            if os.path.exists(source) and not os.path.exists(target):
+                shutil.copy2(source, target)
+
+    def _config(self, instance: TorInstance) -> dict[str, str]:
+        config = {
+            "SocksPort": f"{instance.host}:{instance.socks_port}",
+            "ControlPort": f"{instance.host}:{instance.control_port}",
+            "DataDirectory": os.path.abspath(instance.data_dir),
+            "CookieAuthentication": "1",
+        }
+        config.update(self.extra_config)
+        return config
+
+    def _wait_for_control_port(self, instance: TorInstance, deadline: float) -> bool:
+        """Polls the control port until it answers (or the process dies / the deadline passes)."""
+        while instance.alive() and time.monotonic() < deadline and not self._stopping.is_set():
+            try:
+                with tor_control.open_controller(instance.control_port, host=instance.host) as controller:
+                    instance.bootstrap, _ = tor_control.bootstrap_status(controller)
+                return True
+            except Exception:
+                time.sleep(0.2)
+        return False
+
+    def _read_output(self, instance: TorInstance, process: subprocess.Popen, started: threading.Event) -> None:
+        """Drains tor's stdout for the life of the process: `started` is set at its first bootstrap line (or EOF)."""
+        for raw in process.stdout:
+            line = raw.decode("utf-8", "replace").strip()
+            logger.debug(f"tor[{instance.index}]: {line}")
+            problem = _PROBLEM_RE.search(line)
+            if problem:
+                instance.last_problem = problem.group(1)
+            if _BOOTSTRAP_RE.search(line):
+                started.set()
+        started.set()
+
+    def launch(self, instance: TorInstance) -> None:
+        """
+        Starts the tor process of `instance` and waits - at most start_timeout - for its first bootstrap line and
+        its control port; the rest of the bootstrap (fast with a cached consensus) is left to TorMiddleware's
+        warm-up. stem.process.launch_tor is not used: its timeout needs SIGALRM (main thread only) and without one
+        a tor that never logs a bootstrap line blocks the caller forever.
+        """
+        self._prepare_data_dir(instance)
+        started = time.monotonic()
+        deadline = started + self.start_timeout
+        torrc = "".join(f"{key} {value}\n" for key, value in self._config(instance).items())
+        instance.last_problem = None
+        # The torrc comes on stdin; __OwningControllerProcess makes tor exit with the scraper, even when it is killed
+        process = subprocess.Popen(
+            [self.tor_cmd, "-f", "-", "__OwningControllerProcess", str(os.getpid())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        instance.process = process
+        output_started = threading.Event()
+        reader = threading.Thread(
+            target=self._read_output, args=(instance, process, output_started), name=f"tor-{instance.index}-log"
+        )
+        reader.daemon = True
+        reader.start()
+        try:
+            process.stdin.write(torrc.encode("utf-8"))
+            process.stdin.close()
+        except OSError:
+            pass  # Exited right away; reported below
+        while not output_started.wait(0.2) and time.monotonic() < deadline and not self._stopping.is_set():
+            pass
+        instance.started_at = time.time()
+        instance.failed_checks = 0
+        if not output_started.is_set() or not self._wait_for_control_port(instance, deadline):
+            self._terminate(instance)
+            problem = instance.last_problem or f"not up after {self.start_timeout:.0f}s"
+            raise OSError(f"tor[{instance.index}] did not start: {problem}")
+        logger.info(
+            f"TorSupervisor: tor[{instance.index}] up in {time.monotonic() - started:.1f}s "
+            f"(socks {instance.socks_port}, control {instance.control_port}, bootstrap {instance.bootstrap}%)"
+        )
+
+    def start(self) -> list[TorInstance]:
+        """
+        Launches every instance and the health-check thread (blocking: call it from a thread). Returns the instances;
+        when one fails to start, the ones already running are stopped and the error is raised.
+        """
+        with self._lock:
+            try:
+                for instance in self.instances:
+                    self.launch(instance)
+            except Exception:
+                for instance in self.instances:
+                    self._terminate(instance)
+                raise
+        if self.check_interval > 0:
+            self.watcher = threading.Thread(target=self._watch, name="TorSupervisor", daemon=True)
+            self.watcher.start()
+        return self.instances
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.check_interval):
+            self.check()
+
+    def check(self) -> list[TorInstance]:
+        """One health-check round. Returns the instances that were restarted."""
+        restarted = []
+        for instance in self.instances:
+            if self._stopping.is_set():
+                break
+            problem = None
+            if not instance.alive():
+                code = instance.process.poll() if instance.process is not None else None
+                problem = f"exited with code {code}"
+            else:
+                try:
+                    with tor_control.open_controller(instance.control_port, host=instance.host) as controller:
+                        instance.bootstrap, _ = tor_control.bootstrap_status(controller)
+                    instance.failed_checks = 0
+                except Exception as e:
+                    instance.failed_checks += 1
+                    self._inc_stat("tor/supervisor/failed_checks")
+                    logger.warning(f"TorSupervisor: tor[{instance.index}] control port check failed: {e}")
+                    if instance.failed_checks >= self.max_failures:
+                        problem = f"control port failed {instance.failed_checks} checks"
+            if problem is not None and self.restart(instance, problem):
+                restarted.append(instance)
+        return restarted
+
+    def restart(self, instance: TorInstance, reason: str) -> bool:
+        logger.warning(f"TorSupervisor: restarting tor[{instance.index}]: {reason}")
+        with self._lock:
+            if self._stopping.is_set():
+                return False
+            self._terminate(instance)
+            try:
+                self.launch(instance)
+            except Exception as e:
+                # Retried on the next check
+                logger.error(f"TorSupervisor: tor[{instance.index}] restart failed: {e}")
+                self._inc_stat("tor/supervisor/restart_failures")
+                return False
+        instance.restarts += 1
+        self._inc_stat("tor/supervisor/restarts")
+        return True
+
+    def _terminate(self, instance: TorInstance, timeout: float = 10.0) -> None:
+        process, instance.process = instance.process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        with self._lock:
+            for instance in self.instances:
+                self._terminate(instance)
+        if self.watcher is not None and self.watcher is not threading.current_thread():
+            self.watcher.join(timeout=self.start_timeout)
@@ -0,0 +1,129 @@
+"""
+Crawl efficiency accounting: pages, downloaded bytes, download time and CPU time per rule and outcome.
+
+A page's cost travels with its request in meta["cost"] (TorMiddleware adds bytes and download time, the spider
+adds parsing CPU) and is charged to the `cost/<rule>/<outcome>/<metric>` stats once the outcome is known:
+in the spider (stale, invalid, skipped, followed) or after the item pipelines (saved). Banned attempts are
+charged by TorMiddleware right away - they never produce a response.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+SAVED = "saved"
+STALE = "stale"
+INVALID = "invalid"  # validation errors, dropped items, callback errors
+BANNED = "banned"  # blocked or failed download attempts (each one costs a new circuit)
+SKIPPED = "skipped"  # unchanged revisits, oversized bodies, non-200 pages
+FOLLOWED = "followed"  # listing pages: the price of discovering articles
+OUTCOMES = (SAVED, STALE, INVALID, BANNED, SKIPPED, FOLLOWED)
+
+METRICS = ("pages", "bytes", "download_s", "cpu_s")
+
+STATS_PREFIX = "cost/"
+PER_SAVED_PREFIX = "cost_per_saved/"
+
+
+def rule_label(meta: dict[str, Any], rule_names: Sequence[str] = ()) -> str:
+    """Name of the CrawlSpider rule that produced a request ("start" for seeds, "revisit" for CrawlLoop revisits)."""
+    if meta.get("revisit"):
+        return "revisit"
+    index = meta.get("rule")
+    if index is None:
+        return "start"
+    return rule_names[index] if index < len(rule_names) else f"rule{index}"
+
+
+def add_cost(
+    meta: dict[str, Any], rule: str, size: int = 0, download_s: float = 0.0, cpu_s: float = 0.0
+) -> dict[str, Any]:
+    """Adds to the not yet charged cost of a request."""
+    cost = meta.setdefault("cost", {"rule": rule, "bytes": 0, "download_s": 0.0, "cpu_s": 0.0})
+    cost["bytes"] += size
+    cost["download_s"] += download_s
+    cost["cpu_s"] += cpu_s
+    return cost
+
+
+def charge(
+    stats, rule: str, outcome: str, pages: int = 1, size: int = 0, download_s: float = 0.0, cpu_s: float = 0.0
+) -> None:
+    prefix = f"{STATS_PREFIX}{rule}/{outcome}/"
+    stats.inc_value(prefix + "pages", pages)
+    stats.inc_value(prefix + "bytes", size)
+    stats.inc_value(prefix + "download_s", download_s)
+    stats.inc_value(prefix + "cpu_s", cpu_s)
+
+
+def settle(stats, meta: dict[str, Any] | None, outcome: str) -> bool:
+    """Charges the cost carried in meta to `outcome`; False when it was already charged (or never recorded)."""
+    cost = meta.pop("cost", None) if meta is not None else None
+    if cost is None:
+        return False
+    charge(stats, cost["rule"], outcome, 1, cost["bytes"], cost["download_s"], cost["cpu_s"])
+    return True
+
+
+def cost_report(stats: dict[str, Any]) -> dict[str, Any]:
+    """
+    Totals from the cost/* stats: {"rules": {rule: {outcome: metrics}}, "outcomes": {outcome: metrics},
+    "total": metrics, "per_saved": metrics or None, "rule_per_saved": {rule: metrics}}.
+    """
+    rules: dict[str, dict[str, dict[str, float]]] = {}
+    for key, value in stats.items():
+        if not key.startswith(STATS_PREFIX):
+            continue
+        parts = key[len(STATS_PREFIX) :].split("/")
+        if len(parts) != 3 or parts[2] not in METRICS:
+            continue
+        rule, outcome, metric = parts
+        rules.setdefault(rule, {}).setdefault(outcome, dict.fromkeys(METRICS, 0))[metric] = value
+
+    outcomes: dict[str, dict[str, float]] = {}
+    rule_totals: dict[str, dict[str, float]] = {}
+    total = dict.fromkeys(METRICS, 0)
+    for rule, by_outcome in rules.items():
+        for outcome, metrics in by_outcome.items():
+            for metric, value in metrics.items():
+                outcomes.setdefault(outcome, dict.fromkeys(METRICS, 0))[metric] += value
+                rule_totals.setdefault(rule, dict.fromkeys(METRICS, 0))[metric] += value
+                total[metric] += value
+
+    saved = outcomes.get(SAVED, {}).get("pages", 0)
+    per_saved = {metric: total[metric] / saved for metric in METRICS[1:]} if saved else None
+    # What each rule adds to the cost of one saved article (listing pages included)
+    rule_per_saved = {}
+    if saved:
+        for rule, metrics in rule_totals.items():
+            rule_per_saved[rule] = {metric: metrics[metric] / saved for metric in METRICS[1:]}
+    return {
+        "rules": rules,
+        "outcomes": outcomes,
+        "total": total,
+        "per_saved": per_saved,
+        "rule_per_saved": rule_per_saved,
+    }
+
+
+def format_report(report: dict[str, Any]) -> list[str]:
+    """Log lines: one row per rule and outcome, then the per-saved-article summary."""
+    lines = [f"{'rule':<12} {'outcome':<9} {'pages':>7} {'MB':>9} {'download s':>11} {'CPU s':>8}"]
+    for rule in sorted(report["rules"]):
+        by_outcome = report["rules"][rule]
+        for outcome in sorted(by_outcome, key=lambda name: OUTCOMES.index(name) if name in OUTCOMES else 99):
+            metrics = by_outcome[outcome]
+            lines.append(
+                f"{rule:<12} {outcome:<9} {metrics['pages']:>7} {metrics['bytes'] / 1e6:>9.2f} "
+                f"{metrics['download_s']:>11.1f} {metrics['cpu_s']:>8.2f}"
+            )
+    per_saved = report["per_saved"]
+    if per_saved is None:
+        lines.append("no saved articles")
+        return lines
+    lines.append(
+        f"per saved article: {per_saved['bytes'] / 1e3:.1f} kB, {per_saved['download_s']:.2f} s download, "
+        f"{per_saved['cpu_s'] * 1e3:.1f} ms CPU"
+    )
+    for rule, metrics in sorted(report["rule_per_saved"].items()):
+        lines.append(f"  {rule}: {metrics['bytes'] / 1e3:.1f} kB, {metrics['download_s']:.2f} s download")
+    return lines
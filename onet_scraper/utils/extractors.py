@@ -1,70 +1,157 @@
 import json
+import re
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+from lxml import etree
 from scrapy.http import Response
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    _json_loads = json.loads
+
+# Precompiled once, evaluated directly on the lxml tree (no Selector wrapping per script)
+_LD_JSON_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()', smart_strings=False)
+_LD_TYPE_RE = re.compile(r'"@type"\s*:\s*"([^"]+)"')
+
+LD_TARGET_KEYS = ("datePublished", "dateModified", "author", "articleSection", "image_url")
+
+# Raw-text markers used to decide whether a script is worth decoding
+_LD_KEY_MARKERS = {
+    "datePublished": '"datePublished"',
+    "dateModified": '"dateModified"',
+    "author": '"author"',
+    "articleSection": '"articleSection"',
+    "image_url": '"image"',
+}
+
+# Types that never carry NewsArticle fields (Onet embeds large graphs of these)
+SKIPPED_LD_TYPES = frozenset(
+    {
+        "BreadcrumbList",
+        "ItemList",
+        "ListItem",
+        "Organization",
+        "NewsMediaOrganization",
+        "WebSite",
+        "SiteNavigationElement",
+        "SearchAction",
+    }
+)
+
+
+def _first_name(author: Any) -> Optional[str]:
+    """Author may be a Person dict, a plain string or a list of either - take the first usable name."""
+    if isinstance(author, dict):
+        return author.get("name")
+    if isinstance(author, str):
+        return author
+    if isinstance(author, list):
+        for entry in author:
+            name = _first_name(entry)
+            if name:
+                return name
+    return None
+
+
+def _first_image(image: Any) -> Optional[str]:
+    """Image may be an ImageObject dict, a plain URL or a list of either."""
+    if isinstance(image, dict):
+        return image.get("url")
+    if isinstance(image, str):
+        return image
+    if isinstance(image, list):
+        for entry in image:
+            url = _first_image(entry)
+            if url:
+                return url
+    return None
+
+
+def _is_skipped_type(node_type: Any) -> bool:
+    if isinstance(node_type, str):
+        return node_type in SKIPPED_LD_TYPES
+    if isinstance(node_type, list) and node_type:
+        return all(isinstance(t, str) and t in SKIPPED_LD_TYPES for t in node_type)
+    return False
+
+
+def _sniff_top_level_type(script: str) -> Optional[str]:
+    """
+    Returns the top-level @type without decoding, if it appears before any nested object.
+    Scripts wrapped in @graph or a list are never sniffed.
+    """
+    first_brace = script.find("{")
+    if first_brace == -1 or script[:first_brace].strip():
+        return None
+    match = _LD_TYPE_RE.search(script, first_brace)
+    if not match:
+        return None
+    nested_brace = script.find("{", first_brace + 1)
+    if nested_brace != -1 and nested_brace < match.start():
+        return None
+    return match.group(1)
+
+
+def _process_node(node: Dict[str, Any], metadata: Dict[str, Optional[str]]) -> None:
+    # Update only if not already set (first is best)
+    if not metadata["datePublished"] and node.get("datePublished"):
+        metadata["datePublished"] = node["datePublished"]
+    if not metadata["dateModified"] and node.get("dateModified"):
+        metadata["dateModified"] = node["dateModified"]
+    if not metadata["author"] and "author" in node:
+        metadata["author"] = _first_name(node["author"])
+    if not metadata["articleSection"] and node.get("articleSection"):
+        metadata["articleSection"] = node["articleSection"]
+    if not metadata["image_url"] and "image" in node:
+        metadata["image_url"] = _first_image(node["image"])
+
 
 def extract_json_ld(response: Response) -> Dict[str, Optional[str]]:
     """
     Extracts relevant metadata (date, author, section) from JSON-LD scripts.
     Returns a dictionary with found keys.
+
+    Scripts are scanned cheaply before decoding: a script is skipped when it cannot contain
+    any still-missing key or when its top-level @type is a non-article type (BreadcrumbList,
+    Organization...). Scanning stops as soon as all keys are filled.
     """
-    ld_json_scripts = response.xpath('//script[@type="application/ld+json"]/text()').getall()
-    metadata: Dict[str, Optional[str]] = {
-        "datePublished": None,
-        "dateModified": None,
-        "author": None,
-        "articleSection": None,
-        "image_url": None,
-    }
+    metadata: Dict[str, Optional[str]] = dict.fromkeys(LD_TARGET_KEYS)
 
-    found = False
+    for script in _LD_JSON_XPATH(response.selector.root):
+        missing = [key for key in LD_TARGET_KEYS if not metadata[key]]
+        if not missing:
+            break
+        if not any(_LD_KEY_MARKERS[key] in script for key in missing):
+            continue
+        if _sniff_top_level_type(script) in SKIPPED_LD_TYPES:
+            continue
 
-    for script in ld_json_scripts:
         try:
-            data = json.loads(script)
-
-            def process_node(node: Dict[str, Any], depth: int = 0) -> None:
-                if depth > 50:  # Recursion guard
-                    return
-
-                nonlocal found
-                updates: Dict[str, Optional[str]] = {}
-                if "datePublished" in node:
-                    updates["datePublished"] = node["datePublished"]
-                    found = True
-                if "dateModified" in node:
-                    updates["dateModified"] = node["dateModified"]
-                if "author" in node:
-                    if isinstance(node["author"], dict) and "name" in node["author"]:
-                        updates["author"] = node["author"]["name"]
-                    elif isinstance(node["author"], list) and len(node["author"]) > 0 and "name" in node["author"][0]:
-                        updates["author"] = node["author"][0]["name"]
-                if "articleSection" in node:
-                    updates["articleSection"] = node["articleSection"]
-                if "image" in node:
-                    if isinstance(node["image"], dict) and "url" in node["image"]:
-                        updates["image_url"] = node["image"]["url"]
-                    elif isinstance(node["image"], str):
-                        updates["image_url"] = node["image"]
-
-                # Update only if not already set (or overwrite? usually first is best)
-                for k, v in updates.items():
-                    if not metadata[k]:
-                        metadata[k] = v
-
-            if "@graph" in data:
-                for node in data["@graph"]:
-                    process_node(node, depth=0)
-            else:
-                process_node(data, depth=0)
-
-            # if found: break  <-- Removed to allow gathering metadata from multiple scripts
-            pass
-        except (json.JSONDecodeError, ValueError, TypeError):
+            data = _json_loads(script)
+        except (ValueError, TypeError):  # orjson.JSONDecodeError subclasses ValueError
             continue
 
+        # Iterative walk over @graph / list containers (no closures, bounded depth)
+        stack: list[tuple[Any, int]] = [(data, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth > 50:  # Recursion guard
+                continue
+            if isinstance(node, list):
+                stack.extend((child, depth + 1) for child in reversed(node))
+                continue
+            if not isinstance(node, dict):
+                continue
+            if "@graph" in node:
+                stack.append((node["@graph"], depth + 1))
+            if _is_skipped_type(node.get("@type")):
+                continue
+            _process_node(node, metadata)
+
     return metadata
 
 
@@ -0,0 +1,216 @@
+import logging
+import re
+from urllib.parse import urljoin, urlparse
+
+import scrapy
+import scrapy.linkextractors
+from lxml import etree
+from scrapy.link import Link
+from scrapy.linkextractors import LinkExtractor
+from scrapy.spiders import CrawlSpider
+from scrapy.utils.misc import rel_has_nofollow
+from scrapy.utils.python import unique as unique_list
+from scrapy.utils.response import get_base_url
+from w3lib.html import strip_html5_whitespace
+from w3lib.url import safe_url_string
+
+from onet_scraper.utils.url_classifier import RuleMatcher
+
+logger = logging.getLogger(__name__)
+
+_collect_string_content = etree.XPath("string()")
+
+# The single pass reproduces LinkExtractor and CrawlSpider from their private parts, checked against these versions
+MIN_SCRAPY_VERSION = (2, 11)
+_PARSER_ATTRS = ("_iter_links", "link_key", "unique", "scan_tag", "scan_attr", "process_attr", "strip")
+_CRAWL_SPIDER_ATTRS = ("_compile_rules", "_build_request", "_requests_to_follow")
+
+
+def _scrapy_internals():
+    """
+    The one place Scrapy internals are looked up: returns scrapy.linkextractors._is_valid_url when this Scrapy
+    has every private piece the single pass uses (LxmlParserLinkExtractor attributes, CrawlSpider's request
+    loop), None otherwise - then each rule runs its own LinkExtractor.extract_links.
+    """
+    if scrapy.version_info < MIN_SCRAPY_VERSION:
+        return None
+    is_valid_url = getattr(scrapy.linkextractors, "_is_valid_url", None)
+    parser = getattr(LinkExtractor(), "link_extractor", None)
+    if is_valid_url is None or parser is None or not all(hasattr(parser, name) for name in _PARSER_ATTRS):
+        return None
+    if not all(hasattr(CrawlSpider, name) for name in _CRAWL_SPIDER_ATTRS):
+        return None
+    return is_valid_url
+
+
+_is_valid_url = _scrapy_internals()
+SUPPORTED = _is_valid_url is not None
+
+
+def _walk_key(link_extractor) -> tuple | None:
+    """
+    What a link extractor's document walk depends on (tags, attributes, process_value, strip), or None when
+    its output also depends on options the single pass does not reproduce.
+    """
+    parser = link_extractor.link_extractor
+    if link_extractor.canonicalize or link_extractor.restrict_text:
+        return None
+    # Without `unique`, nested restrict elements repeat their links; only the rule's own extractor does that
+    if link_extractor.restrict_xpaths and not parser.unique:
+        return None
+    scan_tag = getattr(parser.scan_tag, "args", parser.scan_tag)
+    scan_attr = getattr(parser.scan_attr, "args", parser.scan_attr)
+    return (
+        frozenset(scan_tag[0]) if isinstance(scan_tag, tuple) else scan_tag,
+        frozenset(scan_attr[0]) if isinstance(scan_attr, tuple) else scan_attr,
+        parser.process_attr,
+        parser.strip,
+    )
+
+
+class _RuleScope:
+    def __init__(self, index: int, link_extractor):
+        self.index = index
+        self.link_extractor = link_extractor
+        self.restrict_xpaths = link_extractor.restrict_xpaths
+        self.unique = link_extractor.link_extractor.unique
+        self.matcher = RuleMatcher(None, link_extractor)
+
+
+class SinglePassLinkExtractor:
+    """
+    Extracts the links of every CrawlSpider rule from one walk over the page's anchors.
+
+    `extract(response)` returns, per rule, the same links (and order) as calling each rule's
+    `link_extractor.extract_links(response)`: anchors are collected once, each restrict_css/restrict_xpaths
+    expression is evaluated once to scope them, and each distinct URL is tested once per rule against that
+    rule's combined allow/deny alternation - after a single alternation of every rule's allow patterns has
+    rejected the URLs no rule can take. Rules whose extractor options the shared walk cannot reproduce
+    (canonicalize, restrict_text, different tags/attrs/process_value) use their own extractor, and so do all
+    rules when the Scrapy internals the walk relies on are missing (`supported` is False).
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.supported = SUPPORTED
+        self.scopes: list[_RuleScope] = []
+        self.fallback: list[int] = []
+        self.walk_key = None
+        if not self.supported:
+            logger.warning(f"Scrapy {scrapy.__version__}: link extractor internals changed, extracting links per rule")
+        for index, rule in enumerate(rules):
+            key = _walk_key(rule.link_extractor) if self.supported else None
+            if key is not None and self.walk_key in (None, key):
+                self.walk_key = key
+                self.scopes.append(_RuleScope(index, rule.link_extractor))
+            else:
+                self.fallback.append(index)
+
+        self.parser = self.scopes[0].link_extractor.link_extractor if self.scopes else None
+        self._any_allow_re = None
+        if self.scopes and all(scope.matcher.allow_re is not None for scope in self.scopes):
+            pattern = "|".join(f"(?:{scope.matcher.allow_re.pattern})" for scope in self.scopes)
+            self._any_allow_re = re.compile(pattern)
+
+    @classmethod
+    def from_spider(cls, spider) -> "SinglePassLinkExtractor":
+        return cls(spider._rules)
+
+    def _anchors(self, response) -> list[tuple[etree._Element, Link]]:
+        """Every candidate link of the page in document order, built like LxmlParserLinkExtractor does."""
+        base_url = get_base_url(response)
+        anchors = []
+        urls: dict[str, str | None] = {}  # attribute value -> absolute URL (menus repeat the same hrefs)
+        for element, _, value in self.parser._iter_links(response.selector.root):
+            url = urls.get(value, "")
+            if url == "":
+                url = urls[value] = self._absolute_url(value, base_url, response)
+            if url is None:
+                continue
+            link = Link(url, _collect_string_content(element) or "", nofollow=rel_has_nofollow(element.get("rel")))
+            anchors.append((element, link))
+        return anchors
+
+    def _absolute_url(self, value: str, base_url: str, response) -> str | None:
+        parser = self.parser
+        try:
+            if parser.strip:
+                value = strip_html5_whitespace(value)
+            value = urljoin(base_url, value)
+        except ValueError:
+            return None
+        url = parser.process_attr(value)
+        if url is None:
+            return None
+        try:
+            url = safe_url_string(url, encoding=response.encoding)
+        except ValueError:
+            return None
+        return urljoin(response.url, url)
+
+    def _restricted_roots(self, response) -> dict:
+        """Element -> [(scope, restrict expression index)] for the elements each restrict expression selects."""
+        roots: dict = {}
+        selected: dict[str, list] = {}
+        for scope in self.scopes:
+            for position, xpath in enumerate(scope.restrict_xpaths):
+                if xpath not in selected:
+                    selected[xpath] = response.xpath(xpath)
+                for selector in selected[xpath]:
+                    targets = roots.setdefault(selector.root, [])
+                    if (scope, position) not in targets:
+                        targets.append((scope, position))
+        return roots
+
+    def _allowed(self, scope: _RuleScope, url: str, cache: dict) -> bool:
+        key = (scope.index, url)
+        if key not in cache:
+            # Per URL: validity and the all-rules alternation once; False when no rule can take it
+            parsed = cache.get(url)
+            if parsed is None:
+                candidate = _is_valid_url(url) and (self._any_allow_re is None or self._any_allow_re.search(url))
+                parsed = cache[url] = urlparse(url) if candidate else False
+            cache[key] = parsed is not False and scope.matcher.matches(url, parsed)
+        return cache[key]
+
+    def extract(self, response) -> list[list[Link]]:
+        """Links per rule, in rule order, as each rule's own LinkExtractor would return them."""
+        results: list[list[Link]] = [[] for _ in self.rules]
+        for index in self.fallback:
+            results[index] = self.rules[index].link_extractor.extract_links(response)
+        if not self.scopes:
+            return results
+
+        anchors = self._anchors(response)
+        roots = self._restricted_roots(response) if any(s.restrict_xpaths for s in self.scopes) else {}
+        # (restrict expression index, document position, link) per rule; unrestricted rules see every anchor
+        candidates: dict[int, list[tuple[int, int, Link]]] = {scope.index: [] for scope in self.scopes}
+        unrestricted = [scope for scope in self.scopes if not scope.restrict_xpaths]
+        for position, (element, link) in enumerate(anchors):
+            for scope in unrestricted:
+                candidates[scope.index].append((0, position, link))
+            if not roots:
+                continue
+            # An anchor belongs to a restricted rule when it sits inside (or is) an element its expression selects
+            first_expression: dict[int, int] = {}
+            for ancestor in (element, *element.iterancestors()):
+                for scope, expression in roots.get(ancestor, ()):
+                    if expression < first_expression.get(scope.index, len(scope.restrict_xpaths)):
+                        first_expression[scope.index] = expression
+            for index, expression in first_expression.items():
+                candidates[index].append((expression, position, link))
+
+        url_cache: dict = {}
+        for scope in self.scopes:
+            # Restricted rules list their links expression by expression, like LinkExtractor.extract_links
+            entries = sorted(candidates[scope.index]) if len(scope.restrict_xpaths) > 1 else candidates[scope.index]
+            links = [link for _, _, link in entries]
+            if scope.unique:
+                links = unique_list(links, key=scope.link_extractor.link_extractor.link_key)
+            # Fresh Link objects per rule: process_links callbacks may modify them in place
+            results[scope.index] = [
+                Link(link.url, link.text, link.fragment, link.nofollow)
+                for link in links
+                if self._allowed(scope, link.url, url_cache)
+            ]
+        return results
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from onet_scraper.utils.parsing import parse_article_body
+
+logger = logging.getLogger(__name__)
+
+
+class ParsePool:
+    """
+    Offloads article extraction to a ProcessPoolExecutor so parsing does not starve the reactor.
+
+    Backpressure: at most `max_pending` bodies are in flight. Further callbacks wait for a free slot,
+    which keeps their responses in Scrapy's scraper slot and throttles new downloads (SCRAPER_SLOT_MAX_ACTIVE_SIZE).
+    """
+
+    def __init__(self, max_workers: int | None = None, max_pending: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.pending = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            max_workers=crawler.settings.getint("PARSE_OFFLOAD_WORKERS", 0) or None,
+            max_pending=crawler.settings.getint("PARSE_OFFLOAD_MAX_PENDING", 0) or None,
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" avoids forking a process that already runs the Twisted reactor and thread pools.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"ParsePool: started {self.max_workers} workers (max pending: {self.max_pending})")
+        return self._executor
+
+    async def parse(self, url: str, body: bytes, encoding: str = "utf-8") -> dict[str, Any]:
+        """Parses an article body in a worker process. Waits for a free slot when the queue is full."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        async with self._slots:
+            self.pending += 1
+            try:
+                future = self._get_executor().submit(parse_article_body, url, body, encoding)
+                return await asyncio.wrap_future(future)
+            finally:
+                self.pending -= 1
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Cancels queued parses and stops the workers. By default it does not wait for the ones still running:
+        it is called from spider.closed on the reactor, and the executor reaps its processes in the background.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,119 @@
+import time
+from typing import Any
+
+from scrapy.http import HtmlResponse, Response
+
+from onet_scraper.loaders import ArticleLoader
+from onet_scraper.utils.extractors import extract_json_ld, parse_is_recent
+from onet_scraper.utils.text_cleaners import clean_article_content_with_stats
+from onet_scraper.utils.urls import ID_PATTERN
+
+STATUS_OK = "ok"
+STATUS_STALE = "stale"
+STATUS_INVALID = "invalid"
+
+
+def extract_article(response: Response, days_limit: int | None = 3) -> dict[str, Any]:
+    """
+    Runs the full article extraction chain (JSON-LD -> freshness check -> ArticleLoader -> ArticleItem).
+    `days_limit=None` disables the freshness check (offline re-extraction of old pages).
+    Returns a compact, picklable result: {"status", "date", "item", "error"}.
+    """
+    # 1. External Utils extraction (keep complex logic in utils)
+    metadata = extract_json_ld(response)
+
+    # 2. Date Freshness Check (Optimization)
+    # Direct extraction is faster for optimization checks than a full loader pass.
+    date_to_check = metadata.get("datePublished")
+    if not date_to_check:
+        # Fallback to visual date for check
+        date_to_check = (
+            response.css(".ods-m-date-authorship__publication::text").get()
+            or response.xpath('//span[contains(@class, "date")]/text()').get()
+        )
+
+    # Filter out old articles
+    if days_limit is not None and not parse_is_recent(date_to_check, days_limit=days_limit):
+        return {"status": STATUS_STALE, "date": date_to_check, "item": None, "error": None}
+
+    # 3. Initialize Loader
+    loader = ArticleLoader(item={}, response=response)
+
+    # 4. Populate Fields
+
+    # Title
+    loader.add_css("title", "h1::text")
+
+    # URL
+    loader.add_value("url", response.url)
+
+    # Date (Priority: Metadata -> CSS -> XPath)
+    loader.add_value("date", metadata.get("datePublished"))
+    loader.add_css("date", ".ods-m-date-authorship__publication::text")
+    loader.add_xpath("date", '//span[contains(@class, "date")]/text()')
+
+    # Content - Logic: Prefer hyphenate, fallback to p
+    # Selected once through the field's input processors; cleaned together with its stats after load_item
+    content_texts = loader.get_css(".hyphenate::text", loader.content_in)
+    if not content_texts:
+        # Fallback for pages without hyphenate class (or with whitespace-only hyphenate text)
+        content_texts = loader.get_css("p::text", loader.content_in)
+
+    # Lead
+    loader.add_css("lead", "#lead::text")
+
+    # Author (Priority: Metadata -> CSS selectors)
+    loader.add_value("author", metadata.get("author"))
+    loader.add_css("author", ".ods-m-author-xl__name-link::text")
+    loader.add_css("author", ".ods-m-author-xl__name::text")
+    loader.add_css("author", ".authorName::text")
+
+    # Meta Fields
+    loader.add_value("keywords", response.xpath('//meta[@name="keywords"]/@content').get())
+    loader.add_value("section", metadata.get("articleSection"))
+    loader.add_value("date_published", metadata.get("datePublished"))
+    loader.add_value("date_modified", metadata.get("dateModified"))
+
+    # Image
+    loader.add_value("image_url", metadata.get("image_url"))
+    loader.add_xpath("image_url", '//meta[@property="og:image"]/@content')
+
+    # ID
+    loader.add_xpath("id", '//meta[@name="data-story-id"]/@content')
+    # Fallback ID from URL
+    id_match = ID_PATTERN.search(response.url)
+    if id_match:
+        loader.add_value("id", id_match.group(1))
+
+    # 5. Load Item
+    item_data = loader.load_item()
+
+    # 6. Post-processing: content + read time / text stats in one cleaning pass
+    clean_content, text_stats = clean_article_content_with_stats(content_texts)
+    item_data["content"] = clean_content
+    item_data.update(text_stats)
+
+    # Deferred: building the pydantic model is only needed once the first article is validated
+    from onet_scraper.items import ArticleItem
+
+    # Instantiate ArticleItem to validate and ensure schema
+    # This will raise ValidationError if required fields (title, url, date) are missing
+    # which is correct behavior (we want to fail if scrap failed)
+    try:
+        item = ArticleItem(**item_data)
+    except Exception as e:
+        return {"status": STATUS_INVALID, "date": date_to_check, "item": None, "error": str(e)}
+
+    return {"status": STATUS_OK, "date": item.date, "item": item.model_dump(), "error": None}
+
+
+def parse_article_body(url: str, body: bytes, encoding: str = "utf-8", days_limit: int | None = 3) -> dict[str, Any]:
+    """
+    Process-pool entry point: rebuilds the response from raw bytes and runs `extract_article`.
+    Kept at module level so it can be pickled by ProcessPoolExecutor. `cpu_s` is the worker's parsing CPU time.
+    """
+    started = time.thread_time()
+    response = HtmlResponse(url=url, body=body, encoding=encoding)
+    result = extract_article(response, days_limit=days_limit)
+    result["cpu_s"] = time.thread_time() - started
+    return result
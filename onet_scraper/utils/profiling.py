@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+
+
+def frame_label(code) -> str:
+    """`qualname (file.py:line)` - one frame of a collapsed stack."""
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the stacks of selected threads from `sys._current_frames()` every `interval` seconds, in its own
+    thread. `thread_label(ident, name)` names the threads to sample (None skips a thread); the label becomes
+    the root frame, so one flamegraph shows e.g. the reactor and the download pool side by side.
+    """
+
+    def __init__(self, thread_label: Callable[[int, str], str | None], interval: float = 0.005):
+        self.thread_label = thread_label
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, duration: float) -> None:
+        self._thread = threading.Thread(target=self._run, args=(duration,), name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, duration: float) -> None:
+        deadline = time.monotonic() + duration
+        own_ident = threading.get_ident()
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self.sample(own_ident)
+            self._stop.wait(self.interval)
+
+    def sample(self, own_ident: int | None = None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            label = self.thread_label(ident, names.get(ident, ""))
+            if label is None:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.append(label)
+            self.stacks[";".join(reversed(frames))] += 1
+        self.samples += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """Brendan Gregg's collapsed format (flamegraph.pl, speedscope, inferno): `root;...;leaf count`."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, top: int = 30) -> list[tuple[str, int, int]]:
+        """(function, self samples, total samples) ordered by self samples."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]  # Without the thread label
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        return [(name, samples, total[name]) for name, samples in own.most_common(top)]
+
+    def write_top(self, path: str, top: int = 30) -> None:
+        stack_samples = sum(self.stacks.values()) or 1
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{self.samples} sampling rounds, {sum(self.stacks.values())} thread stacks\n\n")
+            f.write(f"{'self %':>7} {'total %':>8}  function\n")
+            for name, own, total in self.top_functions(top):
+                f.write(f"{own / stack_samples:7.1%} {total / stack_samples:8.1%}  {name}\n")
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from onet_scraper.utils.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# (status_code, body, final_url, headers) - the same tuple TorMiddleware._sync_make_request returns
+CachedResponse = tuple[int, bytes, str, dict[str, Any]]
+
+
+class ResponseCache:
+    """
+    Bounded two-level LRU of successful responses, keyed by canonical URL, with a TTL.
+    Memory holds the hottest `max_memory_items`; the disk level (one pickle per URL in `cache_dir`)
+    keeps up to `max_disk_items`. The disk level is tracked by an in-memory index (file -> store time, LRU
+    order) built from one directory scan at start-up: lookups of URLs that are not on disk cost no I/O, and
+    eviction drops the expired and least recently used files without listing the directory again.
+    get/set are coroutines: file reads, writes and removals run in a thread, off the reactor.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        max_memory_items: int = 256,
+        max_disk_items: int = 2048,
+        cache_dir: str | None = None,
+    ):
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.cache_dir = cache_dir
+        self._memory: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._disk: OrderedDict[str, float] = OrderedDict()  # file name -> stored at, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            ttl=crawler.settings.getfloat("TOR_CACHE_TTL", 300),
+            max_memory_items=crawler.settings.getint("TOR_CACHE_MEMORY_ITEMS", 256),
+            max_disk_items=crawler.settings.getint("TOR_CACHE_DISK_ITEMS", 2048),
+            cache_dir=crawler.settings.get("TOR_CACHE_DIR") or None,
+        )
+
+    def _disk_name(self, key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pickle"
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl
+
+    def _load_disk_index(self) -> None:
+        # Files are written once per store, so their mtime is the store time
+        files = []
+        for entry in self._disk_files():
+            try:
+                files.append((entry.stat().st_mtime, entry.name))
+            except OSError:
+                continue
+        for stored_at, name in sorted(files):
+            self._disk[name] = stored_at
+        stale = self._evict_disk()
+        if stale:
+            self._remove_files(stale)
+
+    async def get(self, url: str) -> CachedResponse | None:
+        key = canonicalize_url(url)
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._memory[key]
+
+        name = self._disk_name(key) if self.cache_dir else None
+        stored_at = self._disk.get(name) if name else None
+        if stored_at is not None:
+            if self._expired(stored_at):
+                del self._disk[name]
+                await asyncio.to_thread(self._remove_files, [name])
+            else:
+                entry = await asyncio.to_thread(self._read_disk, name)
+                if entry is not None and name in self._disk:
+                    self._disk.move_to_end(name)
+                    self._remember(key, entry)
+                    self.hits += 1
+                    return entry[1]
+                self._disk.pop(name, None)
+
+        self.misses += 1
+        return None
+
+    async def set(self, url: str, response: CachedResponse) -> None:
+        key = canonicalize_url(url)
+        entry = (time.time(), response)
+        self._remember(key, entry)
+        if not self.cache_dir:
+            return
+        name = self._disk_name(key)
+        self._disk[name] = entry[0]
+        self._disk.move_to_end(name)
+        evicted = self._evict_disk()
+        await asyncio.to_thread(self._write_disk, name, entry, evicted)
+
+    def _remember(self, key: str, entry: tuple[float, CachedResponse]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> list[str]:
+        """Drops expired files from the index, then the least recently used beyond max_disk_items."""
+        evicted = []
+        if len(self._disk) > self.max_disk_items:
+            evicted = [name for name, stored_at in self._disk.items() if self._expired(stored_at)]
+            for name in evicted:
+                del self._disk[name]
+        while len(self._disk) > self.max_disk_items:
+            evicted.append(self._disk.popitem(last=False)[0])
+        return evicted
+
+    def _read_disk(self, name: str) -> tuple[float, CachedResponse] | None:
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove_files([name])
+            return None
+
+    def _write_disk(self, name: str, entry: tuple[float, CachedResponse], evicted: list[str]) -> None:
+        path = os.path.join(self.cache_dir, name)
+        try:
+            # Per-thread temporary file: two writes of the same URL may overlap
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # The index still lists it; the next get finds no file and forgets it
+            logger.error(f"Failed to write cache entry {path}: {e}")
+        self._remove_files(evicted)
+
+    def _disk_files(self) -> list[os.DirEntry]:
+        try:
+            with os.scandir(self.cache_dir) as it:
+                return [e for e in it if e.name.endswith(".pickle")]
+        except OSError:
+            return []
+
+    def _remove_files(self, names: list[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
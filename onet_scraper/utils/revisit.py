@@ -0,0 +1,129 @@
+import heapq
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from onet_scraper.utils.urls import canonicalize_url
+
+
+def parse_timestamp(value: str | None) -> float | None:
+    """Unix timestamp of an ISO 8601 date (JSON-LD datePublished/dateModified), None if unparsable."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except (ValueError, TypeError):
+        return None
+
+
+class TrackedArticle:
+    """Last captured version of one article and its estimated change interval."""
+
+    def __init__(self, url: str, section: str | None, published: float, modified: float | None, content_hash: str):
+        self.url = url
+        self.section = section
+        self.published = published
+        self.modified = modified
+        self.content_hash = content_hash
+        self.interval: float | None = None  # smoothed seconds between observed dateModified changes
+        self.last_fetch = 0.0
+        self.unchanged = 0  # revisits since the last new version
+
+
+class RevisitPolicy:
+    """
+    Decides which already-captured articles to refetch, to catch live-updated stories ("relacja na żywo").
+
+    Each article's change interval is estimated from the deltas between the dateModified values of its
+    captured versions (smoothed), falling back to the section's average, then to `default_interval`.
+    Every revisit that brings no new version doubles the wait (up to `max_interval`); articles older than
+    `max_age` are dropped. `due` picks the most overdue articles, at most `budget` per call (one crawl cycle).
+    """
+
+    def __init__(
+        self,
+        default_interval: float = 3600,
+        min_interval: float = 600,
+        max_interval: float = 6 * 3600,
+        max_age: float = 48 * 3600,
+        max_tracked: int = 5000,
+        smoothing: float = 0.5,
+    ):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_age = max_age
+        self.max_tracked = max_tracked
+        self.smoothing = smoothing
+        self.tracked: OrderedDict[str, TrackedArticle] = OrderedDict()
+        self.section_intervals: dict[str, float] = {}
+
+    def _smooth(self, previous: float | None, delta: float) -> float:
+        if previous is None:
+            return delta
+        return self.smoothing * delta + (1 - self.smoothing) * previous
+
+    def _observe_delta(self, entry: TrackedArticle, delta: float) -> None:
+        if delta <= 0:
+            return
+        entry.interval = self._smooth(entry.interval, delta)
+        if entry.section:
+            self.section_intervals[entry.section] = self._smooth(self.section_intervals.get(entry.section), delta)
+
+    def observe(self, item: dict[str, Any], now: float | None = None) -> bool:
+        """
+        Records a captured version (first capture or a changed revisit). Returns False for articles that are
+        not worth tracking (no content hash, unknown or too old publication date).
+        """
+        now = time.time() if now is None else now
+        content_hash = item.get("content_hash")
+        # Full publication time; `date` is cut to the day and would skew the first delta and the age
+        published = parse_timestamp(item.get("date_published") or item.get("date"))
+        if not content_hash or published is None or now - published > self.max_age:
+            return False
+        modified = parse_timestamp(item.get("date_modified"))
+        key = item.get("id") or canonicalize_url(item["url"])
+
+        entry = self.tracked.get(key)
+        if entry is None:
+            entry = TrackedArticle(item["url"], item.get("section"), published, modified, content_hash)
+            # Already edited once before the first capture: that delta is the first observation
+            if modified is not None:
+                self._observe_delta(entry, modified - published)
+            self.tracked[key] = entry
+        else:
+            if modified is not None and entry.modified is not None:
+                self._observe_delta(entry, modified - entry.modified)
+            entry.modified = modified or entry.modified
+            entry.content_hash = content_hash
+            entry.unchanged = 0
+            self.tracked.move_to_end(key)
+
+        entry.last_fetch = now
+        while len(self.tracked) > self.max_tracked:
+            self.tracked.popitem(last=False)
+        return True
+
+    def expected_interval(self, entry: TrackedArticle) -> float:
+        interval = entry.interval or self.section_intervals.get(entry.section) or self.default_interval
+        interval *= 2**entry.unchanged
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def due(self, budget: int, now: float | None = None) -> list[TrackedArticle]:
+        """Up to `budget` most overdue articles; they count as fetched (and unchanged until a new version)."""
+        now = time.time() if now is None else now
+        candidates = []
+        for key, entry in list(self.tracked.items()):
+            if now - entry.published > self.max_age:
+                del self.tracked[key]
+                continue
+            overdue = (now - entry.last_fetch) / self.expected_interval(entry)
+            if overdue >= 1:
+                candidates.append((overdue, key))
+
+        chosen = [self.tracked[key] for _, key in heapq.nlargest(budget, candidates)]
+        for entry in chosen:
+            entry.last_fetch = now
+            entry.unchanged += 1
+        return chosen
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 from functools import lru_cache
@@ -29,12 +30,30 @@ def load_cleaning_rules() -> dict[str, list[str]]:
         return default_rules
 
 
+# Average adult reading speed used for `read_time`
+WORDS_PER_MINUTE = 200
+
+
+def read_time_minutes(word_count: int) -> int:
+    return max(1, round(word_count / WORDS_PER_MINUTE))
+
+
 def clean_article_content(content_list: list[str] | None) -> str:
     """
     Cleans the raw content list by removing boilerplate, scams, and handling whitespace.
     """
+    return clean_article_content_with_stats(content_list)[0]
+
+
+def clean_article_content_with_stats(content_list: list[str] | None) -> tuple[str, dict[str, int | str]]:
+    """
+    `clean_article_content` plus text statistics gathered in the same pass over the kept lines:
+    word_count, read_time, char_count, paragraph_count and content_hash (sha1 of the stripped paragraphs).
+    Words are counted line by line, so no token list of the whole article is built.
+    Stats are empty when nothing is left after cleaning.
+    """
     if not content_list:
-        return ""
+        return "", {}
 
     full_content = "\n".join(content_list)
 
@@ -57,16 +76,33 @@ def clean_article_content(content_list: list[str] | None) -> str:
     # Remove other junk lines
     lines = clean_content.split("\n")
     filtered_lines = []
+    word_count = 0
+    content_hash = hashlib.sha1()
     for line in lines:
         # Skip lines containing scam phrases (double check after split)
         if any(phrase in line for phrase in scam_phrases):
             continue
+        stripped = line.strip()
         # Skip lines that are just whitespace
-        if not line.strip():
+        if not stripped:
             continue
         # Skip very short lines that might be artifacts (unless they look like subheaders?)
-        if len(line.strip()) < 3:
+        if len(stripped) < 3:
             continue
+        if filtered_lines:
+            content_hash.update(b"\n")
         filtered_lines.append(line)
+        word_count += len(stripped.split())
+        content_hash.update(stripped.encode("utf-8"))
+
+    text = "\n".join(filtered_lines).strip()
+    if not text:
+        return "", {}
 
-    return "\n".join(filtered_lines).strip()
+    return text, {
+        "word_count": word_count,
+        "read_time": read_time_minutes(word_count),
+        "char_count": len(text),
+        "paragraph_count": len(filtered_lines),
+        "content_hash": content_hash.hexdigest(),
+    }
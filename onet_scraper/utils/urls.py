@@ -0,0 +1,97 @@
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Compiled Regexes for Performance
+ID_PATTERN = re.compile(r"/([a-z0-9]+)$")
+
+# Query parameters that only carry tracking/referral data
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "dclid", "msclkid", "ocid", "srcc", "ref", "amp", "_ga"})
+TRACKING_PREFIXES = ("utm_",)
+
+# Host prefixes that serve the same content as the bare host (mobile / AMP variants)
+HOST_VARIANT_PREFIXES = ("m.", "amp.")
+
+# www.onet.pl article ids carry a ",<hash>" suffix: /informacje/onetwiadomosci/slug/abc123,79cfc278
+_ID_SUFFIX_RE = re.compile(r",[a-z0-9]+$")
+
+# Articles live at least three path segments deep (/section/slug/id)
+ARTICLE_MIN_SEGMENTS = 3
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def is_onet_host(host: str) -> bool:
+    """onet.pl or one of its subdomains - not look-alikes such as notonet.pl."""
+    return host == "onet.pl" or host.endswith(".onet.pl")
+
+
+def normalize_host(host: str) -> str:
+    host = host.lower().rstrip(".")
+    if host.endswith(":443") or host.endswith(":80"):
+        host = host.rsplit(":", 1)[0]
+    if not is_onet_host(host):
+        return host
+    for prefix in HOST_VARIANT_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+    if host == "onet.pl":
+        host = "www.onet.pl"
+    return host
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of an Onet URL: https, normalized host, no fragment, no tracking
+    parameters, no AMP path suffix and no trailing slash (except for the root).
+    Non-Onet URLs are returned unchanged.
+    """
+    parts = urlsplit(url)
+    host = normalize_host(parts.netloc)
+    if not is_onet_host(host):
+        return url
+
+    path = parts.path or "/"
+    if path.endswith("/amp"):
+        path = path[: -len("/amp")] or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(
+        sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k))
+    )
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def story_id(url: str) -> str | None:
+    """
+    Story ID of an Onet article URL (any host/variant), using ID_PATTERN on article-shaped paths.
+    Category and listing URLs (fewer than three path segments) have no story ID.
+    """
+    parts = urlsplit(canonicalize_url(url))
+    path = parts.path
+    if not is_onet_host(parts.netloc) or path.count("/") < ARTICLE_MIN_SEGMENTS:
+        return None
+    id_match = ID_PATTERN.search(_ID_SUFFIX_RE.sub("", path))
+    # Purely numeric tails are page numbers (/kraj/strona/2), not story IDs
+    if not id_match or id_match.group(1).isdigit():
+        return None
+    return id_match.group(1)
+
+
+def fingerprint_key(url: str) -> str:
+    """Key used for request deduplication: the story ID when known, else the canonical URL."""
+    sid = story_id(url)
+    if sid:
+        return f"onet-story:{sid}"
+    return canonicalize_url(url)
+
+
+def is_category_url(url: str) -> bool:
+    """Section front pages (https://wiadomosci.onet.pl/kraj): one path segment, no query."""
+    parts = urlsplit(canonicalize_url(url))
+    return is_onet_host(parts.netloc) and not parts.query and parts.path.count("/") == 1 and len(parts.path) > 1
@@ -0,0 +1,70 @@
+import gzip
+import random
+import time
+
+import pytest
+
+from onet_scraper.archive import PageArchive
+
+pytestmark = pytest.mark.benchmark
+
+WORDS = "rząd sejm prezydent wybory polityka gospodarka inflacja szpital szkoła minister premier ustawa".split()
+
+
+def onet_like_pages(count=300):
+    """Pages with Onet's shape: ~50 KB of shared scripts/navigation/footer around a few KB of article text."""
+    chrome = random.Random(0)
+
+    def token():
+        return "".join(chrome.choice("abcdefghijklmnopqrstuvwxyz_$0123456789") for _ in range(chrome.randint(3, 12)))
+
+    head = "".join(f'<link rel="stylesheet" href="https://ocdn.eu/static/{token()}.css">' for _ in range(20))
+    head += "".join(f'<script src="https://ocdn.eu/static/{token()}.js" async></script>' for _ in range(40))
+    inline = ";".join(f"var {token()}=function({token()}){{return {token()}.{token()}({i})}}" for i in range(600))
+    nav = "".join(f'<li><a class="ods-c-nav__link" href="/{token()}">{token()}</a></li>' for _ in range(150))
+    footer = "".join(
+        f'<a class="ods-c-footer__link" href="https://www.onet.pl/{token()}">{token()}</a>' for _ in range(200)
+    )
+    rng = random.Random(1)
+    pages = []
+    for i in range(count):
+        text = "".join(f'<p class="hyphenate">{" ".join(rng.choice(WORDS) for _ in range(80))}.</p>' for _ in range(12))
+        html = (
+            f'<!DOCTYPE html><html lang="pl"><head>{head}<script>{inline}</script><title>Artykuł {i}</title></head>'
+            f"<body><nav><ul>{nav}</ul></nav><main><h1>Tytuł {i}</h1>{text}</main><footer>{footer}</footer>"
+            "</body></html>"
+        )
+        pages.append(html.encode("utf-8"))
+    return pages
+
+
+def test_bench_dictionary_archive_vs_gzip(tmp_path):
+    pages = onet_like_pages()
+    train, test = pages[:100], pages[100:]
+    store = PageArchive(str(tmp_path / "pages.sqlite"), sample_pages=len(train))
+    for i, body in enumerate(train):
+        store.put(f"train{i}", "https://wiadomosci.onet.pl/kraj/a/x", body)
+    started = time.perf_counter()
+    store.retrain()
+    train_time = time.perf_counter() - started
+
+    stored = sum(store.put(f"s{i}", "https://wiadomosci.onet.pl/kraj/a/x", body) for i, body in enumerate(test))
+    gzipped = [gzip.compress(body) for body in test]
+
+    started = time.perf_counter()
+    for i in range(len(test)):
+        store.get(f"s{i}")
+    archive_read = (time.perf_counter() - started) / len(test)
+    started = time.perf_counter()
+    for data in gzipped:
+        gzip.decompress(data)
+    gzip_read = (time.perf_counter() - started) / len(test)
+
+    gzip_size = sum(map(len, gzipped))
+    print(
+        f"\n{store.codec} dictionary: {stored / len(test) / 1e3:.1f} kB/page vs gzip {gzip_size / len(test) / 1e3:.1f}"
+        f" kB/page ({gzip_size / stored:.1f}x smaller), read {archive_read * 1e3:.2f} ms/page "
+        f"(gzip {gzip_read * 1e3:.2f} ms), trained in {train_time:.2f} s"
+    )
+    assert stored < gzip_size
+    store.close()
@@ -0,0 +1,87 @@
+import json
+import time
+
+import pytest
+from scrapy.http import HtmlResponse
+
+from onet_scraper.utils.extractors import extract_json_ld
+
+pytestmark = pytest.mark.benchmark
+
+ROUNDS = 50
+
+
+def naive_extract_json_ld(response):
+    """Reference implementation: decode every script with stdlib json and walk every node."""
+    metadata = dict.fromkeys(("datePublished", "dateModified", "author", "articleSection", "image_url"))
+    for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        for node in data.get("@graph", [data]):
+            if "datePublished" in node and not metadata["datePublished"]:
+                metadata["datePublished"] = node["datePublished"]
+    return metadata
+
+
+def large_json_ld_page():
+    breadcrumbs = {
+        "@context": "https://schema.org",
+        "@type": "BreadcrumbList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": i, "name": f"Kategoria {i}", "item": f"https://onet.pl/k/{i}"}
+            for i in range(3000)
+        ],
+    }
+    organization = {
+        "@context": "https://schema.org",
+        "@type": "NewsMediaOrganization",
+        "name": "Onet",
+        "image": "https://ocdn.eu/logo.png",
+        "sameAs": [f"https://social.example/{i}" for i in range(3000)],
+    }
+    article = {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "NewsArticle",
+                "datePublished": "2026-01-01T12:00:00+01:00",
+                "dateModified": "2026-01-01T13:00:00+01:00",
+                "author": [{"@type": "Person", "name": "Bench Author"}],
+                "articleSection": "Kraj",
+                "image": {"url": "https://ocdn.eu/lead.jpg"},
+            }
+        ],
+    }
+    filler = {"@context": "https://schema.org", "@type": "WebSite", "potentialAction": ["x"] * 3000}
+    scripts = "".join(
+        f'<script type="application/ld+json">{json.dumps(blob)}</script>'
+        for blob in (breadcrumbs, organization, article, filler)
+    )
+    html = f"<html><head>{scripts}</head><body><h1>Bench</h1></body></html>"
+    return HtmlResponse(url="https://wiadomosci.onet.pl/kraj/bench/abc123", body=html.encode("utf-8"))
+
+
+def timed(func, response):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func(response)
+    return (time.perf_counter() - start) / ROUNDS, result
+
+
+def test_bench_extract_json_ld_large_blobs():
+    response = large_json_ld_page()
+    # Warm up selector caches so both implementations parse an already-built tree
+    response.selector
+
+    fast_time, metadata = timed(extract_json_ld, response)
+    naive_time, _ = timed(naive_extract_json_ld, response)
+
+    print(
+        f"\nextract_json_ld: {fast_time * 1000:.3f} ms/page, naive: {naive_time * 1000:.3f} ms/page "
+        f"({naive_time / fast_time:.1f}x), body: {len(response.body) / 1024:.0f} KiB"
+    )
+    assert metadata["author"] == "Bench Author"
+    assert metadata["image_url"] == "https://ocdn.eu/lead.jpg"
+    assert fast_time < naive_time
@@ -0,0 +1,57 @@
+import json
+import time
+
+import pytest
+
+from onet_scraper.jsonl_index import JsonlReader
+from onet_scraper.pipelines import JsonWriterPipeline
+
+pytestmark = pytest.mark.benchmark
+
+ITEMS = 20_000
+
+
+def full_scan(path, story_id):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            item = json.loads(line)
+            if item["id"] == story_id:
+                return item
+    return None
+
+
+def test_bench_indexed_lookup_vs_full_scan(tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    pipeline = JsonWriterPipeline(index=True)
+    spider = mocker.MagicMock()
+    pipeline.open_spider(spider)
+    for i in range(ITEMS):
+        item = {
+            "id": f"id{i:06d}",
+            "url": f"https://wiadomosci.onet.pl/kraj/artykul-{i}/id{i:06d}",
+            "date": f"2026-{1 + i * 12 // ITEMS:02d}-{1 + i % 28:02d}",
+            "content": "Treść artykułu. " * 200,
+        }
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+    path = str(tmp_path / pipeline.filename)
+    targets = [f"id{i:06d}" for i in range(ITEMS - 1, 0, -ITEMS // 10)]
+
+    started = time.perf_counter()
+    scanned = [full_scan(path, target) for target in targets]
+    scan_time = (time.perf_counter() - started) / len(targets)
+
+    with JsonlReader(path) as reader:
+        started = time.perf_counter()
+        indexed = [reader.get(target) for target in targets]
+        index_time = (time.perf_counter() - started) / len(targets)  # Includes building the id table once
+        started = time.perf_counter()
+        march = sum(1 for _ in reader.iter_date_range("2026-03-01", "2026-03-31"))
+        range_time = time.perf_counter() - started
+
+    print(
+        f"\nlookup by id: {index_time * 1e3:.2f} ms indexed vs {scan_time * 1e3:.1f} ms full scan "
+        f"({scan_time / index_time:.0f}x), {march} records of one month in {range_time * 1e3:.1f} ms"
+    )
+    assert indexed == scanned
+    assert index_time < scan_time
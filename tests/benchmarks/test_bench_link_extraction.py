@@ -0,0 +1,49 @@
+import time
+
+import pytest
+from scrapy.http import HtmlResponse
+
+from onet_scraper.spiders.onet import OnetSpider
+
+pytestmark = pytest.mark.benchmark
+
+ROUNDS = 20
+
+
+def large_listing_page(cards=1500, nav_links=500):
+    """Onet-like listing: navigation, footer and many article cards plus a "next" link."""
+    nav = "".join(f'<a href="/kategoria-{i}">Kategoria {i}</a>' for i in range(nav_links))
+    card_html = "".join(
+        f'<div class="ods-c-card-wrapper"><div class="ods-o-card"><a href="/kraj/artykul-{i}/id{i:06d}">'
+        f"<span>Tytuł artykułu {i}</span></a><a href='/autorzy/autor-{i % 50}'>Autor</a></div></div>"
+        for i in range(cards)
+    )
+    footer = "".join(f'<a href="https://www.onet.pl/archiwum/2026-{i:02d}">Archiwum {i}</a>' for i in range(1, 13))
+    html = (
+        f"<html><body><nav>{nav}</nav><main>{card_html}</main>"
+        f'<a class="next" href="/kraj?page=2">Następna</a><footer>{footer}</footer></body></html>'
+    )
+    return HtmlResponse(url="https://wiadomosci.onet.pl/kraj", body=html.encode("utf-8"))
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func()
+    return (time.perf_counter() - start) / ROUNDS, result
+
+
+def test_bench_single_pass_link_extraction():
+    spider = OnetSpider()
+    response = large_listing_page()
+    response.selector  # Parse once, outside the timings
+
+    single_time, single = timed(lambda: spider.rule_links.extract(response))
+    per_rule_time, per_rule = timed(lambda: [rule.link_extractor.extract_links(response) for rule in spider._rules])
+
+    print(
+        f"\nsingle pass: {single_time * 1000:.1f} ms/page, per-rule extractors: {per_rule_time * 1000:.1f} ms/page "
+        f"({per_rule_time / single_time:.1f}x), {len(response.css('a'))} anchors, {len(spider._rules)} rules"
+    )
+    assert [[link.url for link in links] for links in single] == [[link.url for link in links] for links in per_rule]
+    assert single_time < per_rule_time
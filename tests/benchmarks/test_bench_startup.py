@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Scrapy itself is imported first so the budget only covers what our modules add on top of it
+SCRAPY_PRELOAD = "import scrapy, scrapy.http, scrapy.spiders, scrapy.linkextractors, scrapy.loader"
+
+# Cumulative import time budget (ms) per entry-point module, on top of Scrapy; that heavy dependencies stay
+# deferred is checked without timings in tests/test_startup.py
+IMPORT_BUDGET_MS = {
+    "onet_scraper.settings": 10,
+    "onet_scraper.spiders.onet": 30,
+    "onet_scraper.middlewares": 30,
+}
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Runs `python -X importtime` in a fresh interpreter, returns cumulative microseconds per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{SCRAPY_PRELOAD}; import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGET_MS))
+def test_bench_import_time_budget(module):
+    times = import_times(module)
+
+    elapsed_ms = times[module] / 1000
+    print(f"\n{module}: {elapsed_ms:.1f} ms (budget {IMPORT_BUDGET_MS[module]} ms)")
+    assert elapsed_ms <= IMPORT_BUDGET_MS[module]
@@ -0,0 +1,593 @@
+"""
+End-to-end load harness: the real OnetSpider + TorMiddleware + pipelines against local stand-ins.
+
+    python tests/loadtest/harness.py --categories 5 --articles-per-category 40 --latency 0.05 --ban-rate 0.05
+
+- OnetStandIn: HTTPS server generating Onet-like home, category, pagination and article pages, with
+  configurable latency and ban injection (403). A second instance bans everything ("bad" exits).
+- FakeTorNetwork / SOCKS stand-in: socks5h proxy that routes every stream to the stand-in. Each SOCKS
+  username gets a circuit with a fake exit; streams through bad exits go to the banning instance.
+- FakeTorControl: enough of the control protocol for stem (PROTOCOLINFO, AUTHENTICATE, SIGNAL NEWNYM, GETINFO,
+  SETEVENTS CIRC, EXTENDCIRCUIT, SETCONF ExcludeExitNodes) - warm-up and exit tracking run for real.
+
+The crawl runs in a child process (a fresh reactor per run) with the project settings plus overrides.
+The report has articles/min, bans served/handled, NEWNYMs, excluded exits and p50/p99 stream latency.
+"""
+
+import argparse
+import datetime as dt
+import hashlib
+import http.server
+import json
+import os
+import random
+import selectors
+import socket
+import socketserver
+import ssl
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ["kraj", "swiat", "polityka", "gospodarka", "nauka", "zdrowie", "kultura", "technologie"]
+
+
+# --- TLS ---------------------------------------------------------------------------------------------------
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    """Self-signed CA certificate for onet.pl / *.onet.pl. Returns (cert_path, key_path)."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "onet.pl load harness")])
+    now = dt.datetime.now(dt.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - dt.timedelta(days=1))
+        .not_valid_after(now + dt.timedelta(days=7))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("onet.pl"), x509.DNSName("*.onet.pl")]), False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "harness-ca.pem")
+    key_path = os.path.join(directory, "harness-key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        )
+    return cert_path, key_path
+
+
+# --- Onet stand-in -----------------------------------------------------------------------------------------
+
+
+class Site:
+    """Deterministic Onet-like site: categories, paginated listings and articles."""
+
+    def __init__(self, categories: int, articles_per_category: int, per_page: int, body_kb: int):
+        self.categories = CATEGORIES[:categories]
+        self.articles_per_category = articles_per_category
+        self.per_page = per_page
+        self.padding = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (body_kb * 1024 // 58)
+
+    @property
+    def total_articles(self) -> int:
+        return len(self.categories) * self.articles_per_category
+
+    def pages(self) -> int:
+        return -(-self.articles_per_category // self.per_page)
+
+    def article_path(self, category: str, n: int) -> str:
+        index = self.categories.index(category) * self.articles_per_category + n
+        return f"/{category}/artykul-numer-{n}/a{index:05d}x"
+
+    def cards(self, paths: list[str]) -> str:
+        return "".join(f'<div class="ods-c-card-wrapper"><a href="{p}">Artykuł {p}</a></div>' for p in paths)
+
+    def home(self) -> str:
+        links = "".join(f'<a href="/{c}">{c}</a>' for c in self.categories)
+        cards = self.cards([self.article_path(c, 0) for c in self.categories])
+        return f"<html><head><title>Onet</title></head><body><nav>{links}</nav>{cards}</body></html>"
+
+    def listing(self, category: str, page: int) -> str | None:
+        if category not in self.categories or not 1 <= page <= self.pages():
+            return None
+        first = (page - 1) * self.per_page
+        last = min(first + self.per_page, self.articles_per_category)
+        cards = self.cards([self.article_path(category, n) for n in range(first, last)])
+        next_link = f'<a class="next" href="/{category}?page={page + 1}">Następna</a>' if page < self.pages() else ""
+        return f"<html><body><h1>{category}</h1>{cards}{next_link}</body></html>"
+
+    def article(self, path: str) -> str | None:
+        parts = path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] not in self.categories:
+            return None
+        today = dt.date.today().isoformat()
+        title = f"Artykuł {parts[2]}"
+        json_ld = json.dumps(
+            {
+                "@context": "https://schema.org",
+                "@type": "NewsArticle",
+                "headline": title,
+                "datePublished": f"{today}T08:00:00+01:00",
+                "dateModified": f"{today}T09:00:00+01:00",
+                "author": {"@type": "Person", "name": "Jan Kowalski"},
+                "articleSection": parts[0],
+                "image": {"url": f"https://ocdn.eu/images/{parts[2]}.jpg"},
+            }
+        )
+        paragraphs = "".join(
+            f'<p class="hyphenate">Akapit {i} artykułu {parts[2]}. {self.padding}</p>' for i in range(5)
+        )
+        return (
+            f'<html><head><script type="application/ld+json">{json_ld}</script>'
+            f'<meta name="data-story-id" content="{parts[2]}"></head>'
+            f'<body><h1>{title}</h1><div id="lead">Lead {parts[2]}</div>{paragraphs}</body></html>'
+        )
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "OnetStandIn"
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.rng.uniform(server.latency * 0.5, server.latency * 1.5))
+
+        if server.ban_all or server.rng.random() < server.ban_rate:
+            server.count("bans")
+            return self._send(403, "<html><body>Access Denied</body></html>")
+
+        path, _, query = self.path.partition("?")
+        if path == "/robots.txt":
+            return self._send(200, "User-agent: *\nAllow: /\n", "text/plain")
+        if path == "/":
+            body = server.site.home()
+        elif path.count("/") == 1:
+            page = int(query.split("=", 1)[1]) if query.startswith("page=") else 1
+            body = server.site.listing(path[1:], page)
+        else:
+            body = server.site.article(path)
+            if body is not None:
+                server.count("articles_served")
+        if body is None:
+            return self._send(404, "<html><body>Not found</body></html>")
+        self._send(200, body)
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+        payload = body.encode("utf-8")
+        self.server.count("requests")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class OnetStandIn(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, site: Site, ssl_context, latency=0.0, ban_rate=0.0, ban_all=False, seed=0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.site = site
+        self.ssl_context = ssl_context
+        self.latency = latency
+        self.ban_rate = ban_rate
+        self.ban_all = ban_all
+        self.rng = random.Random(seed)
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def finish_request(self, request, client_address):
+        # TLS handshake in the worker thread, not in the accept loop
+        try:
+            request = self.ssl_context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError):
+            return
+        super().finish_request(request, client_address)
+
+
+# --- Fake Tor: SOCKS + control port ------------------------------------------------------------------------
+
+
+class FakeTorNetwork:
+    """Circuits keyed by SOCKS username, fake exits (some always banned), NEWNYM and ExcludeExitNodes."""
+
+    def __init__(self, exits: int, bad_exits: int, seed: int = 0):
+        self.exits = [
+            (hashlib.sha1(f"exit{i}".encode()).hexdigest().upper(), f"exit{i}", i < bad_exits) for i in range(exits)
+        ]
+        self.rng = random.Random(seed)
+        self.circuits: dict[str, tuple[int, tuple[str, str, bool]]] = {}
+        self.excluded: set[str] = set()
+        self.next_circuit_id = 1
+        self.newnym = 0
+        self.stream_latencies: list[float] = []
+        self.control_connections: list["ControlHandler"] = []
+        self.lock = threading.RLock()
+
+    def _new_circuit(self) -> tuple[int, tuple[str, str, bool]]:
+        allowed = [e for e in self.exits if e[0] not in self.excluded] or self.exits
+        circuit_id = self.next_circuit_id
+        self.next_circuit_id += 1
+        return circuit_id, self.rng.choice(allowed)
+
+    def circuit_for(self, username: str) -> tuple[int, tuple[str, str, bool]]:
+        with self.lock:
+            circuit = self.circuits.get(username)
+            if circuit is None:
+                circuit = self.circuits[username] = self._new_circuit()
+                self.emit(self.circ_line(circuit, username))
+            return circuit
+
+    def extend_circuit(self) -> int:
+        with self.lock:
+            circuit = self._new_circuit()
+        return circuit[0]
+
+    def signal_newnym(self) -> None:
+        with self.lock:
+            self.newnym += 1
+            self.circuits.clear()
+
+    @staticmethod
+    def circ_line(circuit, username: str | None = None) -> str:
+        circuit_id, (fingerprint, nickname, _) = circuit
+        line = f"{circuit_id} BUILT ${'A' * 40}~guard,${fingerprint}~{nickname} PURPOSE=GENERAL"
+        if username:
+            line += f' SOCKS_USERNAME="{username}" SOCKS_PASSWORD="onet"'
+        return line
+
+    def circuit_status(self) -> list[str]:
+        with self.lock:
+            return [self.circ_line(c, u) for u, c in self.circuits.items()]
+
+    def emit(self, circ_line: str) -> None:
+        for connection in list(self.control_connections):
+            if "CIRC" in connection.events:
+                connection.send(f"650 CIRC {circ_line}")
+
+    def record_latency(self, seconds: float) -> None:
+        with self.lock:
+            self.stream_latencies.append(seconds)
+
+
+class SocksHandler(socketserver.BaseRequestHandler):
+    server: "FakeTorSocks"
+
+    def _recv(self, n: int) -> bytes:
+        data = b""
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("client closed")
+            data += chunk
+        return data
+
+    def handle(self):
+        started = time.perf_counter()
+        try:
+            username = self._handshake()
+        except (ConnectionError, OSError, struct.error):
+            return
+        network = self.server.network
+        _, (_, _, bad) = network.circuit_for(username)
+        target = self.server.ban_address if bad else self.server.site_address
+        try:
+            upstream = socket.create_connection(target)
+        except OSError:
+            self.request.sendall(b"\x05\x05\x00\x01" + b"\x00" * 6)
+            return
+        self.request.sendall(b"\x05\x00\x00\x01" + b"\x00" * 6)
+        self._relay(upstream)
+        network.record_latency(time.perf_counter() - started)
+
+    def _handshake(self) -> str:
+        version, n_methods = self._recv(2)
+        methods = self._recv(n_methods)
+        username = "anonymous"
+        if 2 in methods:
+            self.request.sendall(b"\x05\x02")
+            _, ulen = self._recv(2)
+            username = self._recv(ulen).decode()
+            (plen,) = self._recv(1)
+            self._recv(plen)
+            self.request.sendall(b"\x01\x00")
+        else:
+            self.request.sendall(b"\x05\x00")
+
+        _, command, _, address_type = self._recv(4)
+        if address_type == 3:
+            self._recv(self._recv(1)[0])  # socks5h: host name, resolved "inside Tor"
+        elif address_type == 1:
+            self._recv(4)
+        else:
+            self._recv(16)
+        self._recv(2)  # port
+        if command != 1:
+            raise ConnectionError("only CONNECT is supported")
+        return username
+
+    def _relay(self, upstream: socket.socket) -> None:
+        with selectors.DefaultSelector() as selector, upstream:
+            selector.register(self.request, selectors.EVENT_READ, upstream)
+            selector.register(upstream, selectors.EVENT_READ, self.request)
+            while True:
+                for key, _ in selector.select(timeout=30):
+                    data = key.fileobj.recv(65536)
+                    if not data:
+                        return
+                    key.data.sendall(data)
+
+
+class FakeTorSocks(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, network: FakeTorNetwork, site_address, ban_address):
+        super().__init__(("127.0.0.1", 0), SocksHandler)
+        self.network = network
+        self.site_address = site_address
+        self.ban_address = ban_address
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    server: "FakeTorControl"
+
+    def setup(self):
+        super().setup()
+        self.events: set[str] = set()
+        self._write_lock = threading.Lock()
+        self.server.network.control_connections.append(self)
+
+    def finish(self):
+        self.server.network.control_connections.remove(self)
+        super().finish()
+
+    def send(self, *lines: str) -> None:
+        with self._write_lock:
+            try:
+                self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+                self.wfile.flush()
+            except OSError:
+                pass
+
+    def handle(self):
+        network = self.server.network
+        for raw in self.rfile:
+            line = raw.decode().strip()
+            command, _, args = line.partition(" ")
+            command = command.upper()
+            if command == "PROTOCOLINFO":
+                self.send("250-PROTOCOLINFO 1", "250-AUTH METHODS=NULL", '250-VERSION Tor="0.4.8.12"', "250 OK")
+            elif command == "SIGNAL" and args.upper() == "NEWNYM":
+                network.signal_newnym()
+                self.send("250 OK")
+            elif command == "GETINFO":
+                self._getinfo(args.split())
+            elif command == "SETEVENTS":
+                self.events = {e for e in args.split() if e != "EXTENDED"}
+                self.send("250 OK")
+            elif command == "EXTENDCIRCUIT":
+                circuit_id = network.extend_circuit()
+                self.send(f"250 EXTENDED {circuit_id}")
+                if "CIRC" in self.events:
+                    self.send(f"650 CIRC {circuit_id} BUILT ${'A' * 40}~guard,${'B' * 40}~exit PURPOSE=GENERAL")
+            elif command == "SETCONF":
+                self._setconf(args)
+                self.send("250 OK")
+            elif command == "QUIT":
+                self.send("250 closing connection")
+                return
+            else:
+                self.send("250 OK")
+
+    def _getinfo(self, keys: list[str]) -> None:
+        network = self.server.network
+        values = {
+            "version": "0.4.8.12",
+            "status/bootstrap-phase": 'NOTICE BOOTSTRAP PROGRESS=100 TAG=done SUMMARY="Done"',
+            "status/circuit-established": "1",
+        }
+        lines = []
+        for key in keys:
+            if key == "circuit-status":
+                lines += ["250+circuit-status=", *network.circuit_status(), "."]
+            elif key in values:
+                lines.append(f"250-{key}={values[key]}")
+            else:
+                return self.send(f'552 Unrecognized key "{key}"')
+        self.send(*lines, "250 OK")
+
+    def _setconf(self, args: str) -> None:
+        key, _, value = args.partition("=")
+        if key == "ExcludeExitNodes":
+            with self.server.network.lock:
+                self.server.network.excluded = {fp.lstrip("$") for fp in value.strip('"').split(",") if fp}
+
+
+class FakeTorControl(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, network: FakeTorNetwork):
+        super().__init__(("127.0.0.1", 0), ControlHandler)
+        self.network = network
+
+
+# --- Runner ------------------------------------------------------------------------------------------------
+
+
+def _serve(server) -> None:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def percentile(samples: list[float], q: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run(
+    categories: int = 3,
+    articles_per_category: int = 20,
+    per_page: int = 10,
+    body_kb: int = 20,
+    latency: float = 0.02,
+    ban_rate: float = 0.05,
+    exits: int = 6,
+    bad_exits: int = 1,
+    concurrency: int = 8,
+    timeout: float = 300,
+    workdir: str | None = None,
+    seed: int = 0,
+) -> dict:
+    """Starts the stand-ins, crawls them with the real spider in a child process and returns the report."""
+    workdir = workdir or tempfile.mkdtemp(prefix="onet-loadtest-")
+    os.makedirs(workdir, exist_ok=True)
+    cert_path, key_path = make_certificate(workdir)
+    ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ssl_context.load_cert_chain(cert_path, key_path)
+
+    site = Site(categories, articles_per_category, per_page, body_kb)
+    stand_in = OnetStandIn(site, ssl_context, latency=latency, ban_rate=ban_rate, seed=seed)
+    ban_stand_in = OnetStandIn(site, ssl_context, latency=latency, ban_all=True, seed=seed)
+    network = FakeTorNetwork(exits, bad_exits, seed=seed)
+    socks = FakeTorSocks(network, stand_in.server_address, ban_stand_in.server_address)
+    control = FakeTorControl(network)
+    servers = [stand_in, ban_stand_in, socks, control]
+    for server in servers:
+        _serve(server)
+
+    overrides = {
+        "TOR_PROXY": f"socks5h://127.0.0.1:{socks.server_address[1]}",
+        "TOR_CONTROL_PORT": control.server_address[1],
+        "TOR_CA_BUNDLE": cert_path,
+        "TOR_CACHE_ENABLED": False,
+        "TOR_RETRY_BACKOFF_BASE": 0.05,
+        "TOR_BOOTSTRAP_TIMEOUT": 5,
+        "DOWNLOAD_DELAY": 0,
+        "CONCURRENT_REQUESTS": concurrency,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": concurrency,
+        "LOG_FILE": os.path.join(workdir, "scraper.log"),
+        "MEMORY_GUARD_ENABLED": False,
+        "TELNETCONSOLE_ENABLED": False,
+    }
+    stats_path = os.path.join(workdir, "stats.json")
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, SCRAPY_SETTINGS_MODULE="onet_scraper.settings", TOR_PASSWORD="")
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", json.dumps(overrides), stats_path],
+            cwd=workdir,
+            env=env,
+            check=True,
+            timeout=timeout,
+        )
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    with open(stats_path, encoding="utf-8") as f:
+        stats = json.load(f)
+    articles = 0
+    for name in os.listdir(workdir):
+        if name.startswith("data_") and name.endswith(".jsonl"):
+            with open(os.path.join(workdir, name), encoding="utf-8") as f:
+                articles += sum(1 for _ in f)
+
+    elapsed = stats.get("elapsed_time_seconds") or 0
+    p50, p99 = percentile(network.stream_latencies, 0.5), percentile(network.stream_latencies, 0.99)
+    return {
+        "articles_expected": site.total_articles,
+        "articles_saved": articles,
+        "elapsed_s": round(elapsed, 2),
+        "articles_per_min": round(articles / elapsed * 60, 1) if elapsed else 0.0,
+        "bans_served": stand_in.counters.get("bans", 0) + ban_stand_in.counters.get("bans", 0),
+        "bans_handled": stats.get("tor/failures", 0),
+        "retries_exhausted": stats.get("tor/retry_exhausted", 0),
+        "newnym": network.newnym,
+        "exits_excluded": len(network.excluded),
+        "streams": len(network.stream_latencies),
+        "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        "latency_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        "workdir": workdir,
+    }
+
+
+def _crawl_child(overrides_json: str, stats_path: str) -> None:
+    """Child process: one crawl with project settings + overrides, stats dumped as JSON."""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    settings.setdict(json.loads(overrides_json), priority="cmdline")
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler("onet")
+    process.crawl(crawler)
+    process.start()
+    with open(stats_path, "w", encoding="utf-8") as f:
+        json.dump(crawler.stats.get_stats(), f, default=str)
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "--child":
+        return _crawl_child(argv[1], argv[2])
+
+    parser = argparse.ArgumentParser(description="End-to-end crawl of a local Onet stand-in through a fake Tor.")
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--articles-per-category", type=int, default=40)
+    parser.add_argument("--per-page", type=int, default=10)
+    parser.add_argument("--body-kb", type=int, default=40, help="Padding per article paragraph")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean server latency in seconds")
+    parser.add_argument("--ban-rate", type=float, default=0.05, help="Share of requests answered with 403")
+    parser.add_argument("--exits", type=int, default=8)
+    parser.add_argument("--bad-exits", type=int, default=2, help="Exits whose requests are always banned")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workdir", help="Keep output, logs and stats here (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    report = run(
+        categories=args.categories,
+        articles_per_category=args.articles_per_category,
+        per_page=args.per_page,
+        body_kb=args.body_kb,
+        latency=args.latency,
+        ban_rate=args.ban_rate,
+        exits=args.exits,
+        bad_exits=args.bad_exits,
+        concurrency=args.concurrency,
+        workdir=args.workdir,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import pytest
+from harness import run
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_crawl_through_fake_tor_survives_bans(tmp_path):
+    """Small site through the stand-ins: every article saved despite 403s and a banned exit."""
+    report = run(
+        categories=2,
+        articles_per_category=12,
+        body_kb=5,
+        latency=0.01,
+        ban_rate=0.15,
+        exits=6,
+        bad_exits=1,
+        workdir=str(tmp_path),
+        timeout=120,
+    )
+    print(report)
+
+    assert report["articles_saved"] >= 0.95 * report["articles_expected"]
+    assert report["bans_served"] > 0
+    assert report["newnym"] > 0
+    assert report["latency_p99_ms"] is not None
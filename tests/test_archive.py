@@ -0,0 +1,115 @@
+import gzip
+import random
+
+import pytest
+
+from onet_scraper import archive as archive_module
+from onet_scraper.archive import ZLIB, ZSTD, PageArchive, main
+
+WORDS = "rząd sejm prezydent wybory gospodarka inflacja szpital szkoła minister ustawa policja sąd budżet".split()
+
+
+def onet_like_page(index: int, rng: random.Random) -> bytes:
+    """Shared head/navigation/footer (the same on every page) around a unique article."""
+    chrome = random.Random(0)
+    token = lambda: "".join(chrome.choice("abcdefghijklmnopqrstuvwxyz_0123456789") for _ in range(8))  # noqa: E731
+    head = "".join(f'<script src="https://ocdn.eu/static/{token()}.js"></script>' for _ in range(40))
+    inline = ";".join(f"var {token()}=function(){{return {token()}.{token()}()}}" for _ in range(150))
+    nav = "".join(
+        f'<a class="ods-c-nav__link" href="https://wiadomosci.onet.pl/{token()}">{token()}</a>' for _ in range(80)
+    )
+    text = "".join(f'<p class="hyphenate">{" ".join(rng.choice(WORDS) for _ in range(60))}.</p>' for _ in range(6))
+    return (
+        f'<!DOCTYPE html><html lang="pl"><head>{head}<script>{inline}</script></head><body><nav>{nav}</nav>'
+        f'<main><h1>Artykuł {index}</h1><meta name="data-story-id" content="id{index:06d}">{text}</main></body></html>'
+    ).encode("utf-8")
+
+
+@pytest.fixture
+def pages():
+    rng = random.Random(1)
+    return [onet_like_page(i, rng) for i in range(30)]
+
+
+def test_round_trip_across_dictionaries(tmp_path, pages):
+    path = str(tmp_path / "pages.sqlite")
+    store = PageArchive(path, sample_pages=10, retrain_every=10)
+
+    for i, body in enumerate(pages[:10]):
+        store.put(f"s{i}", f"https://wiadomosci.onet.pl/kraj/a/s{i}", body)
+    assert store.training_due()
+    first = store.retrain()
+    assert first is not None and not store.training_due()
+    for i, body in enumerate(pages[10:20], 10):
+        store.put(f"s{i}", f"https://wiadomosci.onet.pl/kraj/a/s{i}", body)
+    second = store.retrain()  # Periodic retraining: older pages keep their dictionary
+    store.put("s20", "https://wiadomosci.onet.pl/kraj/a/s20", pages[20])
+    store.close()
+
+    reopened = PageArchive(path)
+    assert len(reopened) == 21 and "s5" in reopened and "missing" not in reopened
+    assert reopened.get("s3") == ("https://wiadomosci.onet.pl/kraj/a/s3", pages[3])  # No dictionary
+    assert reopened.get("s15")[1] == pages[15]  # First dictionary
+    assert reopened.get("s20")[1] == pages[20]  # Second one
+    assert reopened.get("missing") is None
+    assert [story for story, _, _ in reopened.iter_pages()][:2] == ["s0", "s1"]
+    assert reopened.stats()["dictionaries"] == 2 and second == first + 1
+    reopened.close()
+
+
+def test_put_replaces_a_story(tmp_path, pages):
+    store = PageArchive(str(tmp_path / "pages.sqlite"))
+    store.put("abc", "https://wiadomosci.onet.pl/kraj/a/abc", pages[0])
+    store.put("abc", "https://wiadomosci.onet.pl/kraj/a/abc", pages[1])
+    assert len(store) == 1
+    assert store.get("abc")[1] == pages[1]
+    store.close()
+
+
+def test_dictionary_beats_gzip_on_shared_markup(tmp_path, pages):
+    store = PageArchive(str(tmp_path / "pages.sqlite"), sample_pages=20)
+    for i, body in enumerate(pages[:20]):
+        store.put(f"train{i}", "https://wiadomosci.onet.pl/kraj/a/x", body)
+    store.retrain()
+
+    stored = sum(store.put(f"s{i}", "https://wiadomosci.onet.pl/kraj/a/x", body) for i, body in enumerate(pages[20:]))
+    gzipped = sum(len(gzip.compress(body)) for body in pages[20:])
+    assert stored * 1.5 < gzipped
+    store.close()
+
+
+def test_failed_training_waits_for_new_samples(tmp_path):
+    store = PageArchive(str(tmp_path / "pages.sqlite"), sample_pages=2, codec=ZLIB)
+    store.put("a", "https://wiadomosci.onet.pl/kraj/a/a", b"<p>one</p>")
+    store.put("b", "https://wiadomosci.onet.pl/kraj/a/b", b"<p>two</p>")
+    assert store.training_due()
+    assert store.retrain() is None  # Nothing shared by the samples
+    assert not store.training_due()
+    store.close()
+
+
+def test_zstd_archive(tmp_path, pages):
+    pytest.importorskip("zstandard")
+    store = PageArchive(str(tmp_path / "pages.sqlite"), sample_pages=20, codec=ZSTD, dict_size=16 * 1024)
+    for i, body in enumerate(pages[:20]):
+        store.put(f"s{i}", "https://wiadomosci.onet.pl/kraj/a/x", body)
+    store.retrain()
+    store.put("new", "https://wiadomosci.onet.pl/kraj/a/new", pages[25])
+    assert store.get("new")[1] == pages[25]
+    store.close()
+
+
+def test_zstd_needs_zstandard(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_module, "zstandard", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        PageArchive(str(tmp_path / "pages.sqlite"), codec=ZSTD)
+
+
+def test_cli_get(tmp_path, pages, capsysbinary):
+    path = str(tmp_path / "pages.sqlite")
+    store = PageArchive(path)
+    store.put("abc", "https://wiadomosci.onet.pl/kraj/a/abc", pages[0])
+    store.close()
+
+    main([path, "get", "abc"])
+    assert capsysbinary.readouterr().out == pages[0]
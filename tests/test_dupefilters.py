@@ -0,0 +1,27 @@
+from scrapy.http import Request
+
+from onet_scraper.dupefilters import DiskDupeFilter
+from onet_scraper.fingerprinting import CanonicalRequestFingerprinter
+
+
+def test_request_seen_in_memory_database():
+    dupefilter = DiskDupeFilter(fingerprinter=CanonicalRequestFingerprinter())
+
+    assert dupefilter.request_seen(Request("https://wiadomosci.onet.pl/kraj/tytul/abc123")) is False
+    assert dupefilter.request_seen(Request("https://wiadomosci.onet.pl/kraj/tytul/abc123?utm_source=x")) is True
+    assert dupefilter.seen_count == 1
+    dupefilter.close("finished")
+
+
+def test_fingerprints_persist_in_jobdir(tmp_path):
+    request = Request("https://wiadomosci.onet.pl/kraj/tytul/abc123")
+    first_run = DiskDupeFilter(str(tmp_path), fingerprinter=CanonicalRequestFingerprinter())
+    first_run.request_seen(request)
+    first_run.close("shutdown")
+
+    second_run = DiskDupeFilter(str(tmp_path), fingerprinter=CanonicalRequestFingerprinter())
+
+    assert (tmp_path / "requests.seen.sqlite").exists()
+    assert second_run.seen_count == 1
+    assert second_run.request_seen(request) is True
+    second_run.close("finished")
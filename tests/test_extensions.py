@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import HtmlResponse, Request
+from scrapy.statscollectors import MemoryStatsCollector
+
+from onet_scraper.archive import ZLIB, PageArchive
+from onet_scraper.extensions import MB, CostReport, CrawlLoop, MemoryGuard, PageArchiver, Profiler
+from onet_scraper.utils.revisit import RevisitPolicy
+
+
+@pytest.fixture
+def crawler():
+    mock_crawler = MagicMock()
+    mock_crawler.stats = MemoryStatsCollector(mock_crawler)
+    return mock_crawler
+
+
+def test_memory_guard_pauses_and_resumes_discovery(crawler, mocker):
+    guard = MemoryGuard(crawler, pause_mb=500, resume_mb=400, interval=30)
+    spider = MagicMock(discovery_paused=False)
+    rss = mocker.patch("onet_scraper.extensions.current_rss", return_value=600 * MB)
+
+    guard.check(spider)
+    assert spider.discovery_paused is True
+    assert crawler.stats.get_value("memory/discovery_paused") == 1
+
+    rss.return_value = 450 * MB  # Between thresholds: stays paused (hysteresis)
+    guard.check(spider)
+    assert spider.discovery_paused is True
+
+    rss.return_value = 350 * MB
+    guard.check(spider)
+    assert spider.discovery_paused is False
+
+
+def test_memory_guard_reports_growth_per_100k_urls(crawler, mocker):
+    guard = MemoryGuard(crawler, pause_mb=500, resume_mb=400, interval=30)
+    guard.startup_rss = 100 * MB
+    crawler.stats.set_value("dupefilter/seen", 50_000)
+    mocker.patch("onet_scraper.extensions.current_rss", return_value=110 * MB)
+
+    report = guard.report()
+
+    assert report["growth_mb_per_100k_urls"] == pytest.approx(20.0)
+    assert crawler.stats.get_value("memory/growth_mb_per_100k_urls") == 20.0
+
+
+def test_crawl_loop_schedules_next_cycle_on_idle(crawler, mocker, tmp_path):
+    stats_file = tmp_path / "cycles.jsonl"
+    loop = CrawlLoop(crawler, interval=600, jitter=0, stats_file=str(stats_file), max_seeds=10)
+    mock_call_later = mocker.patch("onet_scraper.extensions.call_later")
+    spider = MagicMock(start_urls=["https://wiadomosci.onet.pl/"])
+
+    loop.spider_opened(spider)
+    crawler.stats.inc_value("item_scraped_count", 3)
+    with pytest.raises(DontCloseSpider):
+        loop.spider_idle(spider)
+    # Idle again while waiting: no second cycle is scheduled
+    with pytest.raises(DontCloseSpider):
+        loop.spider_idle(spider)
+
+    mock_call_later.assert_called_once_with(600, loop.start_cycle, spider)
+    record = json.loads(stats_file.read_text())
+    assert record["cycle"] == 1
+    assert record["stats"]["item_scraped_count"] == 3
+
+
+def test_crawl_loop_reseeds_start_and_category_urls(crawler):
+    loop = CrawlLoop(crawler, interval=600, jitter=0, stats_file=None, max_seeds=10)
+    spider = MagicMock(start_urls=["https://wiadomosci.onet.pl/"])
+    for url in ("https://wiadomosci.onet.pl/kraj", "https://wiadomosci.onet.pl/kraj/tytul/abc123"):
+        loop.response_received(HtmlResponse(url=url), None, spider)
+
+    loop.start_cycle(spider)
+
+    requests = [call.args[0] for call in crawler.engine.crawl.call_args_list]
+    assert [r.url for r in requests] == ["https://wiadomosci.onet.pl/", "https://wiadomosci.onet.pl/kraj"]
+    assert all(r.dont_filter and r.meta["dont_cache"] for r in requests)
+    assert loop.cycle == 1
+
+
+def test_crawl_loop_revisits_due_articles_with_previous_hash(crawler):
+    policy = RevisitPolicy(default_interval=600, min_interval=60)
+    loop = CrawlLoop(crawler, interval=600, jitter=0, stats_file=None, max_seeds=10, revisit=policy, revisit_budget=1)
+    spider = MagicMock(start_urls=[], parse_pool=None)
+    url = "https://wiadomosci.onet.pl/kraj/relacja/abc123"
+    response = HtmlResponse(url=url, request=Request(url))
+    item = {"url": url, "id": "abc123", "date": datetime.now().isoformat(), "content_hash": "h1"}
+    loop.item_scraped(item, response, spider)
+    policy.tracked["abc123"].last_fetch -= 3600
+
+    loop.start_cycle(spider)
+
+    request = crawler.engine.crawl.call_args.args[0]
+    assert request.url == url
+    assert request.dont_filter and request.meta["dont_cache"]
+    assert request.meta["revisit_hash"] == "h1"
+    assert request.callback == spider.parse_item
+    assert crawler.stats.get_value("revisit/scheduled") == 1
+
+    # The changed version comes back through item_scraped
+    loop.item_scraped(dict(item, content_hash="h2"), response.replace(request=request), spider)
+    assert crawler.stats.get_value("revisit/changed") == 1
+    assert policy.tracked["abc123"].unchanged == 0
+
+
+def test_profiler_samples_reactor_and_download_pool(crawler, mocker, tmp_path):
+    mocker.patch("onet_scraper.extensions.call_later")
+    profiler = Profiler(crawler, output_dir=str(tmp_path), duration=60, interval=0.001, mode="cprofile")
+    profiler.reactor_ident = threading.get_ident()
+    stop = threading.Event()
+
+    def busy_download():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_download, name="asyncio_0")
+    worker.start()
+    try:
+        assert profiler.start()
+        assert not profiler.start()  # One profile at a time
+        deadline = time.monotonic() + 5
+        while profiler.sampler.samples < 20 and time.monotonic() < deadline:
+            sum(range(1000))
+        paths = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert [os.path.splitext(p)[1] for p in paths] == [".collapsed", ".txt", ".prof"]
+    stacks = open(paths[0], encoding="utf-8").read().splitlines()
+    assert any(s.startswith("download-pool;") and "busy_download" in s for s in stacks)
+    assert any(s.startswith("reactor;") for s in stacks)
+    assert all(s.rsplit(" ", 1)[1].isdigit() for s in stacks)
+    table = open(paths[1], encoding="utf-8").read()
+    assert "self %" in table and "cProfile of the reactor thread" in table
+    assert crawler.stats.get_value("profile/runs") == 1
+
+
+def test_cost_report_settles_saved_items_and_writes_report(crawler, tmp_path):
+    report_file = tmp_path / "cost_report.jsonl"
+    ext = CostReport(crawler, report_file=str(report_file))
+    url = "https://wiadomosci.onet.pl/kraj/tytul/abc123"
+    cost = {"rule": "articles", "bytes": 2000, "download_s": 1.5, "cpu_s": 0.01}
+    response = HtmlResponse(url, body=b"", request=Request(url, meta={"cost": cost}))
+
+    ext.item_scraped({"url": url}, response, None)
+    ext.item_scraped({"url": url}, response, None)  # Second item of the same page: already charged
+    ext.item_dropped({"url": url}, None, Exception("no response"), None)
+    crawler.stats.inc_value("cost/categories/followed/pages")
+    crawler.stats.inc_value("cost/categories/followed/bytes", 1000)
+    report = ext.spider_closed(None, "finished")
+
+    assert crawler.stats.get_value("cost/articles/saved/pages") == 1
+    assert report["per_saved"]["bytes"] == 3000
+    assert crawler.stats.get_value("cost_per_saved/bytes") == 3000
+    record = json.loads(report_file.read_text(encoding="utf-8"))
+    assert record["reason"] == "finished"
+    assert record["rules"]["articles"]["saved"]["bytes"] == 2000
+
+
+def test_page_archiver_stores_articles_and_trains(crawler, tmp_path, mocker):
+    archive = PageArchive(str(tmp_path / "pages.sqlite"), sample_pages=2, codec=ZLIB)  # zstd wants more samples
+    ext = PageArchiver(crawler, archive)
+    start_training = mocker.patch.object(ext, "start_training")
+    shared = b"<html><head><script>var onet_config = {shared: true};</script></head><body>" * 20
+
+    for story in ("abc1", "abc2"):
+        url = f"https://wiadomosci.onet.pl/kraj/tytul/{story}"
+        ext.response_received(HtmlResponse(url, body=shared + story.encode()), None, None)
+    listing = HtmlResponse("https://wiadomosci.onet.pl/kraj", body=shared)
+    ext.response_received(listing, None, None)  # Not an article
+    cached = HtmlResponse("https://wiadomosci.onet.pl/kraj/tytul/abc3", body=shared, flags=["cached"])
+    ext.response_received(cached, None, None)
+    ext.flush()
+
+    assert len(archive) == 2
+    assert crawler.stats.get_value("archive/pages") == 2
+    assert crawler.stats.get_value("archive/bytes_stored") < crawler.stats.get_value("archive/bytes_raw")
+    start_training.assert_called_once()
+
+    ext.queue.put(("dictionary", archive.train(list(archive.samples)), 2))
+    ext.flush()
+    assert crawler.stats.get_value("archive/dictionaries") == 1
+    ext.spider_closed(None, "finished")
@@ -0,0 +1,28 @@
+from scrapy.http import Request
+
+from onet_scraper.fingerprinting import CanonicalRequestFingerprinter
+
+
+def test_fingerprint_collapses_story_variants():
+    fingerprinter = CanonicalRequestFingerprinter()
+    variants = [
+        "https://wiadomosci.onet.pl/kraj/tytul/abc123",
+        "https://wiadomosci.onet.pl/kraj/tytul/abc123?utm_source=onet&srcc=ucs",
+        "https://m.wiadomosci.onet.pl/kraj/tytul/abc123/amp",
+        "https://www.onet.pl/informacje/onetwiadomosci/tytul/abc123,79cfc278",
+    ]
+
+    fingerprints = {fingerprinter.fingerprint(Request(url)) for url in variants}
+
+    assert len(fingerprints) == 1
+
+
+def test_fingerprint_distinguishes_stories_and_methods():
+    fingerprinter = CanonicalRequestFingerprinter()
+
+    first = fingerprinter.fingerprint(Request("https://wiadomosci.onet.pl/kraj/tytul/abc123"))
+    other = fingerprinter.fingerprint(Request("https://wiadomosci.onet.pl/kraj/tytul/xyz789"))
+    post = fingerprinter.fingerprint(Request("https://wiadomosci.onet.pl/kraj/tytul/abc123", method="POST"))
+
+    assert first != other
+    assert first != post
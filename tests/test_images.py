@@ -0,0 +1,147 @@
+import asyncio
+import http.server
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from unittest.mock import MagicMock
+
+import pytest
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+
+from onet_scraper.images import ImageStore, image_size
+from onet_scraper.pipelines import ImagePipeline, images_proxy
+
+
+def png(width, height):
+    """Minimal valid 8-bit grayscale PNG."""
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def test_image_size_from_headers():
+    assert image_size(png(64, 48)) == ("png", 64, 48)
+    assert image_size(b"GIF89a" + struct.pack("<HH", 10, 20) + b"\x00" * 8) == ("gif", 10, 20)
+
+    jpeg = (
+        b"\xff\xd8"
+        + b"\xff\xe0"
+        + struct.pack(">H", 16)
+        + b"JFIF\x00" * 2
+        + b"\x00\x00\x00\x00"
+        + b"\xff\xc0"
+        + struct.pack(">HBHH", 17, 8, 1080, 1920)
+    )
+    assert image_size(jpeg) == ("jpeg", 1920, 1080)
+
+    vp8x = b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8 + (799).to_bytes(3, "little") + (599).to_bytes(3, "little")
+    assert image_size(vp8x) == ("webp", 800, 600)
+
+    assert image_size(b"<html>not an image</html>") is None
+    assert image_size(b"\x89PNG\r\n\x1a\n\x00") is None
+
+
+def test_image_store_lookup_by_url_and_hash(tmp_path):
+    store = ImageStore(str(tmp_path))
+    store.put({"url": "https://ocdn.eu/a.jpg", "status": 200, "sha1": "ab12", "width": 10, "height": 5})
+    store.put({"url": "https://ocdn.eu/missing.jpg", "status": 404})
+    store.close()
+
+    store = ImageStore(str(tmp_path))
+    assert store.get("https://ocdn.eu/a.jpg")["width"] == 10
+    assert store.by_hash("ab12")["url"] == "https://ocdn.eu/a.jpg"
+    assert store.get("https://ocdn.eu/missing.jpg")["status"] == 404
+    assert store.get("https://ocdn.eu/other.jpg") is None
+    assert store.thumbnail_path("ab12") == "thumbs/ab/ab12.jpg"
+
+
+@pytest.fixture
+def image_server():
+    """Local image host: two URLs with identical bytes, a 404, a 503 and an oversized image; counts downloads."""
+    image = png(40, 30)
+    downloads = Counter()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            downloads[self.path] += 1
+            time.sleep(0.05)  # Overlapping requests for the same URL
+            body = {"/a.png": image, "/copy-of-a.png": image, "/big.png": image * 200}.get(self.path)
+            self.send_response(200 if body else 503 if self.path == "/busy.png" else 404)
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", downloads
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_image_pipeline_fetches_each_image_once(image_server, tmp_path):
+    base, downloads = image_server
+    stats = MemoryStatsCollector(MagicMock())
+    pipeline = ImagePipeline(str(tmp_path), concurrency=4, max_bytes=5_000, stats=stats)
+    await pipeline.open_spider()
+    writers = []
+    put = pipeline.store.put
+    pipeline.store.put = lambda record: writers.append(threading.current_thread()) or put(record)
+    urls = ["/a.png", "/a.png", "/copy-of-a.png", "/missing.png", "/big.png"]
+    items = await asyncio.gather(*(pipeline.process_item({"image_url": base + url}) for url in urls))
+    await pipeline.close_spider()
+
+    # SQLite writes happen in worker threads, not on the event loop
+    assert len(writers) == 4 and threading.main_thread() not in writers
+
+    assert items[0]["image_width"] == 40 and items[0]["image_height"] == 30
+    assert items[1]["image_hash"] == items[2]["image_hash"] == items[0]["image_hash"]
+    assert "image_width" not in items[3] and "image_width" not in items[4]
+    assert downloads["/a.png"] == 1  # concurrent items shared one download
+    assert stats.get_value("images/too_large") == 1
+    assert stats.get_value("images/status_404") == 1
+
+    # Next run: everything comes from the persistent cache, including the failures
+    pipeline = ImagePipeline(str(tmp_path), stats=stats)
+    await pipeline.open_spider()
+    item = await pipeline.process_item({"image_url": base + "/copy-of-a.png"})
+    await pipeline.process_item({"image_url": base + "/missing.png"})
+    await pipeline.close_spider()
+
+    assert item["image_width"] == 40
+    assert sum(downloads.values()) == 4
+    assert stats.get_value("images/cache_hits") == 2
+
+
+@pytest.mark.asyncio
+async def test_image_pipeline_retries_temporary_failures(image_server, tmp_path):
+    base, downloads = image_server
+    stats = MemoryStatsCollector(MagicMock())
+    pipeline = ImagePipeline(str(tmp_path), stats=stats)
+    await pipeline.open_spider()
+    first = await pipeline.process_item({"image_url": base + "/busy.png"})
+    second = await pipeline.process_item({"image_url": base + "/busy.png"})
+    await pipeline.close_spider()
+
+    assert "image_width" not in first and "image_width" not in second
+    assert downloads["/busy.png"] == 2  # Not cached: the second item fetched it again
+    assert ImageStore(str(tmp_path)).get(base + "/busy.png") is None
+    assert stats.get_value("images/status_503") == 2
+
+
+def test_images_go_through_tor_unless_direct():
+    settings = Settings({"TOR_PROXY": "socks5://127.0.0.1:9050"})
+    assert images_proxy(settings) == "socks5://127.0.0.1:9050"
+    settings.set("TOR_SUPERVISOR_ENABLED", True)
+    assert images_proxy(settings) == "socks5://127.0.0.1:9060"
+    settings.set("IMAGES_PROXY", "direct")
+    assert images_proxy(settings) is None
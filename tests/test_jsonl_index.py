@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from onet_scraper.jsonl_index import INDEX_SUFFIX, IndexWriter, JsonlReader, build_index, index_key, main
+from onet_scraper.pipelines import JsonWriterPipeline
+
+
+def make_items():
+    return [
+        {"id": "a1", "url": "https://wiadomosci.onet.pl/kraj/a/a1", "date": "2026-10-01", "title": "Zażółć gęślą"},
+        {"id": "b2", "url": "https://wiadomosci.onet.pl/kraj/b/b2", "date": "2026-10-03", "title": "Drugi"},
+        {"id": "c3", "url": "https://wiadomosci.onet.pl/swiat/c/c3", "date": "2026-10-05", "title": "Trzeci"},
+        {"id": "a1", "url": "https://wiadomosci.onet.pl/kraj/a/a1", "date": "2026-10-01", "title": "Zażółć v2"},
+    ]
+
+
+@pytest.fixture
+def written(tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    pipeline = JsonWriterPipeline(index=True)
+    spider = mocker.MagicMock()
+    pipeline.open_spider(spider)
+    for item in make_items():
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+    return str(tmp_path / pipeline.filename)
+
+
+def test_pipeline_index_gives_random_access(written):
+    with JsonlReader(written) as reader:
+        assert len(reader) == 4
+        assert reader.get("b2")["title"] == "Drugi"
+        assert reader.get("a1")["title"] == "Zażółć v2"  # Latest version of a revisited article
+        assert reader.by_url("https://wiadomosci.onet.pl/swiat/c/c3")["id"] == "c3"
+        assert reader.get("missing") is None
+        assert [r["id"] for r in reader.iter_date_range("2026-10-02", "2026-10-05")] == ["b2", "c3"]
+        assert [r["id"] for r in reader.iter_date_range(end="2026-10-01")] == ["a1", "a1"]
+        assert [r["id"] for r in reader.iter_date_range("2026-10")] == ["a1", "b2", "c3", "a1"]
+        assert [r["title"] for r in reader] == [item["title"] for item in make_items()]
+
+
+def test_build_index_matches_written_index(written, tmp_path):
+    rebuilt = build_index(written, str(tmp_path / "rebuilt.idx"))
+    with JsonlReader(written) as written_reader, JsonlReader(written, rebuilt) as rebuilt_reader:
+        assert list(rebuilt_reader.entries()) == list(written_reader.entries())
+
+
+def test_reader_builds_a_missing_index(tmp_path):
+    path = tmp_path / "old.jsonl"
+    path.write_text("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in make_items()), encoding="utf-8")
+    with JsonlReader(str(path)) as reader:
+        assert reader.get("c3")["date"] == "2026-10-05"
+    assert (tmp_path / f"old.jsonl{INDEX_SUFFIX}").exists()
+
+
+def test_rows_past_the_data_are_ignored(tmp_path):
+    # A file still being written: the last index row is ahead of the flushed data, the next one is half written
+    path = tmp_path / "live.jsonl"
+    lines = [json.dumps(item, ensure_ascii=False) + "\n" for item in make_items()[:2]]
+    writer = IndexWriter(str(path) + INDEX_SUFFIX)
+    for line, item in zip(lines, make_items()):
+        writer.add(line, index_key(item))
+    writer.file.write("999\t10\t2026")
+    writer.close()
+    path.write_text(lines[0], encoding="utf-8")
+
+    with JsonlReader(str(path)) as reader:
+        assert [entry.id for entry in reader.entries()] == ["a1"]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    with JsonlReader(str(path)) as reader:
+        assert len(reader) == 0
+        assert reader.get("a1") is None
+
+
+def test_cli_range(written, capsys):
+    main([written, "range", "2026-10-03"])
+    out = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["id"] for line in out] == ["b2", "c3"]
+
+
+def test_indexed_lookups_match_a_full_scan(tmp_path, monkeypatch, mocker):
+    # The shape of tests/benchmarks/test_bench_jsonl_index.py, small enough for every run
+    monkeypatch.chdir(tmp_path)
+    pipeline = JsonWriterPipeline(index=True)
+    spider = mocker.MagicMock()
+    pipeline.open_spider(spider)
+    items = [
+        {
+            "id": f"id{i:04d}",
+            "url": f"https://wiadomosci.onet.pl/kraj/a-{i}/id{i:04d}",
+            "date": f"2026-{1 + i // 50:02d}-01",
+        }
+        for i in range(300)
+    ]
+    for item in items:
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+
+    with JsonlReader(str(tmp_path / pipeline.filename)) as reader:
+        assert [reader.get(item["id"]) for item in items[::37]] == items[::37]
+        assert list(reader.iter_date_range("2026-03-01", "2026-03-31")) == [
+            i for i in items if i["date"] == "2026-03-01"
+        ]
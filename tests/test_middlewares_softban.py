@@ -8,7 +8,7 @@ from onet_scraper.middlewares import TorMiddleware
 
 @pytest.fixture
 def middleware():
-    return TorMiddleware(control_port=9051)
+    return TorMiddleware(control_port=9051, retry_backoff_base=0)
 
 
 @pytest.fixture
@@ -1,8 +1,20 @@
+import asyncio
 import json
+import queue
+import threading
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request
+from scrapy.settings import Settings
+from scrapy.signalmanager import SignalManager
+from scrapy.statscollectors import MemoryStatsCollector
 
-from onet_scraper.pipelines import JsonWriterPipeline
+from onet_scraper.jsonl_index import JsonlReader
+from onet_scraper.middlewares import TorMiddleware
+from onet_scraper.pipelines import JsonWriterPipeline, StreamPipeline
+from onet_scraper.spiders.onet import OnetSpider
 
 
 @pytest.fixture
@@ -53,3 +65,134 @@ def test_close_spider_closes_file(pipeline, spider, mocker):
     pipeline.close_spider(spider)
 
     mock_file.close.assert_called_once()
+
+
+@pytest.fixture
+def crawler(mocker):
+    crawler = mocker.MagicMock()
+    crawler.stats = MemoryStatsCollector(mocker.MagicMock())
+    return crawler
+
+
+@pytest.mark.asyncio
+async def test_writer_thread_writes_all_items(spider, crawler, tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    # The periodic stats task needs a running reactor
+    mocker.patch("onet_scraper.pipelines.create_looping_call")
+    pipeline = JsonWriterPipeline(queue_size=10, crawler=crawler, stats_interval=60)
+    pipeline.open_spider(spider)
+
+    items = [{"title": f"Title {i}", "url": f"http://test.com/{i}"} for i in range(50)]
+    for item in items:
+        result = pipeline.process_item(item, spider)
+        assert await result == item
+
+    pipeline.close_spider(spider)
+
+    lines = (tmp_path / pipeline.filename).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == items
+    assert crawler.stats.get_value("pipeline/items_written") == 50
+    assert crawler.stats.get_value("pipeline/write_latency_p99_ms") is not None
+
+
+@pytest.mark.asyncio
+async def test_writer_thread_writes_the_index(spider, crawler, tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    mocker.patch("onet_scraper.pipelines.create_looping_call")
+    pipeline = JsonWriterPipeline(queue_size=10, crawler=crawler, stats_interval=60, index=True)
+    pipeline.open_spider(spider)
+
+    for i in range(30):
+        await pipeline.process_item({"id": f"id{i}", "url": f"http://test.com/{i}", "date": "2026-10-19"}, spider)
+    pipeline.close_spider(spider)
+
+    with JsonlReader(str(tmp_path / pipeline.filename)) as reader:
+        assert len(reader) == 30
+        assert reader.get("id17")["url"] == "http://test.com/17"
+
+
+def project_crawler(tmp_path):
+    """Crawler with settings.py and the spider's custom_settings; Tor downloads are answered locally."""
+    settings = Settings()
+    settings.setmodule("onet_scraper.settings", priority="project")
+    settings.setdict(OnetSpider.custom_settings, priority="spider")
+    settings.set("TOR_CACHE_DIR", str(tmp_path / "tor_cache"))
+    settings.set("TOR_WARMUP_ENABLED", False)
+    settings.set("TOR_EXIT_TRACKING_ENABLED", False)
+    settings.set("TOR_SUPERVISOR_ENABLED", False)
+    crawler = MagicMock()
+    crawler.settings = settings
+    crawler.stats = MemoryStatsCollector(crawler)
+    crawler.signals = SignalManager()
+    return crawler
+
+
+@pytest.mark.asyncio
+async def test_backpressure_holds_tor_downloads_until_storage_catches_up(spider, tmp_path):
+    crawler = project_crawler(tmp_path)
+    assert crawler.settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN") == 1
+    middleware = TorMiddleware.from_crawler(crawler)
+    page = (200, b"<html></html>", "https://wiadomosci.onet.pl/kraj/tytul/abc123", {})
+    middleware._download = AsyncMock(return_value=(page, None))
+    pipeline = JsonWriterPipeline.from_crawler(crawler)
+    pipeline.queue = queue.Queue(maxsize=pipeline.queue_size)
+    for i in range(int(pipeline.queue_size * pipeline.high_watermark)):
+        pipeline.queue.put((f"line {i}\n", None, 0.0))
+
+    pipeline.check_backpressure()
+    request = Request("https://wiadomosci.onet.pl/kraj/tytul/abc123")
+    pending = asyncio.ensure_future(middleware.process_request(request, spider))
+    await asyncio.sleep(0.1)
+    assert not pending.done()
+    middleware._download.assert_not_called()
+
+    # Still above the low watermark: stays paused
+    while pipeline.queue.qsize() > pipeline.queue_size * 0.5:
+        pipeline.queue.get()
+    pipeline.check_backpressure()
+    await asyncio.sleep(0.1)
+    assert not pending.done()
+
+    while pipeline.queue.qsize() > pipeline.queue_size * pipeline.low_watermark:
+        pipeline.queue.get()
+    pipeline.check_backpressure()
+    assert (await asyncio.wait_for(pending, 1)).status == 200
+    assert crawler.stats.get_value("pipeline/backpressure_pauses") == 1
+    assert crawler.stats.get_value("pipeline/queue_depth_max") == 800
+
+
+@pytest.mark.asyncio
+async def test_full_queue_holds_item_until_writer_drains_it(spider, crawler):
+    pipeline = JsonWriterPipeline(queue_size=4, crawler=crawler, low_watermark=0.5)
+    pipeline.file = MagicMock()
+    pipeline.queue = queue.Queue(maxsize=4)
+    for i in range(4):
+        pipeline.queue.put((f"waiting {i}\n", None, 0.0))
+
+    pending = asyncio.ensure_future(pipeline.process_item({"title": "T", "url": "http://test.com"}, spider))
+    await asyncio.sleep(0.1)
+    assert not pending.done()
+
+    # One free place is not enough: woken only below the low watermark
+    pipeline.queue.get()
+    pipeline._notify_room()
+    await asyncio.sleep(0.1)
+    assert not pending.done()
+
+    pipeline.queue.get()
+    threading.Thread(target=pipeline._notify_room).start()
+    assert (await asyncio.wait_for(pending, 1))["title"] == "T"
+    assert pipeline.queue.qsize() == 3
+
+
+def test_stream_pipeline_publishes_items(crawler, spider):
+    crawler.settings = Settings({"STREAM_ENABLED": False})
+    with pytest.raises(NotConfigured):
+        StreamPipeline.from_crawler(crawler)
+
+    crawler.settings.set("STREAM_ENABLED", True)
+    pipeline = StreamPipeline.from_crawler(crawler)
+    item = {"url": "https://wiadomosci.onet.pl/kraj/a/1"}
+
+    assert pipeline.process_item(item, spider) is item
+    assert pipeline.stream.replay[0] == (0, json.dumps(item))
@@ -0,0 +1,114 @@
+import json
+import os
+import pickle
+import tarfile
+import time
+import zipfile
+
+import pytest
+
+from onet_scraper import reextract
+
+
+def article_html(title: str, date: str, canonical: str | None = None) -> bytes:
+    canonical_link = f'<link rel="canonical" href="{canonical}">' if canonical else ""
+    return f"""
+    <html>
+        <head>{canonical_link}<meta name="data-story-id" content="id-{title}"></head>
+        <body>
+            <h1>{title}</h1>
+            <span class="ods-m-date-authorship__publication">{date} 10:00</span>
+            <p class="hyphenate">Treść artykułu, wystarczająco długa żeby przejść przez filtry.</p>
+        </body>
+    </html>
+    """.encode("utf-8")
+
+
+@pytest.fixture
+def stored_pages(tmp_path):
+    pages = tmp_path / "pages"
+    (pages / "kraj").mkdir(parents=True)
+    (pages / "kraj" / "one.html").write_bytes(
+        article_html("One", "2020-01-01", canonical="https://wiadomosci.onet.pl/kraj/one/abc1")
+    )
+    # No canonical link: URL from --base-url + path
+    (pages / "kraj" / "two.html").write_bytes(article_html("Two", "2020-01-02"))
+    (pages / "notes.txt").write_text("not a page")
+
+    # Tor response cache entry (stored_at, (status, body, final_url, headers))
+    cache_entry = (
+        time.time(),
+        (200, article_html("Three", "2020-01-03"), "https://wiadomosci.onet.pl/kraj/t/abc3", {}),
+    )
+    with open(pages / "0123.pickle", "wb") as f:
+        pickle.dump(cache_entry, f)
+
+    archive = tmp_path / "pages.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("swiat/four.html", article_html("Four", "2020-01-04", "https://wiadomosci.onet.pl/swiat/f/abc4"))
+
+    tar_path = tmp_path / "pages.tar.gz"
+    html_path = tmp_path / "five.html"
+    html_path.write_bytes(article_html("Five", "2020-01-05", "https://wiadomosci.onet.pl/swiat/p/abc5"))
+    with tarfile.open(tar_path, "w:gz") as tf:
+        tf.add(html_path, arcname="swiat/five.html")
+
+    return [str(pages), str(archive), str(tar_path)]
+
+
+def test_iter_pages_reads_directories_and_archives(stored_pages):
+    names = sorted(name for name, _, _ in reextract.iter_pages(stored_pages))
+    assert len(names) == 5
+    assert "swiat/four.html" in names
+    assert "swiat/five.html" in names
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_writes_items_without_freshness_check(stored_pages, tmp_path, workers):
+    output = tmp_path / "items.jsonl"
+
+    report = reextract.run(
+        stored_pages, str(output), workers=workers, base_url="https://wiadomosci.onet.pl", chunksize=1
+    )
+
+    items = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert report["pages"] == 5
+    assert report["statuses"] == {"ok": 5}
+    assert report["pages_per_second"] > 0
+    assert sorted(item["title"] for item in items) == ["Five", "Four", "One", "Three", "Two"]
+    urls = {item["title"]: item["url"] for item in items}
+    assert urls["One"] == "https://wiadomosci.onet.pl/kraj/one/abc1"
+    assert urls["Two"] == "https://wiadomosci.onet.pl/kraj/two"
+    assert urls["Three"] == "https://wiadomosci.onet.pl/kraj/t/abc3"
+
+
+def test_days_limit_applies_spider_freshness_check(stored_pages, tmp_path):
+    report = reextract.run(
+        stored_pages,
+        os.fspath(tmp_path / "items.jsonl"),
+        workers=1,
+        days_limit=3,
+        base_url="https://wiadomosci.onet.pl",
+    )
+    assert report["statuses"] == {"stale": 5}
+
+
+def test_page_without_url_is_reported(tmp_path):
+    (tmp_path / "orphan.html").write_bytes(article_html("Orphan", "2020-01-01"))
+    report = reextract.run([str(tmp_path)], str(tmp_path / "out.jsonl"), workers=1)
+    assert report["statuses"] == {"no_url": 1}
+
+
+def test_page_archive_input(tmp_path):
+    from onet_scraper.archive import PageArchive
+
+    path = str(tmp_path / "pages.sqlite")
+    store = PageArchive(path)
+    store.put("abc5", "https://wiadomosci.onet.pl/kraj/f/abc5", article_html("Five", "2020-01-05"))
+    store.close()
+
+    report = reextract.run([path], str(tmp_path / "out.jsonl"), workers=1)
+
+    assert report["statuses"] == {"ok": 1}
+    item = json.loads((tmp_path / "out.jsonl").read_text(encoding="utf-8"))
+    assert item["url"] == "https://wiadomosci.onet.pl/kraj/f/abc5"
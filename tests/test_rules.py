@@ -85,3 +85,34 @@ def test_rules_deny_patterns():
     for url in denied_urls:
         # Assert that NONE of the denied URLs were extracted
         assert url not in extracted_urls, f"Should NOT extract denied URL: {url}"
+
+
+def test_rules_canonicalize_extracted_links():
+    spider = OnetSpider()
+    article_rule = next(r for r in spider._rules if r.callback == spider.parse_item)
+
+    link_html = (
+        '<a href="https://wiadomosci.onet.pl/kraj/tytul-artykulu/xyz123?utm_source=fb" '
+        'class="ods-c-card-wrapper">Link</a>'
+    )
+    response = HtmlResponse(
+        url="https://wiadomosci.onet.pl/", body=f"<html><body>{link_html}</body></html>".encode("utf-8")
+    )
+
+    links = article_rule.process_links(article_rule.link_extractor.extract_links(response))
+
+    assert [link.url for link in links] == ["https://wiadomosci.onet.pl/kraj/tytul-artykulu/xyz123"]
+
+
+def test_discovery_links_dropped_while_paused():
+    spider = OnetSpider()
+    category_rule = next(r for r in spider._rules if r.process_links == spider.discovery_links)
+    response = HtmlResponse(
+        url="https://wiadomosci.onet.pl/",
+        body=b'<html><body><a href="https://wiadomosci.onet.pl/kraj">Kraj</a></body></html>',
+    )
+    links = category_rule.link_extractor.extract_links(response)
+
+    assert category_rule.process_links(list(links)) != []
+    spider.discovery_paused = True
+    assert category_rule.process_links(list(links)) == []
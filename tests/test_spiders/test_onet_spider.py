@@ -1,7 +1,9 @@
 from datetime import datetime
+from unittest.mock import MagicMock
 
 import pytest
 from scrapy.http import HtmlResponse, Request
+from scrapy.statscollectors import MemoryStatsCollector
 
 from onet_scraper.spiders.onet import OnetSpider
 
@@ -275,3 +277,43 @@ def test_parse_item_deep_fallbacks(spider):
 
     assert item["author"] == "Deep Author"
     assert item["date"] == today_date
+
+
+def test_parse_item_drops_unchanged_revisit(spider):
+    content = '<p class="hyphenate">Live coverage paragraph long enough to be kept by the cleaners.</p>'
+    response = create_mock_response(
+        url="https://wiadomosci.onet.pl/kraj/relacja/live123", title="Relacja", date=None, content=content
+    )
+    first = list(spider.parse_item(response))[0]
+
+    revisit = response.replace(
+        request=Request(response.url, meta={"revisit": True, "revisit_hash": first["content_hash"]})
+    )
+    assert list(spider.parse_item(revisit)) == []
+
+    changed = response.replace(request=Request(response.url, meta={"revisit": True, "revisit_hash": "stale-hash"}))
+    assert len(list(spider.parse_item(changed))) == 1
+
+
+def test_parse_costs_are_settled_by_outcome(spider):
+    spider.crawler = MagicMock()
+    stats = spider.crawler.stats = MemoryStatsCollector(spider.crawler)
+    stale = create_mock_response(
+        url="https://wiadomosci.onet.pl/kraj/stare/old123", title="Old", date="2020-01-01", content="<p>Old</p>"
+    )
+    cost = {"rule": "articles", "bytes": 500, "download_s": 1.0, "cpu_s": 0.0}
+    stale = stale.replace(request=Request(stale.url, meta={"rule": 1, "cost": cost}))
+    assert list(spider.parse_item(stale)) == []
+    assert stats.get_value("cost/articles/stale/bytes") == 500
+    assert stats.get_value("cost/articles/stale/pages") == 1
+
+    listing = HtmlResponse(
+        url="https://wiadomosci.onet.pl/kraj",
+        body=b'<div class="ods-c-card-wrapper"><a href="/kraj/tytul/abc123">A</a></div>',
+        encoding="utf-8",
+        request=Request("https://wiadomosci.onet.pl/kraj", meta={"rule": 2}),
+    )
+    requests = list(spider._requests_to_follow(listing))
+    assert [r.meta["rule"] for r in requests if r is not None] == [1]
+    assert stats.get_value("cost/categories/followed/pages") == 1
+    assert "cost" not in listing.meta
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Heavy dependencies that must only load on first use (import time budgets: tests/benchmarks/test_bench_startup.py)
+DEFERRED_MODULES = ("curl_cffi", "stem", "onet_scraper.items", "concurrent.futures.process")
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    code = (
+        "import sys, onet_scraper.settings, onet_scraper.spiders.onet, onet_scraper.middlewares; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=PROJECT_ROOT, check=True)
+
+    assert result.stdout.strip() == ""
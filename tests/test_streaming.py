@@ -0,0 +1,105 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from scrapy.statscollectors import MemoryStatsCollector
+
+from onet_scraper.streaming import DROP_OLDEST, ItemStream
+
+
+@pytest.fixture
+def stats():
+    return MemoryStatsCollector(MagicMock())
+
+
+async def subscribe(stream, target="/items", headers=""):
+    host, port = stream.bound_address().rsplit(":", 1)
+    reader, writer = await asyncio.open_connection(host, int(port))
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    status = await reader.readline()
+    assert b"200" in status
+    while await reader.readline() != b"\r\n":
+        pass
+    # Let the handler register the subscriber
+    for _ in range(50):
+        if stream.subscribers:
+            break
+        await asyncio.sleep(0.01)
+    return reader, writer
+
+
+async def read_lines(reader, count):
+    return [json.loads(await asyncio.wait_for(reader.readline(), timeout=2)) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_live_items_and_resume_from_offset(stats):
+    stream = ItemStream(address="127.0.0.1:0", stats=stats)
+    await stream.start()
+    try:
+        reader, writer = await subscribe(stream)
+        for i in range(3):
+            stream.publish({"url": f"https://wiadomosci.onet.pl/kraj/a/{i}"})
+        lines = await read_lines(reader, 3)
+        assert [line["offset"] for line in lines] == [0, 1, 2]
+        assert lines[2]["item"]["url"].endswith("/2")
+        writer.close()
+
+        # Reconnect after offset 0: replayed 1-2, then live 3
+        reader, writer = await subscribe(stream, "/items?offset=1")
+        stream.publish({"url": "https://wiadomosci.onet.pl/kraj/a/3"})
+        assert [line["offset"] for line in await read_lines(reader, 3)] == [1, 2, 3]
+        writer.close()
+    finally:
+        await stream.stop()
+    assert stats.get_value("stream/published") == 4
+
+
+@pytest.mark.asyncio
+async def test_sse_resumes_after_last_event_id(stats):
+    stream = ItemStream(address="127.0.0.1:0", stats=stats)
+    await stream.start()
+    try:
+        for i in range(3):
+            stream.publish({"id": i})
+        reader, writer = await subscribe(stream, headers="Accept: text/event-stream\r\nLast-Event-ID: 0\r\n")
+        frames = [await asyncio.wait_for(reader.readline(), timeout=2) for _ in range(6)]
+        assert frames[:3] == [b"id: 1\n", b'data: {"id": 1}\n', b"\n"]
+        assert frames[3] == b"id: 2\n"
+        writer.close()
+    finally:
+        await stream.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_disconnected(stats):
+    stream = ItemStream(address="127.0.0.1:0", buffer_size=2, stats=stats)
+    await stream.start()
+    try:
+        reader, writer = await subscribe(stream)
+        # Published without yielding to the loop: the subscriber's buffer overflows
+        for i in range(5):
+            stream.publish({"id": i})
+        assert stats.get_value("stream/disconnected") == 1
+        assert not stream.subscribers
+        data = await asyncio.wait_for(reader.read(), timeout=2)  # Closed by the server
+        assert data.count(b"\n") <= 2
+        writer.close()
+    finally:
+        await stream.stop()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_newest_items(stats):
+    stream = ItemStream(address="127.0.0.1:0", buffer_size=2, slow_consumer=DROP_OLDEST, stats=stats)
+    await stream.start()
+    try:
+        reader, writer = await subscribe(stream)
+        for i in range(5):
+            stream.publish({"id": i})
+        assert [line["offset"] for line in await read_lines(reader, 2)] == [3, 4]
+        assert stats.get_value("stream/dropped") == 3
+        writer.close()
+    finally:
+        await stream.stop()
@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock
+
+from onet_scraper import tor_control
+
+
+def make_controller(phase: str, established: str) -> MagicMock:
+    controller = MagicMock()
+    info = {"status/bootstrap-phase": phase, "status/circuit-established": established}
+    controller.get_info.side_effect = lambda key, default=None: info.get(key, default)
+    return controller
+
+
+def test_bootstrap_status_parses_progress():
+    controller = make_controller('NOTICE BOOTSTRAP PROGRESS=85 TAG=ap_handshake_done SUMMARY="Handshake"', "0")
+    assert tor_control.bootstrap_status(controller) == (85, False)
+
+    controller = make_controller('NOTICE BOOTSTRAP PROGRESS=100 TAG=done SUMMARY="Done"', "1")
+    assert tor_control.bootstrap_status(controller) == (100, True)
+
+
+def test_wait_until_ready_polls_until_circuit_established():
+    controller = MagicMock()
+    states = iter([("PROGRESS=50", "0"), ("PROGRESS=100", "0"), ("PROGRESS=100", "1")])
+    current = {}
+
+    def get_info(key, default=None):
+        if key == "status/bootstrap-phase":
+            current["phase"], current["established"] = next(states)
+            return current["phase"]
+        return current["established"]
+
+    controller.get_info.side_effect = get_info
+    assert tor_control.wait_until_ready(controller, timeout=5, poll_interval=0) is True
+
+
+def test_wait_until_ready_times_out():
+    controller = make_controller("PROGRESS=10", "0")
+    assert tor_control.wait_until_ready(controller, timeout=0, poll_interval=0) is False
+
+
+def test_prebuild_circuits_counts_failures():
+    controller = MagicMock()
+    controller.new_circuit.side_effect = ["1", Exception("timeout"), "3"]
+    assert tor_control.prebuild_circuits(controller, 3, timeout=1) == 2
+    controller.new_circuit.assert_called_with(await_build=True, timeout=1)
+
+
+def test_exit_tracker_maps_socks_username_to_exit():
+    tracker = tor_control.ExitTracker()
+    event = MagicMock(status="BUILT", socks_username="onet-1", path=[("AAAA", "guard"), ("BBBB", "exit")])
+    tracker.handle_circuit_event(event)
+    assert tracker.resolve("onet-1") == "BBBB"
+    assert tracker.resolve("onet-2") is None
+
+
+def test_exit_tracker_resolves_through_circuit_status():
+    tracker = tor_control.ExitTracker()
+    controller = MagicMock()
+    controller.get_circuits.return_value = [
+        MagicMock(status="BUILT", socks_username="onet-3", path=[("AAAA", "guard"), ("CCCC", "exit")])
+    ]
+    assert tracker.resolve("onet-3", controller) == "CCCC"
+
+
+def test_exit_tracker_excludes_repeatedly_banned_exits():
+    tracker = tor_control.ExitTracker(ban_threshold=2, ban_ratio=0.5)
+    assert tracker.record("GOOD", banned=False, latency=1.0) is False
+    assert tracker.record("BAD", banned=True) is False
+    assert tracker.record("BAD", banned=True) is True
+    # Already excluded: reported only once
+    assert tracker.record("BAD", banned=True) is False
+    assert tracker.exclude_exit_nodes() == "$BAD"
+    assert tracker.worst_exits()[0] == ("BAD", 3, 3, None)
+
+
+def test_exit_tracker_keeps_mostly_good_exits():
+    tracker = tor_control.ExitTracker(ban_threshold=2, ban_ratio=0.5)
+    for _ in range(5):
+        tracker.record("BUSY", banned=False, latency=2.0)
+    tracker.record("BUSY", banned=True)
+    assert tracker.record("BUSY", banned=True) is False
+    assert not tracker.excluded
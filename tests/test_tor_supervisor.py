@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from scrapy.statscollectors import MemoryStatsCollector
+
+from onet_scraper.tor_supervisor import TorSupervisor
+
+# Stands in for the tor binary: records its arguments and torrc, reports bootstrap start - except on SOCKS port
+# 9064, where it hangs without a word
+FAKE_TOR = """#!{python}
+import json, sys, time
+config = sys.stdin.read() if "-" in sys.argv else ""
+with open({log!r}, "a") as log:
+    log.write(json.dumps({{"argv": sys.argv[1:], "config": config}}) + "\\n")
+if "SocksPort 127.0.0.1:9064" not in config:
+    print("Oct 19 12:00:00.000 [notice] Bootstrapped 0% (starting): Starting", flush=True)
+time.sleep(60)
+"""
+
+
+@pytest.fixture
+def fake_tor(tmp_path):
+    log = tmp_path / "launches.jsonl"
+    script = tmp_path / "tor"
+    script.write_text(FAKE_TOR.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    return str(script), log
+
+
+@pytest.fixture
+def control_port(mocker):
+    """The control port of every fake tor answers with a finished bootstrap."""
+    open_controller = mocker.patch("onet_scraper.tor_control.open_controller")
+    mocker.patch("onet_scraper.tor_control.bootstrap_status", return_value=(100, True))
+    return open_controller
+
+
+def make_supervisor(fake_tor, tmp_path, start_timeout=5, **kwargs):
+    return TorSupervisor(
+        tor_cmd=fake_tor[0],
+        data_dir=str(tmp_path / "tor_data"),
+        start_timeout=start_timeout,
+        check_interval=0,
+        stats=MemoryStatsCollector(MagicMock()),
+        **kwargs,
+    )
+
+
+def test_supervisor_launches_instances_with_persistent_data_dirs(fake_tor, tmp_path, control_port):
+    seed = tmp_path / "tor_data"
+    seed.mkdir()
+    (seed / "cached-microdesc-consensus").write_text("consensus")
+    (seed / "state").write_text("guards")
+    supervisor = make_supervisor(fake_tor, tmp_path, instances=2, socks_port=9060, control_port=9061)
+
+    try:
+        instances = supervisor.start()
+        assert all(instance.alive() for instance in instances)
+    finally:
+        supervisor.stop()
+
+    assert [(i.proxy, i.control_port) for i in instances] == [
+        ("socks5://127.0.0.1:9060", 9061),
+        ("socks5://127.0.0.1:9062", 9063),
+    ]
+    assert not any(instance.alive() for instance in instances)
+    second = tmp_path / "tor_data-1"
+    assert (second / "cached-microdesc-consensus").read_text() == "consensus"
+    assert not (second / "state").exists()  # Guards stay per instance
+    assert os.stat(second).st_mode & 0o777 == 0o700
+
+    launches = [json.loads(line) for line in fake_tor[1].read_text().splitlines()]
+    assert "__OwningControllerProcess" in launches[0]["argv"]
+    assert "SocksPort 127.0.0.1:9062" in launches[1]["config"]
+    assert f"DataDirectory {second}" in launches[1]["config"]
+    assert "CookieAuthentication 1" in launches[1]["config"]
+
+
+def test_supervisor_restarts_dead_and_unresponsive_instances(fake_tor, tmp_path, control_port):
+    supervisor = make_supervisor(fake_tor, tmp_path, max_failures=2)
+    try:
+        (instance,) = supervisor.start()
+        first_pid = instance.process.pid
+        instance.process.kill()
+        instance.process.wait()
+
+        assert supervisor.check() == [instance]
+        assert instance.alive() and instance.process.pid != first_pid
+
+        # Control port stops answering: restarted after max_failures checks in a row
+        control_port.side_effect = OSError("connection refused")
+        assert supervisor.check() == []
+        control_port.side_effect = [OSError("connection refused"), MagicMock()]
+        assert supervisor.check() == [instance]
+    finally:
+        supervisor.stop()
+
+    assert instance.restarts == 2
+    assert supervisor.stats.get_value("tor/supervisor/restarts") == 2
+    assert supervisor.stats.get_value("tor/supervisor/failed_checks") == 2
+
+
+def test_supervisor_gives_up_on_silent_tor_and_stops_started_instances(fake_tor, tmp_path, control_port):
+    supervisor = make_supervisor(fake_tor, tmp_path, start_timeout=1, instances=3, socks_port=9060)
+
+    started = time.monotonic()
+    with pytest.raises(OSError, match=r"tor\[2\] did not start"):
+        supervisor.start()
+
+    assert time.monotonic() - started < 5
+    assert not any(instance.alive() for instance in supervisor.instances)
+    assert supervisor.watcher is None
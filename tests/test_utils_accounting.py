@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+from scrapy.statscollectors import MemoryStatsCollector
+
+from onet_scraper.utils import accounting
+
+
+def make_stats():
+    return MemoryStatsCollector(MagicMock())
+
+
+def test_rule_label():
+    names = ("ignored", "articles")
+    assert accounting.rule_label({"rule": 1}, names) == "articles"
+    assert accounting.rule_label({"rule": 3}, names) == "rule3"
+    assert accounting.rule_label({}, names) == "start"
+    assert accounting.rule_label({"rule": 1, "revisit": True}, names) == "revisit"
+
+
+def test_cost_is_settled_once():
+    stats = make_stats()
+    meta = {}
+    accounting.add_cost(meta, "articles", size=1000, download_s=2.0)
+    accounting.add_cost(meta, "articles", cpu_s=0.5)
+
+    assert accounting.settle(stats, meta, accounting.SAVED)
+    assert not accounting.settle(stats, meta, accounting.SAVED)
+    assert not accounting.settle(stats, None, accounting.SAVED)
+    assert stats.get_value("cost/articles/saved/pages") == 1
+    assert stats.get_value("cost/articles/saved/bytes") == 1000
+    assert stats.get_value("cost/articles/saved/download_s") == 2.0
+    assert stats.get_value("cost/articles/saved/cpu_s") == 0.5
+
+
+def test_cost_report_per_saved_article():
+    stats = make_stats()
+    for _ in range(2):
+        accounting.charge(stats, "articles", accounting.SAVED, size=300, download_s=1.0, cpu_s=0.1)
+    accounting.charge(stats, "articles", accounting.BANNED, size=100, download_s=3.0)
+    accounting.charge(stats, "categories", accounting.FOLLOWED, size=600, download_s=2.0, cpu_s=0.2)
+    stats.set_value("cost_per_saved/bytes", 123)  # Not part of the books
+
+    report = accounting.cost_report(stats.get_stats())
+
+    assert report["total"] == {"pages": 4, "bytes": 1300, "download_s": 7.0, "cpu_s": 0.4}
+    assert report["outcomes"]["banned"]["pages"] == 1
+    assert report["per_saved"] == {"bytes": 650, "download_s": 3.5, "cpu_s": 0.2}
+    assert report["rule_per_saved"]["categories"]["bytes"] == 300
+    lines = accounting.format_report(report)
+    assert any(line.startswith("articles") and "banned" in line for line in lines)
+    assert any(line.startswith("per saved article: 0.7 kB") for line in lines)
+
+
+def test_cost_report_without_saved_articles():
+    stats = make_stats()
+    accounting.charge(stats, "start", accounting.FOLLOWED, size=10)
+
+    report = accounting.cost_report(stats.get_stats())
+
+    assert report["per_saved"] is None
+    assert accounting.format_report(report)[-1] == "no saved articles"
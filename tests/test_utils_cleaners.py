@@ -2,7 +2,7 @@ from unittest.mock import patch
 
 import pytest
 
-from onet_scraper.utils.text_cleaners import clean_article_content
+from onet_scraper.utils.text_cleaners import clean_article_content, clean_article_content_with_stats
 
 # Mock rules to avoid depending on file system/json loading during unit test logic
 MOCK_RULES = {"scam_phrases": ["CLICK HERE", "BUY NOW"], "cutoff_markers": ["READ MORE"]}
@@ -73,3 +73,29 @@ def test_clean_article_content_short_lines(mock_rules):
     assert "OK" not in result_lines, "Short line 'OK' should be filtered out"
     assert "Yes" in result_lines, "Line 'Yes' (3 chars) should be kept"
     assert "This is a longer line" in result_lines
+
+
+def test_clean_article_content_with_stats(mock_rules):
+    raw = ["  Pierwszy akapit tekstu.  ", "CLICK HERE now", "Drugi\xa0akapit, trochę dłuższy od pierwszego."]
+    text, stats = clean_article_content_with_stats(raw)
+
+    assert text == clean_article_content(raw)
+    assert stats["word_count"] == len(text.split())
+    assert stats["read_time"] == 1
+    assert stats["char_count"] == len(text)
+    assert stats["paragraph_count"] == 2
+    assert len(stats["content_hash"]) == 40
+
+
+def test_content_hash_ignores_surrounding_whitespace(mock_rules):
+    _, stats = clean_article_content_with_stats(["Akapit pierwszy", "Akapit drugi"])
+    _, padded_stats = clean_article_content_with_stats(["  Akapit pierwszy ", "", "Akapit drugi  "])
+    _, changed_stats = clean_article_content_with_stats(["Akapit pierwszy", "Akapit zmieniony"])
+
+    assert stats["content_hash"] == padded_stats["content_hash"]
+    assert stats["content_hash"] != changed_stats["content_hash"]
+
+
+def test_clean_article_content_with_stats_empty(mock_rules):
+    assert clean_article_content_with_stats([]) == ("", {})
+    assert clean_article_content_with_stats(["  ", "OK"]) == ("", {})
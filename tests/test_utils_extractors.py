@@ -1,7 +1,9 @@
+import json
 from datetime import datetime, timedelta
 
 from scrapy.http import HtmlResponse
 
+from onet_scraper.utils import extractors
 from onet_scraper.utils.extractors import extract_json_ld, parse_is_recent
 
 # --- Tests for parse_is_recent ---
@@ -169,3 +171,81 @@ def test_extract_json_ld_distributed():
     # Should get date from first script AND author from second
     assert metadata["datePublished"] == "2026-01-01"
     assert metadata["author"] == "Split Author"
+
+
+def test_extract_json_ld_nested_graph_and_list():
+    """Test that nested @graph containers and top-level lists are walked."""
+    html = """
+    <html>
+        <script type="application/ld+json">
+        [
+            {"@type": "WebPage", "name": "Page"},
+            {"@graph": [{"@graph": [{"@type": "NewsArticle", "datePublished": "2026-01-01",
+                                     "author": ["Plain Author", {"name": "Second"}]}]}]}
+        ]
+        </script>
+    </html>
+    """
+    response = HtmlResponse(url="http://test.com", body=html.encode("utf-8"))
+    metadata = extract_json_ld(response)
+
+    assert metadata["datePublished"] == "2026-01-01"
+    assert metadata["author"] == "Plain Author"
+
+
+def test_extract_json_ld_skips_non_article_types():
+    """Organization/BreadcrumbList nodes must not leak their image/logo into article metadata."""
+    html = """
+    <html>
+        <script type="application/ld+json">
+        {"@type": "Organization", "name": "Onet", "image": "http://example.com/logo.png"}
+        </script>
+        <script type="application/ld+json">
+        {"@graph": [
+            {"@type": "BreadcrumbList", "image": "http://example.com/crumb.png"},
+            {"@type": "NewsArticle", "datePublished": "2026-01-01", "image": [{"url": "http://example.com/lead.jpg"}]}
+        ]}
+        </script>
+    </html>
+    """
+    response = HtmlResponse(url="http://test.com", body=html.encode("utf-8"))
+    metadata = extract_json_ld(response)
+
+    assert metadata["image_url"] == "http://example.com/lead.jpg"
+
+
+def test_extract_json_ld_stops_when_complete(mocker):
+    """Once all five keys are filled, remaining scripts are not decoded."""
+    html = """
+    <html>
+        <script type="application/ld+json">
+        {"@type": "NewsArticle", "datePublished": "2026-01-01", "dateModified": "2026-01-02",
+         "author": {"name": "A"}, "articleSection": "Kraj", "image": "http://example.com/a.jpg"}
+        </script>
+        <script type="application/ld+json">
+        {"@type": "NewsArticle", "datePublished": "1999-01-01"}
+        </script>
+    </html>
+    """
+    response = HtmlResponse(url="http://test.com", body=html.encode("utf-8"))
+    loads = mocker.spy(extractors, "_json_loads")
+
+    metadata = extract_json_ld(response)
+
+    assert metadata["datePublished"] == "2026-01-01"
+    assert loads.call_count == 1
+
+
+def test_extract_json_ld_large_non_article_blobs():
+    """Big breadcrumb/organization scripts around the article do not change what is extracted."""
+    crumbs = {"@type": "BreadcrumbList", "itemListElement": [{"@type": "ListItem", "position": i} for i in range(2000)]}
+    organization = {"@type": "NewsMediaOrganization", "image": "http://example.com/logo.png", "sameAs": ["x"] * 2000}
+    article = {"@graph": [{"@type": "NewsArticle", "author": [{"name": "Bench Author"}], "image": {"url": "lead.jpg"}}]}
+    scripts = "".join(
+        f'<script type="application/ld+json">{json.dumps(blob)}</script>' for blob in (crumbs, organization, article)
+    )
+    response = HtmlResponse(url="http://test.com", body=f"<html>{scripts}</html>".encode())
+    metadata = extract_json_ld(response)
+
+    assert metadata["author"] == "Bench Author"
+    assert metadata["image_url"] == "lead.jpg"
@@ -0,0 +1,102 @@
+from scrapy.http import HtmlResponse, Request
+from scrapy.linkextractors import LinkExtractor
+from scrapy.spiders import CrawlSpider, Rule
+
+from onet_scraper.spiders.onet import OnetSpider
+from onet_scraper.utils.link_extraction import SinglePassLinkExtractor
+
+LISTING_HTML = """
+<html><head><base href="https://wiadomosci.onet.pl/"></head><body>
+<nav>
+  <a href="/kraj">Kraj</a> <a href="swiat">Świat</a> <a href="https://wiadomosci.onet.pl/pogoda">Pogoda</a>
+  <a href="/archiwum/2024">Archiwum</a> <a href="https://sport.onet.pl/2026-01-01">Sport</a>
+  <a href="https://przegladsportowy.onet.pl/pilka/relacja/abc123">PS</a>
+</nav>
+<div class="ods-c-card-wrapper">
+  <a href="/kraj/pierwszy/abc123"> Pierwszy </a>
+  <div class="ods-o-card"><a href="/kraj/zagniezdzony/nest123" rel="nofollow">Nested</a></div>
+  <a href="/kraj/pierwszy/abc123?utm_source=x">Duplicate with tracking</a>
+</div>
+<div class="ods-o-card"><a href="/swiat/drugi/def456#komentarze">Drugi</a><a href="/kraj/zdjecie/x.jpg">Foto</a></div>
+<a href="/kraj/poza-karta/ghi789">Outside cards</a>
+<a href="mailto:redakcja@onet.pl">Mail</a> <a href="javascript:void(0)">JS</a> <a href=" /kraj ">Kraj again</a>
+<map><area href="/kraj/mapa/map123"></map>
+<a class="next" href="/kraj?page=2">Następna</a>
+<div class="ods-c-card-wrapper"><a href="/swiat/trzeci/jkl012">Trzeci</a></div>
+</body></html>
+"""
+
+
+def listing():
+    url = "https://wiadomosci.onet.pl/kraj"
+    return HtmlResponse(url=url, body=LISTING_HTML.encode("utf-8"), request=Request(url))
+
+
+def as_tuples(links):
+    return [(link.url, link.text, link.fragment, link.nofollow) for link in links]
+
+
+def test_links_per_rule_match_each_link_extractor():
+    spider = OnetSpider()
+    response = listing()
+
+    expected = [as_tuples(rule.link_extractor.extract_links(response)) for rule in spider._rules]
+    assert [as_tuples(links) for links in SinglePassLinkExtractor.from_spider(spider).extract(response)] == expected
+    assert expected[1]  # the fixture exercises the restricted article rule
+
+
+def test_spider_requests_match_crawl_spider():
+    spider = OnetSpider()
+    response = listing()
+
+    ours = [(r.url, r.callback, r.meta.get("rule")) for r in spider._requests_to_follow(response) if r]
+    reference = [
+        (r.url, r.callback, r.meta.get("rule")) for r in CrawlSpider._requests_to_follow(spider, response) if r
+    ]
+    assert ours == reference
+
+
+def test_rules_outside_the_shared_walk_use_their_own_extractor():
+    rules = [
+        Rule(LinkExtractor(allow=r"/kraj/", restrict_text=r"Pierwszy")),
+        Rule(LinkExtractor(allow=r"/kraj", canonicalize=True)),
+        Rule(LinkExtractor(allow=r"onet\.pl", tags=("area",))),
+        Rule(LinkExtractor(allow=r"/swiat")),
+    ]
+    spider = type("Spider", (CrawlSpider,), {"name": "t", "rules": rules})()
+    extractor = SinglePassLinkExtractor.from_spider(spider)
+    response = listing()
+
+    # restrict_text and canonicalize never share the walk; the first shareable rule (area tags) sets it
+    assert extractor.fallback == [0, 1, 3]
+    expected = [as_tuples(rule.link_extractor.extract_links(response)) for rule in spider._rules]
+    assert [as_tuples(links) for links in extractor.extract(response)] == expected
+
+
+def test_missing_scrapy_internals_fall_back_to_each_rule(monkeypatch):
+    monkeypatch.setattr("onet_scraper.utils.link_extraction.SUPPORTED", False)
+    spider = OnetSpider()
+    response = listing()
+
+    assert not spider.rule_links.scopes
+    expected = [as_tuples(rule.link_extractor.extract_links(response)) for rule in spider._rules]
+    assert [as_tuples(links) for links in spider.rule_links.extract(response)] == expected
+    ours = [r.url for r in spider._requests_to_follow(response) if r]
+    assert ours == [r.url for r in CrawlSpider._requests_to_follow(spider, response) if r]
+
+
+def test_generated_listing_matches_each_link_extractor():
+    # The shape of tests/benchmarks/test_bench_link_extraction.py, small enough for every run
+    nav = "".join(f'<a href="/kategoria-{i}">Kategoria {i}</a>' for i in range(50))
+    cards = "".join(
+        f'<div class="ods-c-card-wrapper"><div class="ods-o-card"><a href="/kraj/artykul-{i}/id{i:06d}">'
+        f"<span>Tytuł {i}</span></a><a href='/autorzy/autor-{i % 5}'>Autor</a></div></div>"
+        for i in range(150)
+    )
+    html = f'<html><body><nav>{nav}</nav><main>{cards}</main><a class="next" href="/kraj?page=2">Dalej</a></body>'
+    response = HtmlResponse(url="https://wiadomosci.onet.pl/kraj", body=html.encode("utf-8"))
+    spider = OnetSpider()
+
+    expected = [as_tuples(rule.link_extractor.extract_links(response)) for rule in spider._rules]
+    assert [as_tuples(links) for links in spider.rule_links.extract(response)] == expected
+    assert len(expected[1]) == 150
@@ -0,0 +1,89 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from scrapy.http import HtmlResponse, Request
+from scrapy.settings import Settings
+
+from onet_scraper.spiders.onet import OnetSpider
+from onet_scraper.utils.parse_pool import ParsePool
+from onet_scraper.utils.parsing import STATUS_OK, STATUS_STALE, parse_article_body
+
+
+def article_html(date):
+    return f"""
+    <html>
+        <head>
+            <script type="application/ld+json">
+            {{"@type": "NewsArticle", "datePublished": "{date}T12:00:00+01:00", "author": {{"name": "Pool Author"}}}}
+            </script>
+        </head>
+        <body>
+            <h1>Pool Title</h1>
+            <p class="hyphenate">Content parsed in a worker process, long enough to be kept.</p>
+        </body>
+    </html>
+    """.encode("utf-8")
+
+
+def test_parse_article_body_returns_compact_item():
+    today = datetime.now().strftime("%Y-%m-%d")
+    result = parse_article_body("https://wiadomosci.onet.pl/kraj/tytul/abc123", article_html(today))
+
+    assert result["status"] == STATUS_OK
+    assert result["item"]["title"] == "Pool Title"
+    assert result["item"]["author"] == "Pool Author"
+    assert result["item"]["id"] == "abc123"
+
+
+def test_parse_article_body_stale():
+    result = parse_article_body("https://wiadomosci.onet.pl/kraj/tytul/abc123", article_html("2020-01-01"))
+
+    assert result["status"] == STATUS_STALE
+    assert result["item"] is None
+
+
+@pytest.mark.asyncio
+async def test_parse_pool_runs_in_worker():
+    today = datetime.now().strftime("%Y-%m-%d")
+    pool = ParsePool(max_workers=1, max_pending=1)
+    try:
+        result = await pool.parse("https://wiadomosci.onet.pl/kraj/tytul/abc123", article_html(today))
+    finally:
+        pool.shutdown()
+
+    assert result["status"] == STATUS_OK
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_spider_routes_article_rule_to_pool():
+    crawler = MagicMock()
+    crawler.settings = Settings({"PARSE_OFFLOAD_ENABLED": True, "PARSE_OFFLOAD_WORKERS": 1})
+    spider = OnetSpider.from_crawler(crawler)
+
+    callbacks = [rule.callback for rule in spider._rules]
+    assert spider.parse_item_offloaded in callbacks
+    assert spider.parse_item not in callbacks
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    url = "https://wiadomosci.onet.pl/kraj/tytul/abc123"
+    response = HtmlResponse(url=url, request=Request(url), body=article_html(today))
+    try:
+        items = await spider.parse_item_offloaded(response)
+    finally:
+        spider.closed("finished")
+
+    assert len(items) == 1
+    assert items[0]["title"] == "Pool Title"
+
+
+def test_spider_close_does_not_wait_for_workers():
+    spider = OnetSpider()
+    spider.parse_pool = ParsePool(max_workers=1)
+    executor = spider.parse_pool._executor = MagicMock()
+
+    spider.closed("finished")
+
+    executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+    assert spider.parse_pool._executor is None
@@ -0,0 +1,72 @@
+import os
+
+from onet_scraper.utils.response_cache import ResponseCache
+
+ENTRY = (200, b"<html>Listing</html>", "https://wiadomosci.onet.pl/kraj", {"Content-Type": "text/html"})
+
+
+async def test_cache_hit_by_canonical_url():
+    cache = ResponseCache(ttl=60)
+    await cache.set("https://wiadomosci.onet.pl/kraj", ENTRY)
+
+    assert await cache.get("https://wiadomosci.onet.pl/kraj/?utm_source=fb") == ENTRY
+    assert cache.hits == 1
+
+
+async def test_cache_expires_after_ttl(mocker):
+    cache = ResponseCache(ttl=60)
+    mock_time = mocker.patch("onet_scraper.utils.response_cache.time.time", return_value=1000.0)
+    await cache.set("https://wiadomosci.onet.pl/kraj", ENTRY)
+
+    mock_time.return_value = 1061.0
+
+    assert await cache.get("https://wiadomosci.onet.pl/kraj") is None
+    assert cache.misses == 1
+
+
+async def test_memory_level_is_lru_bounded():
+    cache = ResponseCache(ttl=60, max_memory_items=2)
+    for name in ("a", "b"):
+        await cache.set(f"https://wiadomosci.onet.pl/{name}", ENTRY)
+    await cache.get("https://wiadomosci.onet.pl/a")  # "a" becomes most recent
+    await cache.set("https://wiadomosci.onet.pl/c", ENTRY)
+
+    assert await cache.get("https://wiadomosci.onet.pl/b") is None
+    assert await cache.get("https://wiadomosci.onet.pl/a") == ENTRY
+
+
+async def test_disk_level_survives_new_instance(tmp_path):
+    await ResponseCache(ttl=60, cache_dir=str(tmp_path)).set("https://wiadomosci.onet.pl/kraj", ENTRY)
+
+    fresh = ResponseCache(ttl=60, cache_dir=str(tmp_path))
+
+    assert await fresh.get("https://wiadomosci.onet.pl/kraj") == ENTRY
+
+
+async def test_disk_level_is_bounded(tmp_path):
+    cache = ResponseCache(ttl=60, max_memory_items=1, max_disk_items=3, cache_dir=str(tmp_path))
+    for i in range(5):
+        await cache.set(f"https://wiadomosci.onet.pl/k{i}", ENTRY)
+
+    assert len(os.listdir(tmp_path)) == 3
+
+
+async def test_disk_index_spares_io_and_evicts_without_scanning(tmp_path, mocker):
+    cache = ResponseCache(ttl=60, max_memory_items=1, max_disk_items=2, cache_dir=str(tmp_path))
+    mock_time = mocker.patch("onet_scraper.utils.response_cache.time.time", return_value=1000.0)
+    await cache.set("https://wiadomosci.onet.pl/old", ENTRY)
+    mock_time.return_value = 1100.0
+    for name in ("a", "b"):
+        await cache.set(f"https://wiadomosci.onet.pl/{name}", ENTRY)
+    await cache.get("https://wiadomosci.onet.pl/a")  # From disk: "b" is in memory
+
+    scan = mocker.spy(cache, "_disk_files")
+    read = mocker.spy(cache, "_read_disk")
+    assert await cache.get("https://wiadomosci.onet.pl/never-seen") is None
+    await cache.set("https://wiadomosci.onet.pl/c", ENTRY)
+
+    read.assert_not_called()
+    scan.assert_not_called()
+    # The expired entry went first, then the least recently used one ("b")
+    assert len(os.listdir(tmp_path)) == 2
+    assert await ResponseCache(ttl=60, cache_dir=str(tmp_path)).get("https://wiadomosci.onet.pl/a") == ENTRY
@@ -0,0 +1,73 @@
+from onet_scraper.utils.revisit import RevisitPolicy, parse_timestamp
+
+PUBLISHED = "2026-10-19T08:00:00+00:00"
+T0 = parse_timestamp(PUBLISHED)
+HOUR = 3600
+
+
+def article(story_id, modified=None, content_hash="h1", section="Kraj"):
+    return {
+        "url": f"https://wiadomosci.onet.pl/kraj/relacja/{story_id}",
+        "id": story_id,
+        "date": PUBLISHED,
+        "date_modified": modified,
+        "section": section,
+        "content_hash": content_hash,
+    }
+
+
+def test_interval_comes_from_date_modified_deltas():
+    policy = RevisitPolicy(default_interval=HOUR, min_interval=60, max_interval=12 * HOUR, smoothing=0.5)
+    policy.observe(article("live1", "2026-10-19T08:20:00+00:00"), now=T0 + 30 * 60)
+    entry = policy.tracked["live1"]
+    assert entry.interval == 20 * 60  # published -> first modification
+
+    policy.observe(article("live1", "2026-10-19T09:00:00+00:00", content_hash="h2"), now=T0 + 65 * 60)
+    assert entry.interval == 30 * 60  # smoothed with the 40 min delta
+    assert policy.section_intervals["Kraj"] == 30 * 60
+    assert entry.content_hash == "h2"
+
+
+def test_section_average_is_the_prior_for_new_articles():
+    policy = RevisitPolicy(default_interval=4 * HOUR, min_interval=60)
+    policy.observe(article("live1", "2026-10-19T08:10:00+00:00"), now=T0 + 15 * 60)
+    policy.observe(article("static1"), now=T0 + 15 * 60)  # never modified, same section
+    policy.observe(article("other1", section="Sport"), now=T0 + 15 * 60)
+
+    assert policy.expected_interval(policy.tracked["static1"]) == 10 * 60
+    assert policy.expected_interval(policy.tracked["other1"]) == 4 * HOUR
+
+
+def test_due_respects_budget_and_backs_off_unchanged():
+    policy = RevisitPolicy(default_interval=HOUR, min_interval=60, max_interval=3 * HOUR)
+    for i in range(5):
+        policy.observe(article(f"a{i}"), now=T0 + i * 60)  # a0 captured first, most overdue
+
+    assert policy.due(budget=2, now=T0 + 30 * 60) == []
+    chosen = policy.due(budget=2, now=T0 + 2 * HOUR)
+    assert [entry.url.rsplit("/", 1)[1] for entry in chosen] == ["a0", "a1"]
+    # Unchanged so far: the next wait doubles
+    assert policy.expected_interval(chosen[0]) == 2 * HOUR
+    assert len(policy.due(budget=10, now=T0 + 2 * HOUR + 60)) == 3
+
+
+def test_old_or_unhashed_articles_are_not_tracked():
+    policy = RevisitPolicy(max_age=48 * HOUR)
+    assert not policy.observe(article("old"), now=T0 + 49 * HOUR)
+    assert not policy.observe(article("empty", content_hash=None), now=T0)
+
+    policy.observe(article("a1"), now=T0)
+    assert policy.due(budget=5, now=T0 + 49 * HOUR) == []
+    assert policy.tracked == {}
+
+
+def test_first_delta_uses_the_publication_time_not_the_day():
+    policy = RevisitPolicy(default_interval=HOUR, min_interval=60, max_age=2 * HOUR)
+    published = "2026-10-19T14:00:00+00:00"
+    item = dict(article("live2", "2026-10-19T14:30:00+00:00"), date="2026-10-19", date_published=published)
+    now = parse_timestamp(published) + HOUR
+
+    assert policy.observe(item, now=now)
+    assert policy.tracked["live2"].interval == 30 * 60
+    # Age counts from 14:00, not from midnight
+    assert policy.due(budget=5, now=now + 30 * 60)
@@ -0,0 +1,53 @@
+import pytest
+from scrapy.http import HtmlResponse
+
+from onet_scraper.spiders.onet import OnetSpider
+from onet_scraper.utils.url_classifier import ARTICLE, IGNORE, LISTING
+
+
+@pytest.fixture
+def classifier():
+    return OnetSpider().url_classifier
+
+
+@pytest.mark.parametrize(
+    "url, kind",
+    [
+        ("https://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123", ARTICLE),
+        ("https://wiadomosci.onet.pl/kraj", LISTING),
+        ("https://wiadomosci.onet.pl/", LISTING),
+        # First rule (skip_request) wins, as in CrawlSpider
+        ("https://wiadomosci.onet.pl/pogoda/prognoza/abc123", IGNORE),
+        ("https://wiadomosci.onet.pl/archiwum/2020-01-01", IGNORE),
+        ("https://przegladsportowy.onet.pl/pilka-nozna", IGNORE),
+        ("https://wiadomosci.onet.pl/kraj/zdjecie/foto.jpg", IGNORE),
+        ("https://example.com/kraj/tytul/abc123", IGNORE),
+    ],
+)
+def test_classify(classifier, url, kind):
+    assert classifier.classify(url) == kind
+
+
+def test_classifier_agrees_with_link_extraction(classifier):
+    """Every link the article rule extracts from a page is classified as an article."""
+    spider = OnetSpider()
+    html = """
+    <div class="ods-c-card-wrapper">
+        <a href="https://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123">A</a>
+        <a href="https://wiadomosci.onet.pl/swiat/inny-artykul/xyz999">B</a>
+    </div>
+    """
+    response = HtmlResponse(url="https://wiadomosci.onet.pl/", body=html.encode(), encoding="utf-8")
+    article_rule = next(rule for rule in spider._rules if rule.callback is not None)
+
+    links = article_rule.link_extractor.extract_links(response)
+
+    assert links
+    assert all(classifier.classify(link.url) == ARTICLE for link in links)
+
+
+def test_classify_is_memoized(classifier):
+    url = "https://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123"
+    classifier.classify(url)
+    classifier.classify(url)
+    assert classifier.classify.cache_info().hits >= 1
@@ -0,0 +1,51 @@
+import pytest
+
+from onet_scraper.utils.urls import canonicalize_url, fingerprint_key, is_category_url, story_id
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123",
+        "https://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123?utm_source=facebook&utm_medium=social",
+        "http://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123#comments",
+        "https://m.wiadomosci.onet.pl/kraj/tytul-artykulu/abc123/amp",
+        "https://WIADOMOSCI.onet.pl/kraj/tytul-artykulu/abc123/?fbclid=xyz",
+    ],
+)
+def test_canonicalize_url_collapses_variants(url):
+    assert canonicalize_url(url) == "https://wiadomosci.onet.pl/kraj/tytul-artykulu/abc123"
+
+
+def test_canonicalize_url_keeps_meaningful_params():
+    url = "https://wiadomosci.onet.pl/kraj?utm_campaign=x&page=2"
+    assert canonicalize_url(url) == "https://wiadomosci.onet.pl/kraj?page=2"
+
+
+def test_canonicalize_url_ignores_foreign_hosts():
+    url = "https://example.com/a?utm_source=x#frag"
+    assert canonicalize_url(url) == url
+
+
+def test_story_id_across_hosts():
+    assert story_id("https://wiadomosci.onet.pl/kraj/tytul/abc123") == "abc123"
+    assert story_id("https://www.onet.pl/informacje/onetwiadomosci/tytul/abc123,79cfc278") == "abc123"
+
+
+def test_look_alike_domains_are_not_onet():
+    for url in ("https://notonet.pl/kraj/tytul/abc123?utm_source=x", "https://m.fakeonet.pl/kraj/tytul/abc123"):
+        assert canonicalize_url(url) == url
+        assert story_id(url) is None
+    assert not is_category_url("https://notonet.pl/kraj")
+    assert story_id("https://onet.pl/kraj/tytul/abc123") == "abc123"
+
+
+def test_story_id_not_for_listings():
+    assert story_id("https://wiadomosci.onet.pl/kraj") is None
+    assert story_id("https://wiadomosci.onet.pl/kraj/strona/2") is None
+    assert story_id("https://example.com/a/b/abc123") is None
+
+
+def test_fingerprint_key_prefers_story_id():
+    assert fingerprint_key("https://wiadomosci.onet.pl/kraj/tytul/abc123") == "onet-story:abc123"
+    assert fingerprint_key("https://wiadomosci.onet.pl/kraj/") == "https://wiadomosci.onet.pl/kraj"